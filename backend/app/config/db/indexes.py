@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import json
+import logging
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from typing import List
+from backend.app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry. Everything here is created idempotently at startup
+# (see ENSURE_INDEXES_ON_STARTUP) and can be audited with
+# `python -m backend.app.config.db.indexes check`.
+MONGO_INDEXES = {
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        # filterUsers predicate shapes; _id last so keyset pages stay index-only.
+        IndexModel([("role", ASCENDING), ("availability", ASCENDING), ("experience", ASCENDING), ("_id", ASCENDING)],
+                   name="role_availability_experience"),
+        IndexModel([("availability", ASCENDING), ("experience", ASCENDING), ("_id", ASCENDING)],
+                   name="availability_experience"),
+        # Multikey indexes for array membership filters.
+        IndexModel([("skills", ASCENDING), ("availability", ASCENDING), ("experience", ASCENDING)],
+                   name="skills_availability_experience"),
+        IndexModel([("interests", ASCENDING), ("availability", ASCENDING)], name="interests_availability"),
+    ],
+    "organizations": [
+        IndexModel([("members", ASCENDING)], name="members"),
+    ],
+    "outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)], name="status_next_attempt"),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created"),
+        IndexModel([("claim", ASCENDING)], name="claim", sparse=True),
+        IndexModel([("applied_at", ASCENDING)], name="applied_ttl", expireAfterSeconds=settings.OUTBOX_RETENTION_SECONDS),
+    ],
+}
+
+NEO4J_SCHEMA = {
+    "user_username_unique": "CREATE CONSTRAINT user_username_unique IF NOT EXISTS FOR (u:User) REQUIRE u.username IS UNIQUE",
+    "skill_name_unique": "CREATE CONSTRAINT skill_name_unique IF NOT EXISTS FOR (s:Skill) REQUIRE s.name IS UNIQUE",
+    "interest_name_unique": "CREATE CONSTRAINT interest_name_unique IF NOT EXISTS FOR (i:Interest) REQUIRE i.name IS UNIQUE",
+    "user_role": "CREATE INDEX user_role IF NOT EXISTS FOR (u:User) ON (u.role)",
+}
+
+# Representative query shapes the check mode explains to catch plans that scan.
+MONGO_PROBE_QUERIES = [
+    ("users", {"username": "probe"}),
+    ("users", {"role": "probe", "availability": True, "experience": {"$gte": 0}}),
+    ("users", {"availability": True, "experience": {"$gte": 0}}),
+    ("users", {"skills": "probe", "availability": True}),
+    ("users", {"interests": "probe"}),
+    ("organizations", {"members": "probe"}),
+]
+
+NEO4J_PROBE_QUERIES = [
+    ("MATCH (u:User {username: $value}) RETURN u", {"value": "probe"}),
+    ("MATCH (s:Skill {name: $value}) RETURN s", {"value": "probe"}),
+    ("MATCH (i:Interest {name: $value}) RETURN i", {"value": "probe"}),
+    ("MATCH (u:User) WHERE u.role = $value RETURN u", {"value": "probe"}),
+]
+
+_MONGO_SCAN_STAGES = {"COLLSCAN"}
+_NEO4J_SCAN_OPERATORS = {"AllNodesScan", "NodeByLabelScan"}
+
+
+async def ensure_mongo_indexes(db):
+    for collection, indexes in MONGO_INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                # e.g. existing duplicates block a unique index; keep serving.
+                logger.error("Could not create index %s.%s: %s", collection, index.document["name"], e)
+
+
+async def ensure_neo4j_schema(driver, database=None):
+    async with driver.session(database=database) as session:
+        for name, statement in NEO4J_SCHEMA.items():
+            try:
+                result = await session.run(statement)
+                await result.consume()
+            except Exception as e:
+                logger.error("Could not create Neo4j schema item %s: %s", name, e)
+
+
+def _find_stages(plan, key: str, wanted: set) -> List[str]:
+    found = []
+    if isinstance(plan, dict):
+        # Neo4j operator names may carry a runtime suffix such as "@neo4j".
+        if str(plan.get(key)).split("@")[0] in wanted:
+            found.append(plan[key])
+        for value in plan.values():
+            found += _find_stages(value, key, wanted)
+    elif isinstance(plan, list):
+        for item in plan:
+            found += _find_stages(item, key, wanted)
+    return found
+
+
+async def check_mongo_indexes(db) -> dict:
+    missing = []
+    for collection, indexes in MONGO_INDEXES.items():
+        existing = {info["name"] async for info in db[collection].list_indexes()}
+        missing += [f"{collection}.{index.document['name']}" for index in indexes if index.document["name"] not in existing]
+
+    scans = []
+    for collection, filt in MONGO_PROBE_QUERIES:
+        explain = await db.command({"explain": {"find": collection, "filter": filt}, "verbosity": "queryPlanner"})
+        stages = _find_stages(explain.get("queryPlanner", {}).get("winningPlan", {}), "stage", _MONGO_SCAN_STAGES)
+        if stages:
+            scans.append({"collection": collection, "filter": filt, "stages": stages})
+    return {"missing": missing, "scans": scans}
+
+
+async def check_neo4j_schema(driver, database=None) -> dict:
+    async with driver.session(database=database) as session:
+        existing = set()
+        for statement in ("SHOW CONSTRAINTS YIELD name", "SHOW INDEXES YIELD name"):
+            result = await session.run(statement)
+            existing |= {record["name"] async for record in result}
+        missing = [name for name in NEO4J_SCHEMA if name not in existing]
+
+        scans = []
+        for query, params in NEO4J_PROBE_QUERIES:
+            result = await session.run(f"EXPLAIN {query}", params)
+            summary = await result.consume()
+            operators = _find_stages(summary.plan or {}, "operatorType", _NEO4J_SCAN_OPERATORS)
+            if operators:
+                scans.append({"query": query, "operators": operators})
+    return {"missing": missing, "scans": scans}
+
+
+async def _main(command: str):
+    from fastapi import FastAPI
+    from backend.app.config.db import resources
+
+    app = FastAPI()
+    async with resources.lifespan(app, stores=("mongo", "neo4j"), warmup=False):
+        if command == "apply":
+            await ensure_mongo_indexes(app.state.mongodb)
+            await ensure_neo4j_schema(app.state.neo4j, settings.NEO4J_DATABASE)
+        report = {
+            "mongo": await check_mongo_indexes(app.state.mongodb),
+            "neo4j": await check_neo4j_schema(app.state.neo4j, settings.NEO4J_DATABASE),
+        }
+    print(json.dumps(report, indent=2, default=str))
+    return 1 if any(report[store]["missing"] or report[store]["scans"] for store in report) else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply or audit the Mongo/Neo4j index registry")
+    parser.add_argument("command", choices=["apply", "check"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(asyncio.run(_main(args.command)))
@@ -1,22 +1,37 @@
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
 from contextlib import asynccontextmanager
-from fastapi import Depends, FastAPI, Request
-from pymongo.server_api import ServerApi
+from starlette.requests import Request
 import os
-import certifi
+from backend.app.config import settings
+from backend.app.services import metrics, slow_query_log
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 
+
+def create_client():
+    # Motor is imported here so CLIs and tests that never connect do not pay for it.
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    return AsyncIOMotorClient(
+        MONGO_URI,
+        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGO_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        event_listeners=metrics.mongo_event_listeners() + slow_query_log.mongo_event_listeners(),
+    )
+
+
 @asynccontextmanager
-async def lifespan(app: FastAPI):
-    client = AsyncIOMotorClient(MONGO_URI)
-    db = client.get_database("nosql_project")
+async def lifespan(app):
+    client = create_client()
+    db = client.get_database(settings.MONGO_DATABASE)
     app.state.mongodb = db
     yield
     client.close()
 
 def get_mongo_db(request: Request):
-    return request.app.state.mongodb
\ No newline at end of file
+    return request.app.state.mongodb
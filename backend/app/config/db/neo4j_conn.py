@@ -1,14 +1,69 @@
-from neo4j import GraphDatabase
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Optional
+from backend.app.config import settings
+from backend.app.services import metrics
 import os
 
+if TYPE_CHECKING:
+    from neo4j import AsyncDriver
+
 load_dotenv()
 
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+_driver: Optional["AsyncDriver"] = None
+
+
+def create_driver() -> "AsyncDriver":
+    # The driver is imported here so CLIs and tests that never connect do not pay for it.
+    from neo4j import AsyncGraphDatabase
+
+    return AsyncGraphDatabase.driver(
+        NEO4J_URI,
+        auth=(NEO4J_USER, NEO4J_PASSWORD),
+        max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+        connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+        max_transaction_retry_time=settings.NEO4J_MAX_TRANSACTION_RETRY_TIME,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global _driver
+    _driver = create_driver()
+    app.state.neo4j = _driver
+    yield
+    await _driver.close()
+    _driver = None
+
+
+def get_driver() -> "AsyncDriver":
+    if _driver is None:
+        raise RuntimeError("Neo4j driver is not initialised, is the app lifespan running?")
+    return _driver
+
 
 def get_session():
-    return driver.session()
+    return get_driver().session(database=settings.NEO4J_DATABASE)
+
+
+async def execute_read(work, *args, **kwargs):
+    # Managed transactions are routed to readers and retried on transient errors by the driver.
+    metrics.neo4j_sessions_in_use.inc()
+    try:
+        async with get_session() as session:
+            return await session.execute_read(work, *args, **kwargs)
+    finally:
+        metrics.neo4j_sessions_in_use.dec()
+
+
+async def execute_write(work, *args, **kwargs):
+    metrics.neo4j_sessions_in_use.inc()
+    try:
+        async with get_session() as session:
+            return await session.execute_write(work, *args, **kwargs)
+    finally:
+        metrics.neo4j_sessions_in_use.dec()
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Dict, Iterable, Optional
+from backend.app.config import settings
+from backend.app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# One owner for the Mongo, Neo4j and Redis clients.
+#
+# lifespan() opens the stores through their *_conn modules, which read pool
+# sizes and timeouts from settings, then pre-opens and verifies
+# *_WARMUP_CONNECTIONS connections per store with concurrent pings, so the
+# first requests do not pay for connection setup. The app only reports ready
+# (GET /ready) once every store is warm, and stops reporting ready as soon as
+# shutdown begins. CLIs use the same lifespan with warmup off and only the
+# stores they need; the drivers themselves are imported when a store is opened.
+STORES = ("mongo", "neo4j", "redis")
+
+_ready = False
+_warmup: Dict[str, dict] = {}
+
+
+def _store_lifespan(store: str):
+    if store == "mongo":
+        from backend.app.config.db.mongo_conn import lifespan
+    elif store == "neo4j":
+        from backend.app.config.db.neo4j_conn import lifespan
+    elif store == "redis":
+        from backend.app.config.db.redis_conn import lifespan
+    else:
+        raise ValueError(f"Unknown store {store!r}")
+    return lifespan
+
+
+async def _ping_mongo(app):
+    await app.state.mongodb.command("ping")
+
+
+async def _return_one(tx):
+    result = await tx.run("RETURN 1")
+    await result.consume()
+
+
+async def _ping_neo4j(app):
+    async with app.state.neo4j.session(database=settings.NEO4J_DATABASE) as session:
+        await session.execute_read(_return_one)
+
+
+async def _ping_redis(app):
+    await app.state.redis.ping()
+
+
+_PINGS = {"mongo": _ping_mongo, "neo4j": _ping_neo4j, "redis": _ping_redis}
+
+
+def _warmup_connections(store: str) -> int:
+    return {
+        "mongo": settings.MONGO_WARMUP_CONNECTIONS,
+        "neo4j": settings.NEO4J_WARMUP_CONNECTIONS,
+        "redis": settings.REDIS_WARMUP_CONNECTIONS,
+    }[store]
+
+
+async def warm_up(app, store: str, connections: Optional[int] = None) -> dict:
+    # Concurrent pings make each pool open that many connections at once.
+    connections = max(1, _warmup_connections(store) if connections is None else connections)
+    started = time.perf_counter()
+    ping = _PINGS[store]
+    await asyncio.wait_for(
+        asyncio.gather(*(ping(app) for _ in range(connections))), settings.WARMUP_TIMEOUT_SECONDS
+    )
+    result = {"connections": connections, "seconds": round(time.perf_counter() - started, 3)}
+    _warmup[store] = result
+    return result
+
+
+@asynccontextmanager
+async def lifespan(app, stores: Iterable[str] = STORES, warmup: bool = True):
+    global _ready
+    stores = tuple(stores)
+    async with AsyncExitStack() as stack:
+        for store in stores:
+            await stack.enter_async_context(_store_lifespan(store)(app))
+        if "neo4j" in stores:
+            # Reported only by processes that actually open a driver.
+            metrics.neo4j_pool_max.set(value=settings.NEO4J_MAX_POOL_SIZE)
+        if warmup:
+            for store, result in zip(stores, await asyncio.gather(*(warm_up(app, store) for store in stores))):
+                logger.info("Warmed up %s: %d connections in %.3fs", store, result["connections"], result["seconds"])
+        _ready = True
+        try:
+            yield
+        finally:
+            _ready = False
+            _warmup.clear()
+
+
+def attach(app, mongodb=None, neo4j=None, redis=None):
+    # Installs clients built elsewhere (benchmarks, tests) in the same places
+    # lifespan() would, and marks the app ready.
+    global _ready
+    from backend.app.config.db import neo4j_conn, redis_conn
+
+    if mongodb is not None:
+        app.state.mongodb = mongodb
+    if neo4j is not None:
+        app.state.neo4j = neo4j_conn._driver = neo4j
+    if redis is not None:
+        app.state.redis = redis_conn._redis_client = redis
+    _ready = True
+
+
+def detach(app):
+    global _ready
+    from backend.app.config.db import neo4j_conn, redis_conn
+
+    _ready = False
+    neo4j_conn._driver = None
+    redis_conn._redis_client = None
+    for name in ("mongodb", "neo4j", "redis"):
+        if hasattr(app.state, name):
+            delattr(app.state, name)
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+async def _check(app, store: str) -> dict:
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(_PINGS[store](app), settings.READY_CHECK_TIMEOUT_SECONDS)
+    except Exception as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 3)}
+
+
+async def readiness(app) -> dict:
+    # One ping per store, run concurrently; ready only if all of them answer.
+    if not _ready:
+        return {"ready": False, "stores": {}}
+    stores = [store for store, name in zip(STORES, ("mongodb", "neo4j", "redis")) if hasattr(app.state, name)]
+    checks = dict(zip(stores, await asyncio.gather(*(_check(app, store) for store in stores))))
+    for store, check in checks.items():
+        if store in _warmup:
+            check["warmup"] = _warmup[store]
+    return {"ready": all(check["ok"] for check in checks.values()), "stores": checks}
@@ -0,0 +1,115 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Mongo client pool
+MONGO_DATABASE = os.getenv("MONGO_DATABASE", "nosql_project")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+
+# Neo4j driver pool
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE") or None
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30"))
+NEO4J_MAX_TRANSACTION_RETRY_TIME = float(os.getenv("NEO4J_MAX_TRANSACTION_RETRY_TIME", "15"))
+
+# Redis connection pool
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+
+# Connections opened and verified per store before the app reports ready
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", "4"))
+NEO4J_WARMUP_CONNECTIONS = int(os.getenv("NEO4J_WARMUP_CONNECTIONS", "4"))
+REDIS_WARMUP_CONNECTIONS = int(os.getenv("REDIS_WARMUP_CONNECTIONS", "4"))
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "15"))
+READY_CHECK_TIMEOUT_SECONDS = float(os.getenv("READY_CHECK_TIMEOUT_SECONDS", "2"))
+
+# In-process (L1) cache in front of Redis
+L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+L1_CACHE_TTL_SECONDS = float(os.getenv("L1_CACHE_TTL_SECONDS", "30"))
+
+# Cache stampede protection
+CACHE_LOCK_ENABLED = os.getenv("CACHE_LOCK_ENABLED", "true").lower() == "true"
+CACHE_LOCK_LEASE_SECONDS = float(os.getenv("CACHE_LOCK_LEASE_SECONDS", "10"))
+CACHE_LOCK_POLL_SECONDS = float(os.getenv("CACHE_LOCK_POLL_SECONDS", "0.05"))
+
+# /mongo/getallusers answers with the whole collection in one cached body; past
+# this many users it refuses and points to the paged and streaming endpoints.
+ALL_USERS_MAX = int(os.getenv("ALL_USERS_MAX", "10000"))
+
+# Schema bootstrap
+ENSURE_INDEXES_ON_STARTUP = os.getenv("ENSURE_INDEXES_ON_STARTUP", "true").lower() == "true"
+
+# Ranked matching weights
+MATCH_WEIGHT_SKILL = float(os.getenv("MATCH_WEIGHT_SKILL", "10"))
+MATCH_WEIGHT_INTEREST = float(os.getenv("MATCH_WEIGHT_INTEREST", "3"))
+MATCH_WEIGHT_EXPERIENCE = float(os.getenv("MATCH_WEIGHT_EXPERIENCE", "1"))
+
+# Team formation (/neo4j/form_team)
+TEAM_CANDIDATES_PER_SKILL = int(os.getenv("TEAM_CANDIDATES_PER_SKILL", "200"))
+TEAM_TIME_BUDGET_MS = float(os.getenv("TEAM_TIME_BUDGET_MS", "50"))
+TEAM_EXPERIENCE_WEIGHT = float(os.getenv("TEAM_EXPERIENCE_WEIGHT", "0.05"))
+
+# In-process matching index (needs numpy: poetry install --extras matching)
+MATCHING_INDEX_ENABLED = os.getenv("MATCHING_INDEX_ENABLED", "false").lower() == "true"
+MATCHING_INDEX_SOURCE = os.getenv("MATCHING_INDEX_SOURCE", "neo4j")
+# Each worker holds its own copy and only sees its own writes, so it is rebuilt
+# this often to pick up the other workers' (0 disables).
+MATCHING_INDEX_REFRESH_SECONDS = float(os.getenv("MATCHING_INDEX_REFRESH_SECONDS", "300"))
+
+# In-process typeahead for skills, interests, roles and names
+TYPEAHEAD_ENABLED = os.getenv("TYPEAHEAD_ENABLED", "true").lower() == "true"
+TYPEAHEAD_SOURCE = os.getenv("TYPEAHEAD_SOURCE", "mongo")
+# Per worker as well, see MATCHING_INDEX_REFRESH_SECONDS.
+TYPEAHEAD_REFRESH_SECONDS = float(os.getenv("TYPEAHEAD_REFRESH_SECONDS", "300"))
+TYPEAHEAD_MAX_LIMIT = int(os.getenv("TYPEAHEAD_MAX_LIMIT", "20"))
+TYPEAHEAD_RANGE_SCAN_LIMIT = int(os.getenv("TYPEAHEAD_RANGE_SCAN_LIMIT", "256"))
+
+# Mongo <-> Neo4j outbox replication
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10"))
+OUTBOX_RETENTION_SECONDS = int(os.getenv("OUTBOX_RETENTION_SECONDS", str(24 * 3600)))
+
+# Redis-first availability with write-behind to Mongo and Neo4j
+AVAILABILITY_WRITE_BEHIND = os.getenv("AVAILABILITY_WRITE_BEHIND", "true").lower() == "true"
+AVAILABILITY_FLUSH_SECONDS = float(os.getenv("AVAILABILITY_FLUSH_SECONDS", "1"))
+AVAILABILITY_FLUSH_BATCH_SIZE = int(os.getenv("AVAILABILITY_FLUSH_BATCH_SIZE", "1000"))
+
+# Precomputed collaborator recommendations
+RECOMMENDATIONS_ENABLED = os.getenv("RECOMMENDATIONS_ENABLED", "true").lower() == "true"
+RECOMMENDATION_INTERVAL_SECONDS = float(os.getenv("RECOMMENDATION_INTERVAL_SECONDS", "60"))
+RECOMMENDATION_BATCH_SIZE = int(os.getenv("RECOMMENDATION_BATCH_SIZE", "200"))
+RECOMMENDATION_TOP_N = int(os.getenv("RECOMMENDATION_TOP_N", "20"))
+RECOMMENDATION_TTL_SECONDS = int(os.getenv("RECOMMENDATION_TTL_SECONDS", str(24 * 3600)))
+RECOMMENDATION_WEIGHT_SHARED_INTEREST = float(os.getenv("RECOMMENDATION_WEIGHT_SHARED_INTEREST", "2"))
+RECOMMENDATION_WEIGHT_COMPLEMENTARY_SKILL = float(os.getenv("RECOMMENDATION_WEIGHT_COMPLEMENTARY_SKILL", "1"))
+
+# /metrics and request instrumentation
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Slow-query log
+SLOW_QUERY_ENABLED = os.getenv("SLOW_QUERY_ENABLED", "true").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+SLOW_QUERY_PLAN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_PLAN_SAMPLE_RATE", "0.2"))
+SLOW_QUERY_PLAN_INTERVAL_SECONDS = float(os.getenv("SLOW_QUERY_PLAN_INTERVAL_SECONDS", "300"))
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "500"))
+
+# Username Bloom filter in Redis (fast negative answers for existence checks)
+USERNAME_FILTER_ENABLED = os.getenv("USERNAME_FILTER_ENABLED", "true").lower() == "true"
+USERNAME_FILTER_CAPACITY = int(os.getenv("USERNAME_FILTER_CAPACITY", "1000000"))
+USERNAME_FILTER_ERROR_RATE = float(os.getenv("USERNAME_FILTER_ERROR_RATE", "0.01"))
+# Usernames the filter answered "maybe" for are remembered in-process, so
+# repeated checks of known users skip the Redis round trip.
+USERNAME_FILTER_LOCAL_MAX_BYTES = int(os.getenv("USERNAME_FILTER_LOCAL_MAX_BYTES", str(4 * 1024 * 1024)))
+USERNAME_FILTER_LOCAL_TTL_SECONDS = float(os.getenv("USERNAME_FILTER_LOCAL_TTL_SECONDS", "300"))
+
+# Development-only endpoints (/dev/...)
+DEV_ENDPOINTS_ENABLED = os.getenv("DEV_ENDPOINTS_ENABLED", "false").lower() == "true"
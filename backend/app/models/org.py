@@ -6,5 +6,10 @@ class OrgCreate(BaseModel):
     name: str
     description: Optional[str] = None
 
+
 class AddMember(BaseModel):
-    username: str
\ No newline at end of file
+    username: str
+
+
+class OrgAnalyticsQuery(BaseModel):
+    org_ids: Optional[List[str]] = None
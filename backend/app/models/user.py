@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -19,4 +19,24 @@ class UserLogin(BaseModel):
 
 class AvailabilityUpdate(BaseModel):
     username: str
-    availability: bool
\ No newline at end of file
+    availability: bool
+
+
+class UsernameBatch(BaseModel):
+    usernames: List[str] = Field(..., min_length=1, max_length=500)
+
+
+class TeamQuery(BaseModel):
+    skills: List[str] = Field(..., min_length=1, max_length=64)
+    team_size: int = Field(5, ge=1, le=50)
+    min_experience: int = Field(0, ge=0)
+    time_budget_ms: Optional[float] = Field(None, gt=0, le=5000)
+
+
+class MatchQuery(BaseModel):
+    role: Optional[str] = None
+    skills: List[str] = []
+    interests: List[str] = []
+    min_experience: int = Field(0, ge=0)
+    limit: int = Field(20, ge=1, le=100)
+    cursor: Optional[str] = None
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import Literal
+from backend.app.config.db.mongo_conn import get_mongo_db
+from backend.app.services.bulk_import_service import TARGETS, import_users
+
+router = APIRouter(prefix="/bulk")
+
+
+@router.post(
+    "/importUsers",
+    description="Stream NDJSON or CSV users into Mongo and/or Neo4j in batches. Returns per-row errors and throughput.",
+)
+async def bulk_import_users(
+    request: Request,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    targets: str = Query(",".join(TARGETS), description="Comma-separated: mongo, neo4j"),
+    db=Depends(get_mongo_db),
+):
+    selected = [t.strip() for t in targets.split(",") if t.strip()]
+    unknown = set(selected) - set(TARGETS)
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown targets: {', '.join(sorted(unknown)) or 'none given'}")
+    return await import_users(db, request.stream(), format, chunk_size, selected)
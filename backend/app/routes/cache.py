@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from backend.app.config.db.mongo_conn import get_mongo_db
+from backend.app.services import username_filter
+from backend.app.services.redis_service import cache_stats
+
+router = APIRouter(prefix="/cache")
+
+
+@router.get("/stats", description="Hit/miss/eviction counters for the in-process and Redis cache tiers of this worker")
+async def get_cache_stats():
+    return cache_stats()
+
+
+@router.get("/username_filter", description="Size, fill and false-positive rates of the username Bloom filter")
+async def get_username_filter_report():
+    return await username_filter.report()
+
+
+@router.post("/username_filter/rebuild", description="Rebuild the username Bloom filter from Mongo and Neo4j")
+async def rebuild_username_filter(db=Depends(get_mongo_db)):
+    result = await username_filter.rebuild(db)
+    if result is None:
+        raise HTTPException(status_code=409, detail="A rebuild is already running")
+    return result
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Query
+from typing import Optional
+from backend.app.config import settings
+from backend.app.services import slow_query_log
+
+# Only included when DEV_ENDPOINTS_ENABLED is set: responses contain query
+# shapes and plans.
+router = APIRouter(prefix="/dev")
+
+
+@router.get("/slow_queries", description="Slow query shapes ranked by total time, with sampled plans")
+async def get_slow_queries(limit: int = Query(20, ge=1, le=500), store: Optional[str] = Query(None)):
+    return {"threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+            "shapes": slow_query_log.top_shapes(limit, store)}
+
+
+@router.delete("/slow_queries", description="Forget all recorded slow query shapes")
+async def reset_slow_queries():
+    slow_query_log.reset()
+    return {"message": "Slow query log cleared"}
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Request
+from backend.app.config.db import resources
+from backend.app.services.serialization import FastJSONResponse
+
+router = APIRouter()
+
+
+@router.get("/ready", description="Readiness probe: 200 once every store is warmed up and answers a ping, 503 otherwise")
+async def ready(request: Request):
+    report = await resources.readiness(request.app)
+    return FastJSONResponse(report, status_code=200 if report["ready"] else 503)
@@ -1,13 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from bson import ObjectId
+from bson.errors import InvalidId
 from backend.app.config.db.mongo_conn import get_mongo_db
-from backend.app.models.org import OrgCreate, AddMember
+from backend.app.models.org import OrgCreate, AddMember, OrgAnalyticsQuery
+from backend.app.services import availability_service, username_filter
+from backend.app.services.mongodb_service import get_users_by_usernames
+from backend.app.services.org_stats_service import (
+    ORG_VERSION_FIELD,
+    apply_member_added,
+    get_org_stats,
+    iter_org_analytics,
+    rebuild_org_stats,
+)
+from backend.app.services.serialization import dumps
 
 router = APIRouter(prefix="/mongo")
 
 
+def _org_object_id(org_id: str) -> ObjectId:
+    # Malformed ids are the client's mistake, not a server error.
+    try:
+        return ObjectId(org_id)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid organization id")
+
+
 @router.post(
     "/createNewOrg",
     status_code=status.HTTP_201_CREATED,
@@ -26,54 +46,66 @@ async def create_org(data: OrgCreate, db=Depends(get_mongo_db)):
     description="Add a user to an organization",
 )
 async def add_member(org_id: str, data: AddMember, db=Depends(get_mongo_db)):
-    oid = ObjectId(org_id)
+    oid = _org_object_id(org_id)
     # 6860a1fbdbb773d18164f2b2
+    if not await username_filter.might_contain(data.username):
+        return {"message": "User not found"}
     check_user = await db["users"].find_one({"username": data.username}, {"_id": 0})
     if not check_user:
+        username_filter.record_false_positive()
         return {"message": "User not found"}
-    result = await db["organizations"].update_one(
-        {"_id": oid},
-        {"$addToSet": {"members": data.username}}
+    from pymongo import ReturnDocument
+
+    # The stats version is bumped together with the member list (see org_stats_service).
+    org = await db["organizations"].find_one_and_update(
+        {"_id": oid, "members": {"$ne": data.username}},
+        {"$push": {"members": data.username}, "$inc": {ORG_VERSION_FIELD: 1}},
+        return_document=ReturnDocument.AFTER,
     )
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Organization not found")
-    org = await db["organizations"].find_one({"_id": oid})
+    if org is not None:
+        await apply_member_added(db, oid, check_user, org[ORG_VERSION_FIELD])
+    else:
+        # Unknown org, or the user is a member already.
+        org = await db["organizations"].find_one({"_id": oid})
+        if org is None:
+            raise HTTPException(status_code=404, detail="Organization not found")
+    org.pop(ORG_VERSION_FIELD, None)
     org["_id"] = org_id
     return org
 
 
 @router.get("/orgs/{org_id}/getAllMemebers", description="Get all mementers of an organization")
 async  def get_all_members(org_id: str, db=Depends(get_mongo_db)):
-    oid = ObjectId(org_id)
+    oid = _org_object_id(org_id)
     org = await db["organizations"].find_one({"_id": oid}, {"_id": 0, "members": 1})
     if not org:
         return {"message": "Organization not found"}
     return org
 
 
+@router.get("/orgs/{org_id}/members/profiles", description="Profiles of all members of an organization in one query")
+async def get_member_profiles(org_id: str, db=Depends(get_mongo_db)):
+    oid = _org_object_id(org_id)
+    org = await db["organizations"].find_one({"_id": oid}, {"_id": 0, "members": 1})
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    members = org.get("members", [])
+    found = await get_users_by_usernames(db, members) if members else {}
+    return {
+        "members": await availability_service.overlay([found[name] for name in members if name in found]),
+        "missing": [name for name in members if name not in found],
+    }
+
+
 @router.get(
     "/orgs/{org_id}/avgExp",
     description="Average years of experience among this org’s members",
 )
 async def org_avg_experience(org_id: str, db=Depends(get_mongo_db)):
-    oid = ObjectId(org_id)
-    pipeline = [
-        {"$match": {"_id": oid}},
-        {"$lookup": {
-            "from": "users",
-            "localField": "members",
-            "foreignField": "username",
-            "as": "team"
-        }},
-        {"$unwind": "$team"},
-        {"$group": {
-            "_id": None,
-            "average_experience": {"$avg": "$team.experience"}
-        }},
-        {"$project": {"_id": 0, "average_experience": 1}}
-    ]
-    res = await db["organizations"].aggregate(pipeline).to_list(length=1)
-    return res[0] if res else {"average_experience": 0.0}
+    stats = await get_org_stats(db, _org_object_id(org_id))
+    if not stats:
+        return {"average_experience": 0.0}
+    return {"average_experience": stats["average_experience"]}
 
 
 @router.get(
@@ -81,23 +113,42 @@ async def org_avg_experience(org_id: str, db=Depends(get_mongo_db)):
     description="Count of each skill among this org’s members",
 )
 async def org_skill_stats(org_id: str, db=Depends(get_mongo_db)):
-    oid = ObjectId(org_id)
-    pipeline = [
-        {"$match": {"_id": oid}},
-        {"$lookup": {
-            "from": "users",
-            "localField": "members",
-            "foreignField": "username",
-            "as": "team"
-        }},
-        {"$unwind": "$team"},
-        {"$unwind": "$team.skills"},
-        {"$group": {
-            "_id": "$team.skills",
-            "count": {"$sum": 1}
-        }},
-        {"$project": {"skill": "$_id", "count": 1, "_id": 0}},
-        {"$sort": {"count": -1}}
-    ]
-    stats = await db["organizations"].aggregate(pipeline).to_list(length=None)
-    return stats
\ No newline at end of file
+    stats = await get_org_stats(db, _org_object_id(org_id))
+    return stats["skills"] if stats else []
+
+
+@router.get(
+    "/orgs/{org_id}/stats",
+    description="Member count, average experience and skill counts of this org in one read",
+)
+async def org_stats(org_id: str, db=Depends(get_mongo_db)):
+    stats = await get_org_stats(db, _org_object_id(org_id))
+    if not stats:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    return stats
+
+
+@router.post(
+    "/orgs/rebuildStats",
+    description="Recompute materialized org statistics from the member list (all orgs, or one with org_id)",
+)
+async def rebuild_stats(org_id: Optional[str] = None, db=Depends(get_mongo_db)):
+    rebuilt = await rebuild_org_stats(db, [_org_object_id(org_id)] if org_id else None)
+    return {"rebuilt": rebuilt}
+
+
+@router.post(
+    "/orgs/analytics",
+    summary="Stream member, experience, availability, skill and role analytics for many orgs as NDJSON",
+)
+async def orgs_analytics(query: OrgAnalyticsQuery, db=Depends(get_mongo_db)):
+    # One line per org (all orgs when org_ids is omitted), in request order.
+    org_ids = None
+    if query.org_ids is not None:
+        org_ids = [_org_object_id(org_id) for org_id in query.org_ids]
+
+    async def lines():
+        async for doc in iter_org_analytics(db, org_ids):
+            yield dumps(doc) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
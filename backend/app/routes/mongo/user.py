@@ -1,34 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, status
 from typing import List, Optional
 from pydantic import BaseModel
-from backend.app.services.mongodb_service import get_all_users
+from fastapi.responses import StreamingResponse
+from backend.app.services.mongodb_service import (
+    ALL_USERS_CACHE_KEY,
+    build_user_filter,
+    find_users_page,
+    get_all_users,
+    get_users_by_usernames,
+    invalidate_user_caches,
+    iter_users_ndjson,
+)
+from backend.app.config import settings
 from backend.app.config.db.mongo_conn import get_mongo_db
-from backend.app.models.user import UserCreate, UserLogin, AvailabilityUpdate
-from backend.app.services.redis_service import get_cached_data, set_cached_data, delete_cached_data
+from backend.app.models.user import UserCreate, UserLogin, AvailabilityUpdate, UsernameBatch
+from backend.app.services import availability_service, username_filter
+from backend.app.services.org_stats_service import apply_user_change
+from backend.app.services.redis_service import get_or_load_counting
+from backend.app.services.serialization import FastJSONResponse, RawJSONResponse, loads
+from backend.app.services.user_events import publish_user_change
 
 router = APIRouter(prefix="/mongo")
 
 @router.get("/getallusers")
 async def read_all_users(db = Depends(get_mongo_db)):
-    cache_key = "mongo:all_users"
-    cached_users = await get_cached_data(cache_key)
+    try:
+        body, pending = await get_or_load_counting(
+            ALL_USERS_CACHE_KEY, lambda: get_all_users(db, settings.ALL_USERS_MAX), 300, stale_seconds=60,
+            raw=True, count_key=availability_service.pending_key(),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if pending:
+        # Toggles not flushed yet (see /mongo/filterUsers).
+        return FastJSONResponse(await availability_service.overlay(loads(body)))
+    return RawJSONResponse(body)
 
-    if cached_users:
-        return cached_users
 
-    users = await get_all_users(db)
-    await set_cached_data(cache_key, users, 300)
-    return users
+@router.post("/users/batch", description="Profiles of many users in one $in query, in request order")
+async def get_users_batch(batch: UsernameBatch, db=Depends(get_mongo_db)):
+    found = await get_users_by_usernames(db, batch.usernames)
+    names = list(dict.fromkeys(batch.usernames))
+    users = await availability_service.overlay([found[name] for name in names if name in found])
+    return {"users": users, "missing": [name for name in names if name not in found]}
 
 
 @router.post("/signup", status_code=201, response_model=dict)
 async def signup(user: UserCreate, db = Depends(get_mongo_db)):
+    # pymongo is imported here, not with the app (see resources).
+    from pymongo.errors import DuplicateKeyError
+
     user = user.dict()
     try:
         result = await db["users"].insert_one(user)
-        await delete_cached_data("mongo:all_users")
-        await clear_cache_pattern("mongo:filter_users:*")
+        await invalidate_user_caches(user)
+        await publish_user_change("mongo", None, {k: v for k, v in user.items() if k != "_id"})
 
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Username already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     return {
@@ -40,9 +69,12 @@ async def signup(user: UserCreate, db = Depends(get_mongo_db)):
 @router.post("/login", response_model=dict)
 async def login(user: UserLogin, db = Depends(get_mongo_db)):
     user = user.dict()
+    if not await username_filter.might_contain(user["username"]):
+        return {"message": "Login failed", "user": None}
     try:
         check_user = await db["users"].find_one({"username": user["username"]}, {"_id": 0})
         if not check_user:
+            username_filter.record_false_positive()
             return {"message": "Login failed", "user": None}
 
     except Exception as e:
@@ -51,25 +83,29 @@ async def login(user: UserLogin, db = Depends(get_mongo_db)):
 
 @router.put("/editProfile", response_model=dict, status_code=200, description="Update user profile.")
 async def update_user_profile(data: UserCreate, db=Depends(get_mongo_db)):
+    from pymongo import ReturnDocument
+
     payload = data.dict()
     username = payload.pop("username")
 
-    result = await db["users"].update_one(
+    old_user = await db["users"].find_one_and_update(
         {"username": username},
-        {"$set": payload}
+        {"$set": payload},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if result.matched_count == 0:
+    if old_user is None:
         # No user with that username
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User '{username}' not found"
         )
 
-    updated_user = await db["users"].find_one(
-        {"username": username},
-        {"_id": 0}
-    )
+    updated_user = {**old_user, **payload}
+    await invalidate_user_caches(old_user, updated_user)
+    await apply_user_change(db, old_user, updated_user)
+    await publish_user_change("mongo", old_user, updated_user)
 
     return {
         "message": "Profile updated successfully",
@@ -79,14 +115,33 @@ async def update_user_profile(data: UserCreate, db=Depends(get_mongo_db)):
 
 @router.put("/toggleAvailability", response_model=dict, status_code=200, description="Update user availability.")
 async def update_user_availability(data: AvailabilityUpdate, db=Depends(get_mongo_db)):
-    updateUserAvail = await db["users"].update_one(
+    from pymongo import ReturnDocument
+
+    if availability_service.is_enabled():
+        # Written to Redis now, persisted by the availability flusher.
+        found = await availability_service.toggle(
+            data.username, data.availability,
+            lambda: db["users"].find_one({"username": data.username}, {"_id": 1}),
+        )
+        if not found:
+            return {"message": "User not found"}
+        return {"message": "Availability updated successfully"}
+
+    old_user = await db["users"].find_one_and_update(
         {"username": data.username},
-        {"$set": {"availability": data.availability}}
+        {"$set": {"availability": data.availability}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE,
     )
 
-    if updateUserAvail.matched_count == 0:
+    if old_user is None:
         return {"message": "User not found"}
 
+    if old_user.get("availability") != data.availability:
+        updated_user = {**old_user, "availability": data.availability}
+        await invalidate_user_caches(old_user, updated_user)
+        await publish_user_change("mongo", old_user, updated_user)
+
     return {"message": "Availability updated successfully"}
 
 
@@ -107,27 +162,61 @@ async def list_users(
 ):
 
     cache_key = f"mongo:filter_users:{role}:{availability}:{skill}:{experience_min}:{interest}:{skip}:{limit}"
-    cached_results = await get_cached_data(cache_key)
-    if cached_results:
-        return cached_results
-
-    filt: dict = {}
-    if role is not None:
-        filt["role"] = role
-    if availability is not None:
-        filt["availability"] = availability
-    if skill is not None:
-        filt["skills"] = skill
-    if interest is not None:
-        filt["interests"] = interest
-    if experience_min is not None:
-        filt["experience"] = {"$gte": experience_min}
-
-    cursor = db["users"].find(filt).skip(skip).limit(limit)
-
-    docs = await cursor.to_list(length=limit)
-    for doc in docs:
-        doc["_id"] = str(doc["_id"])
-
-    await set_cached_data(cache_key, docs, 120)
-    return docs
\ No newline at end of file
+
+    async def load_users():
+        filt = build_user_filter(role, availability, skill, experience_min, interest)
+
+        cursor = db["users"].find(filt).skip(skip).limit(limit)
+
+        # _id is encoded as a string by the serializer.
+        return await cursor.to_list(length=limit)
+
+    body, pending = await get_or_load_counting(
+        cache_key, load_users, 120, stale_seconds=30,
+        equals={"role": role, "availability": availability, "skills": skill, "interests": interest},
+        minimums={"experience": experience_min},
+        raw=True,
+        count_key=availability_service.pending_key(),
+    )
+    if pending:
+        return FastJSONResponse(await availability_service.overlay(loads(body), availability))
+    return RawJSONResponse(body)
+
+
+@router.get(
+    "/filterUsers/page",
+    summary="List users with optional filtering, paginated by an opaque cursor",
+)
+async def list_users_page(
+    role: Optional[str] = Query(None),
+    availability: Optional[bool] = Query(None),
+    skill: Optional[str] = Query(None),
+    experience_min: Optional[int] = Query(None, ge=0),
+    interest: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000),
+    db = Depends(get_mongo_db),
+):
+    filt = build_user_filter(role, availability, skill, experience_min, interest)
+    try:
+        docs, next_cursor = await find_users_page(db, filt, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"users": docs, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/exportUsers",
+    summary="Stream users as newline-delimited JSON",
+)
+async def export_users(
+    role: Optional[str] = Query(None),
+    availability: Optional[bool] = Query(None),
+    skill: Optional[str] = Query(None),
+    experience_min: Optional[int] = Query(None, ge=0),
+    interest: Optional[str] = Query(None),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    db = Depends(get_mongo_db),
+):
+    filt = build_user_filter(role, availability, skill, experience_min, interest)
+    return StreamingResponse(iter_users_ndjson(db, filt, batch_size), media_type="application/x-ndjson")
@@ -1,21 +1,49 @@
-from fastapi import APIRouter, HTTPException
-from backend.app.services import neo4j_service
+from fastapi import APIRouter, Body, HTTPException
+from backend.app.services import availability_service, matching_index, neo4j_service, team_formation, username_filter
+from backend.app.services.user_events import publish_user_change
+from backend.app.models.user import MatchQuery, TeamQuery, UsernameBatch
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/neo4j")
 
 @router.get("/user_exists/{username}")
-def user_exists(username: str):
-    exists = neo4j_service.check_user_exists(username)
+async def user_exists(username: str):
+    if not await username_filter.might_contain(username):
+        return {"exists": False}
+    exists = await neo4j_service.check_user_exists(username)
+    if not exists:
+        username_filter.record_false_positive()
     return {"exists": exists}
 
 @router.get("/get_user/{username}")
-def get_user(username: str):
-    user = neo4j_service.get_user_by_username(username)
+async def get_user(username: str):
+    user = await neo4j_service.user_loader.load(username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return (await availability_service.overlay([user]))[0]
+
+@router.get("/session/{username}", description="Existence check and profile in one call, for the frontend login")
+async def session_bootstrap(username: str):
+    if not await username_filter.might_contain(username):
+        return {"exists": False, "user": None}
+    user = await neo4j_service.user_loader.load(username)
+    if not user:
+        username_filter.record_false_positive()
+        return {"exists": False, "user": None}
+    return {"exists": True, "user": (await availability_service.overlay([user]))[0]}
+
+@router.post("/users/batch", description="Profiles of many users in one read, in request order")
+async def get_users_batch(batch: UsernameBatch):
+    found = await neo4j_service.get_users_by_usernames(batch.usernames)
+    names = list(dict.fromkeys(batch.usernames))
+    users = await availability_service.overlay([found[name] for name in names if name in found])
+    return {"users": users, "missing": [name for name in names if name not in found]}
+
+@router.post("/contacts/batch", description="Contact details of many users in one read")
+async def get_contacts_batch(batch: UsernameBatch):
+    contacts = await neo4j_service.get_contacts(batch.usernames)
+    return {"contacts": contacts, "missing": [name for name in dict.fromkeys(batch.usernames) if name not in contacts]}
 
 class UserCreate(BaseModel):
     username: str
@@ -30,8 +58,15 @@ class UserCreate(BaseModel):
     availability: bool
 
 @router.post("/add_user")
-def add_user(user: UserCreate):
-    result = neo4j_service.create_user(user)
+async def add_user(user: UserCreate):
+    # Imported here, like the driver, so that importing the app does not load neo4j.
+    from neo4j.exceptions import ConstraintError
+
+    try:
+        result = await neo4j_service.create_user(user)
+    except ConstraintError:
+        raise HTTPException(status_code=409, detail="Username already exists")
+    await publish_user_change("neo4j", None, user.dict())
     return {"message": "User created", "success": result}
 
 class AvailabilityUpdate(BaseModel):
@@ -39,29 +74,84 @@ class AvailabilityUpdate(BaseModel):
     availability: bool
 
 @router.put("/update_availability")
-def update_user_availability(data: AvailabilityUpdate):
-    success = neo4j_service.update_availability(data.username, data.availability)
+async def update_user_availability(data: AvailabilityUpdate):
+    if availability_service.is_enabled():
+        # Written to Redis now, persisted by the availability flusher.
+        success = await availability_service.toggle(
+            data.username, data.availability, lambda: neo4j_service.check_user_exists(data.username)
+        )
+        if success:
+            return {"message": "Availability updated successfully"}
+        return {"message": "User not found"}
+    success = await neo4j_service.update_availability(data.username, data.availability)
     if success:
+        await publish_user_change("neo4j", None, {"username": data.username, "availability": data.availability})
         return {"message": "Availability updated successfully"}
     else:
         return {"message": "User not found"}
 
 @router.post("/find_matches")
-def find_matches(payload: dict):
+async def find_matches(payload: dict):
     try:
-        result = neo4j_service.find_matching_users(
+        result = await neo4j_service.find_matching_users(
             payload.get("role"), payload.get("skills", []), payload.get("min_experience", 0)
         )
-        return result
+        return await availability_service.overlay(result, True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/find_top_matches", description="Available users ranked by skill overlap, interest overlap and experience")
+async def find_top_matches(query: MatchQuery):
+    # Served from the in-process matching index once it is loaded.
+    index = matching_index.get_index()
+    try:
+        if index is not None:
+            matches, next_cursor = index.search(
+                query.role, query.skills, query.interests, query.min_experience, query.limit, query.cursor
+            )
+        else:
+            matches, next_cursor = await neo4j_service.find_ranked_matches(
+                query.role, query.skills, query.interests, query.min_experience, query.limit, query.cursor
+            )
+            matches = await availability_service.overlay(matches, True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"matches": matches, "next_cursor": next_cursor}
+
+@router.post("/form_team", description="Small team of available users who together cover the required skills")
+async def form_team(query: TeamQuery):
+    try:
+        return await team_formation.form_team(query.skills, query.team_size, query.min_experience, query.time_budget_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/contact/{username}")
-def get_user_contact(username: str):
+async def get_user_contact(username: str):
     try:
-        contact = neo4j_service.get_contact(username)
+        contact = await neo4j_service.contact_loader.load(username)
         if not contact:
             raise HTTPException(status_code=404, detail="User not found")
         return contact
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/matching_index/status", description="Size of the in-process matching index, if loaded")
+async def matching_index_status():
+    index = matching_index.get_index()
+    return {"available": matching_index.is_available(), "loaded": index is not None,
+            **(index.stats() if index is not None else {})}
+
+@router.post("/matching_index/rebuild", description="Reload this worker's in-process matching index from Neo4j")
+async def rebuild_matching_index():
+    if not matching_index.is_available():
+        raise HTTPException(status_code=501, detail="numpy is not installed")
+    users = await matching_index.rebuild(source="neo4j")
+    return {"message": "Matching index rebuilt", "users": users}
+
+@router.post("/matching_index/check", description="Compare matching index results with the Cypher matcher")
+async def check_matching_index(queries: Optional[List[MatchQuery]] = Body(None), samples: int = 20):
+    if matching_index.get_index() is None:
+        raise HTTPException(status_code=409, detail="Matching index is not loaded")
+    return await matching_index.check_consistency(
+        [q.dict() for q in queries] if queries else None, samples=samples
+    )
@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from backend.app.services import availability_service
+from backend.app.services.recommendation_service import mark_dirty, recommendation_stats
+from backend.app.services.redis_service import get_cached_recommendations
+
+router = APIRouter(prefix="/recommendations")
+
+
+@router.get("/stats", description="Backlog and timings of the recommendation precompute job")
+async def get_recommendation_stats():
+    return await recommendation_stats()
+
+
+@router.get("/{username}", description="Precomputed collaborators for a user, served from cache")
+async def get_recommendations(username: str):
+    recommendations = await get_cached_recommendations(username)
+    if recommendations is None:
+        # Not computed yet (or expired): queue it for the next run.
+        await mark_dirty([username])
+        return {"username": username, "recommendations": [], "pending": True}
+    # Drop collaborators who became unavailable since the list was computed.
+    recommendations = await availability_service.overlay(recommendations, True)
+    return {"username": username, "recommendations": recommendations, "pending": False}
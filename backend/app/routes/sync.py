@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+from backend.app.config.db.mongo_conn import get_mongo_db
+from backend.app.services.availability_service import availability_stats
+from backend.app.services.sync_service import outbox_stats
+
+router = APIRouter(prefix="/sync")
+
+
+@router.get("/stats", description="Outbox backlog and replication lag between Mongo and Neo4j")
+async def get_sync_stats(db=Depends(get_mongo_db)):
+    return await outbox_stats(db)
+
+
+@router.get("/availability", description="Redis availability store size and write-behind backlog")
+async def get_availability_stats():
+    return await availability_stats()
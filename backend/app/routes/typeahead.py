@@ -0,0 +1,31 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
+from backend.app.config import settings
+from backend.app.config.db.mongo_conn import get_mongo_db
+from backend.app.services import typeahead_index
+
+router = APIRouter(prefix="/typeahead")
+
+
+@router.get("", description="Skill, interest, role or name suggestions for a prefix, most used first")
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100),
+    kind: Literal["skill", "interest", "role", "name"] = "skill",
+    limit: int = Query(10, ge=1, le=settings.TYPEAHEAD_MAX_LIMIT),
+):
+    index = typeahead_index.get_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Typeahead index is not loaded")
+    return {"kind": kind, "prefix": q, "results": index.search(kind, q, limit)}
+
+
+@router.get("/status", description="Size of the in-process typeahead index, if loaded")
+async def typeahead_status():
+    index = typeahead_index.get_index()
+    return {"loaded": index is not None, **(index.stats() if index is not None else {})}
+
+
+@router.post("/rebuild", description="Reload this worker's typeahead index")
+async def rebuild_typeahead(db=Depends(get_mongo_db)):
+    users = await typeahead_index.rebuild(db)
+    return {"message": "Typeahead index rebuilt", "users": users}
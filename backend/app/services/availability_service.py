@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from backend.app.config import settings
+from backend.app.config.db.redis_conn import get_redis_client
+from backend.app.services import neo4j_service
+from backend.app.services.mongodb_service import invalidate_user_caches
+from backend.app.services.redis_service import (
+    AVAILABILITY_DIRTY_KEY,
+    AVAILABILITY_KEY,
+    get_many_user_availability,
+    set_user_availability,
+)
+from backend.app.services.user_events import publish_user_change, subscribe
+
+logger = logging.getLogger(__name__)
+
+# Redis-first availability.
+#
+# Toggles only touch Redis (see redis_service.set_user_availability) and are
+# published to user events with source "redis", so the matching index follows
+# immediately while the outbox leaves them alone. The flusher then persists
+# the latest value of every dirty user to Mongo and Neo4j in batches. Until a
+# flush lands the databases can be up to AVAILABILITY_FLUSH_SECONDS behind, so
+# read paths overlay the Redis value on what they loaded.
+_stats = {"flushes": 0, "flushed_users": 0, "mongo_updates": 0, "last_flush_size": 0}
+
+USER_CACHE_FIELDS = {"_id": 0, "username": 1, "role": 1, "availability": 1, "skills": 1, "interests": 1, "experience": 1}
+
+
+def is_enabled() -> bool:
+    return settings.AVAILABILITY_WRITE_BEHIND
+
+
+def pending_key() -> Optional[str]:
+    # The set of users with toggles not persisted yet, while cached query
+    # results may disagree with Redis and need the overlay. Read its size in
+    # the same round trip as the cached entry (redis_service.get_or_load_counting).
+    return AVAILABILITY_DIRTY_KEY if is_enabled() else None
+
+
+async def toggle(username: str, available: bool, exists) -> Optional[bool]:
+    # Returns False when the user is unknown. exists() is only awaited for users
+    # not yet in the hash, i.e. the first toggle after a restart without warmup.
+    previous = await get_many_user_availability([username])
+    if username not in previous and not await exists():
+        return False
+    old = await set_user_availability(username, available)
+    if old != available:
+        await publish_user_change("redis", None, {"username": username, "availability": available})
+    return True
+
+
+async def overlay(docs: List[dict], availability: Optional[bool] = None) -> List[dict]:
+    # Replaces the stored availability with the Redis value; when the caller
+    # filtered on availability, users whose value no longer matches are dropped.
+    # The correction is one-way: a user who now matches the filter but did not
+    # when the result was loaded is not added, since that would take another
+    # query and break skip/limit. Such users show up once the flush persists
+    # the toggle and invalidates the cached results, i.e. within
+    # AVAILABILITY_FLUSH_SECONDS.
+    if not is_enabled() or not docs:
+        return docs
+    current = await get_many_user_availability([doc["username"] for doc in docs if doc.get("username")])
+    result = []
+    for doc in docs:
+        value = current.get(doc.get("username"))
+        if value is not None and value != doc.get("availability"):
+            doc = {**doc, "availability": value}
+        if availability is None or doc.get("availability") == availability:
+            result.append(doc)
+    return result
+
+
+async def flush_availability(db, batch_size: Optional[int] = None) -> int:
+    # Persists one batch of dirty users; returns how many were taken off the
+    # dirty set. On failure they are put back so the next flush retries them.
+    # pymongo is imported here, not with the app (see resources).
+    from pymongo import UpdateOne
+
+    redis_client = get_redis_client()
+    popped = await redis_client.spop(AVAILABILITY_DIRTY_KEY, batch_size or settings.AVAILABILITY_FLUSH_BATCH_SIZE)
+    if not popped:
+        return 0
+    usernames = [name.decode() if isinstance(name, bytes) else name for name in popped]
+    try:
+        states = await get_many_user_availability(usernames)
+        previous = await db["users"].find({"username": {"$in": list(states)}}, USER_CACHE_FIELDS).to_list(length=None)
+        changed = [doc for doc in previous if doc.get("availability") != states[doc["username"]]]
+        if changed:
+            await db["users"].bulk_write([
+                UpdateOne({"username": doc["username"]}, {"$set": {"availability": states[doc["username"]]}})
+                for doc in changed
+            ], ordered=False)
+        # Users can exist in Neo4j only, so every dirty user is written there.
+        await neo4j_service.bulk_set_properties([
+            {"username": username, "props": {"availability": available}} for username, available in states.items()
+        ])
+        if changed:
+            await invalidate_user_caches(*changed, *({**doc, "availability": states[doc["username"]]} for doc in changed))
+    except Exception:
+        await redis_client.sadd(AVAILABILITY_DIRTY_KEY, *usernames)
+        raise
+    _stats["flushes"] += 1
+    _stats["flushed_users"] += len(usernames)
+    _stats["mongo_updates"] += len(changed)
+    _stats["last_flush_size"] = len(usernames)
+    return len(usernames)
+
+
+async def run_availability_flusher(db):
+    # Long-running task started by the app lifespan.
+    try:
+        while True:
+            try:
+                flushed = await flush_availability(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Availability flush failed")
+                flushed = 0
+            if flushed < settings.AVAILABILITY_FLUSH_BATCH_SIZE:
+                await asyncio.sleep(settings.AVAILABILITY_FLUSH_SECONDS)
+    finally:
+        # Persist what is left on shutdown; anything that fails stays dirty in
+        # Redis and is flushed by the next worker.
+        try:
+            while await flush_availability(db):
+                pass
+        except Exception:
+            logger.exception("Final availability flush failed")
+
+
+async def load_availability(db, batch_size: int = 5000) -> int:
+    # Seeds the hash from Mongo. Dirty users are skipped: their Redis value is
+    # newer than what has been persisted.
+    redis_client = get_redis_client()
+    dirty = {name.decode() for name in await redis_client.smembers(AVAILABILITY_DIRTY_KEY)}
+    loaded = 0
+    batch: Dict[str, str] = {}
+    async for doc in db["users"].find({}, {"_id": 0, "username": 1, "availability": 1}).batch_size(batch_size):
+        if doc.get("username") and doc["username"] not in dirty:
+            batch[doc["username"]] = "1" if doc.get("availability") else "0"
+        if len(batch) >= batch_size:
+            await redis_client.hset(AVAILABILITY_KEY, mapping=batch)
+            loaded += len(batch)
+            batch = {}
+    if batch:
+        await redis_client.hset(AVAILABILITY_KEY, mapping=batch)
+        loaded += len(batch)
+    logger.info("Loaded availability for %d users", loaded)
+    return loaded
+
+
+async def availability_stats() -> dict:
+    redis_client = get_redis_client()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hlen(AVAILABILITY_KEY)
+        pipe.scard(AVAILABILITY_DIRTY_KEY)
+        users, dirty = await pipe.execute()
+    return {"enabled": is_enabled(), "users": users, "dirty": dirty, **_stats}
+
+
+@subscribe
+async def _on_user_change(source: str, old: Optional[dict], new: dict):
+    # Direct database writes (signup, profile edits, replication, bulk import)
+    # become the new Redis value without being flushed back again.
+    if source == "redis" or not is_enabled() or "availability" not in new or not new.get("username"):
+        return
+    await set_user_availability(new["username"], bool(new["availability"]), dirty=False)
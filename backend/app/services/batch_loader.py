@@ -0,0 +1,72 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# DataLoader-style coalescing of single-key lookups.
+#
+# load(key) does not query anything itself: it queues the key and returns a
+# future. The first load() in an event-loop tick schedules a dispatch with
+# call_soon, which runs after every callback already queued for that tick, so
+# all lookups issued by coroutines that are ready at the same time (gathered
+# tasks, or concurrent requests being handled) end up in one batch_fn call.
+# batch_fn takes a list of distinct keys and returns {key: value}; keys it
+# leaves out resolve to None. Identical keys in flight share one future.
+
+
+class DataLoader(Generic[K, V]):
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]], max_batch_size: int = 500):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._queue: Dict[K, asyncio.Future] = {}
+        self._in_flight: Dict[K, asyncio.Future] = {}
+        self._tasks = set()
+        self._stats = {"loads": 0, "batches": 0, "keys": 0}
+
+    def load(self, key: K) -> "asyncio.Future[Optional[V]]":
+        # Shielded, so a cancelled caller does not cancel the lookup for the
+        # others waiting on the same key.
+        self._stats["loads"] += 1
+        future = self._queue.get(key) or self._in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._queue:
+                loop.call_soon(self._dispatch)
+            future = self._queue[key] = loop.create_future()
+        return asyncio.shield(future)
+
+    async def load_many(self, keys: List[K]) -> List[Optional[V]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self):
+        queued, self._queue = self._queue, {}
+        self._in_flight.update(queued)
+        keys = list(queued)
+        for i in range(0, len(keys), self._max_batch_size):
+            chunk = keys[i:i + self._max_batch_size]
+            task = asyncio.ensure_future(self._run(chunk, [queued[key] for key in chunk]))
+            # Held until done: the event loop only keeps weak references to tasks.
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: List[K], futures: List[asyncio.Future]):
+        self._stats["batches"] += 1
+        self._stats["keys"] += len(keys)
+        try:
+            results = await self._batch_fn(keys)
+        except Exception as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in zip(keys, futures):
+                if not future.done():
+                    future.set_result(results.get(key))
+        finally:
+            for key, future in zip(keys, futures):
+                if self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return dict(self._stats)
@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import time
+from pydantic import ValidationError
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+from backend.app.models.user import UserCreate
+from backend.app.services import neo4j_service
+from backend.app.services.mongodb_service import invalidate_user_caches
+from backend.app.services.user_events import publish_user_change
+
+logger = logging.getLogger(__name__)
+
+TARGETS = ("mongo", "neo4j")
+LIST_FIELDS = ("skills", "interests")
+CSV_LIST_SEPARATOR = ";"
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.valid = 0
+        self.mongo_inserted = 0
+        self.neo4j_written = 0
+        self.neo4j_skipped = 0
+        self.failed = set()
+        self.errors: List[dict] = []
+        self.started = time.perf_counter()
+
+    def error(self, row: int, target: str, message: str):
+        self.failed.add(row)
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "target": target, "error": message})
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "mongo_inserted": self.mongo_inserted,
+            "neo4j_written": self.neo4j_written,
+            # Rows Mongo rejected and that were therefore not written to Neo4j.
+            "neo4j_skipped": self.neo4j_skipped,
+            "failed_rows": len(self.failed),
+            "errors": self.errors,
+            "errors_truncated": len(self.errors) >= MAX_REPORTED_ERRORS,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    # Yields (row number, raw record, parse error). CSV files need a header row
+    # and one record per line; list fields are separated by CSV_LIST_SEPARATOR.
+    header = None
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = next(csv.reader([line]))
+            continue
+        row += 1
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                record = dict(zip(header, values))
+                for field in LIST_FIELDS:
+                    if field in record:
+                        record[field] = [v.strip() for v in record[field].split(CSV_LIST_SEPARATOR) if v.strip()]
+            else:
+                record = json.loads(line)
+            yield row, record, None
+        except (ValueError, csv.Error) as e:
+            yield row, None, str(e)
+
+
+async def _write_mongo(db, rows: List[Tuple[int, dict]], report: ImportReport) -> List[Tuple[int, dict]]:
+    # Returns the rows Mongo stored. Inserts only: a username that already
+    # exists is rejected, never overwritten.
+    from pymongo.errors import BulkWriteError
+
+    docs = [dict(doc) for _, doc in rows]
+    try:
+        result = await db["users"].insert_many(docs, ordered=False)
+        report.mongo_inserted += len(result.inserted_ids)
+        return rows
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        report.mongo_inserted += e.details.get("nInserted", 0)
+        for err in write_errors:
+            report.error(rows[err["index"]][0], "mongo", err.get("errmsg", "write error"))
+        rejected = {err["index"] for err in write_errors}
+        return [row for i, row in enumerate(rows) if i not in rejected]
+
+
+async def _write_neo4j(rows: List[Tuple[int, dict]], report: ImportReport) -> List[Tuple[int, dict]]:
+    # Returns the rows Neo4j stored; a batch is one transaction.
+    try:
+        report.neo4j_written += await neo4j_service.bulk_upsert_users([doc for _, doc in rows])
+        return rows
+    except Exception as e:
+        for row, _ in rows:
+            report.error(row, "neo4j", str(e))
+        return []
+
+
+async def _write_chunk(db, rows: List[Tuple[int, dict]], targets: Iterable[str], report: ImportReport):
+    # With Mongo among the targets it decides what is new: rows it rejects
+    # (duplicate usernames) are not sent to Neo4j either, where the MERGE would
+    # overwrite the existing user, and are counted in neo4j_skipped. A
+    # Neo4j-only import upserts every row.
+    written = {}
+    if "mongo" in targets:
+        stored = await _write_mongo(db, rows, report)
+        written["mongo"] = {row for row, _ in stored}
+        if "neo4j" in targets:
+            report.neo4j_skipped += len(rows) - len(stored)
+            rows = stored
+    if "neo4j" in targets and rows:
+        written["neo4j"] = {row for row, _ in await _write_neo4j(rows, report)}
+    if "mongo" in targets:
+        await invalidate_user_caches(*(doc for row, doc in rows if row in written["mongo"]))
+    # Events only for what was stored, named after the stores that hold it, so
+    # a row that reached Mongo but not Neo4j is replicated by the outbox.
+    for row, doc in rows:
+        stores = [target for target in TARGETS if row in written.get(target, ())]
+        if stores:
+            await publish_user_change("bulk" if len(stores) > 1 else stores[0], None, doc)
+
+
+async def import_users(
+    db,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "ndjson",
+    chunk_size: int = 1000,
+    targets: Iterable[str] = TARGETS,
+) -> dict:
+    targets = set(targets)
+    report = ImportReport()
+    batch: List[Tuple[int, dict]] = []
+    async for row, record, parse_error in iter_records(iter_lines(chunks), fmt):
+        report.rows = row
+        if parse_error is not None:
+            report.error(row, "parse", parse_error)
+            continue
+        try:
+            user = UserCreate(**record)
+        except (ValidationError, TypeError) as e:
+            report.error(row, "validation", str(e))
+            continue
+        report.valid += 1
+        batch.append((row, user.dict()))
+        if len(batch) >= chunk_size:
+            await _write_chunk(db, batch, targets, report)
+            batch = []
+    if batch:
+        await _write_chunk(db, batch, targets, report)
+    return report.as_dict()
+
+
+async def _iter_file(path: str, size: int = 1 << 20) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+async def _main(args):
+    from fastapi import FastAPI
+    from backend.app.config.db import resources
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+    app = FastAPI()
+    async with resources.lifespan(app, warmup=False):
+        report = await import_users(app.state.mongodb, _iter_file(args.path), fmt, args.chunk_size, args.targets.split(","))
+    print(json.dumps(report, indent=2))
+    return 1 if report["failed_rows"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import users from NDJSON or CSV into Mongo and Neo4j")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["ndjson", "csv"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    logging.basicConfig(level=logging.INFO)
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
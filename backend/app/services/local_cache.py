@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class LocalCache:
+    # In-process LRU bounded by the total serialized size of its values, with a
+    # per-entry expiry. Not shared between workers: cross-worker invalidation is
+    # handled by redis_service over pub/sub.
+
+    def __init__(self, max_bytes: int, max_ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.max_ttl_seconds = max_ttl_seconds
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, size: int, ttl_seconds: Optional[float] = None):
+        if size > self.max_bytes:
+            self.delete(key)
+            return
+        ttl = self.max_ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.max_ttl_seconds)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + ttl)
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import random
+from typing import Dict, List, Optional, Tuple
+from backend.app.config import settings
+from backend.app.services import neo4j_service
+from backend.app.services.mongodb_service import iter_user_batches
+from backend.app.services.pagination import decode_ranked_cursor, encode_cursor
+from backend.app.services.user_events import subscribe
+
+# numpy is optional (the Cypher matcher is used without it) and is imported by
+# is_available() on first use, not when the app is imported.
+np = None
+_POPCOUNT8 = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ("username", "name", "email", "number", "role", "experience", "availability", "skills", "interests")
+FULL_PROFILE_FIELDS = ("username", "experience", "skills", "interests")
+
+def _popcount_rows(words: "np.ndarray") -> "np.ndarray":
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT8[words.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+class MatchingIndex:
+    # Columnar, in-process copy of the matching-relevant user fields. Skills and
+    # interests are bitsets over a growing vocabulary (one uint64 word per 64
+    # names), so a query is a handful of vectorized ANDs and popcounts over all
+    # users followed by a partial sort, instead of a graph traversal.
+
+    def __init__(self, capacity: int = 1024):
+        if not is_available():
+            raise RuntimeError("The matching index needs numpy installed")
+        self.size = 0
+        self._usernames: List[str] = []
+        self._profiles: List[dict] = []
+        self._rows: Dict[str, int] = {}
+        self._skill_ids: Dict[str, int] = {}
+        self._interest_ids: Dict[str, int] = {}
+        self._role_ids: Dict[str, int] = {}
+        self._skill_bits = np.zeros((capacity, 1), dtype=np.uint64)
+        self._interest_bits = np.zeros((capacity, 1), dtype=np.uint64)
+        self._experience = np.zeros(capacity, dtype=np.int64)
+        self._role = np.full(capacity, -1, dtype=np.int32)
+        self._available = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def stats(self) -> dict:
+        arrays = (self._skill_bits, self._interest_bits, self._experience, self._role, self._available)
+        return {
+            "users": self.size,
+            "skills": len(self._skill_ids),
+            "interests": len(self._interest_ids),
+            "roles": len(self._role_ids),
+            "array_bytes": int(sum(a.nbytes for a in arrays)),
+        }
+
+    def _grow_rows(self, rows: int):
+        capacity = len(self._experience)
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2)
+
+        def grow(array, fill=0):
+            grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        self._skill_bits = grow(self._skill_bits)
+        self._interest_bits = grow(self._interest_bits)
+        self._experience = grow(self._experience)
+        self._role = grow(self._role, -1)
+        self._available = grow(self._available)
+
+    @staticmethod
+    def _widen(bits: "np.ndarray", vocab_size: int) -> "np.ndarray":
+        words = (vocab_size + 63) // 64
+        if words <= bits.shape[1]:
+            return bits
+        widened = np.zeros((bits.shape[0], max(words, bits.shape[1] * 2)), dtype=np.uint64)
+        widened[:, :bits.shape[1]] = bits
+        return widened
+
+    def _encode(self, names, ids: Dict[str, int], bits: "np.ndarray", row: int) -> "np.ndarray":
+        for name in names:
+            if name not in ids:
+                ids[name] = len(ids)
+        bits = self._widen(bits, len(ids))
+        bits[row, :] = 0
+        for name in names:
+            bit = ids[name]
+            bits[row, bit >> 6] |= np.uint64(1 << (bit & 63))
+        return bits
+
+    @staticmethod
+    def _query_words(names, ids: Dict[str, int], width: int) -> Tuple["np.ndarray", List[str]]:
+        words = np.zeros(width, dtype=np.uint64)
+        known = []
+        for name in names:
+            bit = ids.get(name)
+            if bit is not None:
+                words[bit >> 6] |= np.uint64(1 << (bit & 63))
+                known.append(name)
+        return words, known
+
+    def upsert(self, user: dict):
+        username = user.get("username")
+        if not username:
+            return
+        row = self._rows.get(username)
+        if row is None:
+            # Partial updates (e.g. an availability toggle) for users we have
+            # never seen are dropped; the next rebuild picks them up.
+            if any(field not in user for field in FULL_PROFILE_FIELDS):
+                return
+            row = self.size
+            self._grow_rows(row + 1)
+            self.size += 1
+            self._rows[username] = row
+            self._usernames.append(username)
+            self._profiles.append({})
+
+        profile = self._profiles[row]
+        profile.update({field: user[field] for field in PROFILE_FIELDS if field in user})
+        if "skills" in user:
+            self._skill_bits = self._encode(user["skills"] or [], self._skill_ids, self._skill_bits, row)
+        if "interests" in user:
+            self._interest_bits = self._encode(user["interests"] or [], self._interest_ids, self._interest_bits, row)
+        if "experience" in user:
+            self._experience[row] = int(user["experience"] or 0)
+        if "role" in user:
+            self._role[row] = self._role_ids.setdefault(user["role"], len(self._role_ids))
+        if "availability" in user:
+            self._available[row] = bool(user["availability"])
+
+    def search(
+        self,
+        role: Optional[str],
+        skills: List[str],
+        interests: List[str],
+        min_exp: int,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        # Same filters, score and ordering as neo4j_service.find_ranked_matches.
+        after = decode_ranked_cursor(cursor) if cursor else {}
+        n = self.size
+        skills = list(dict.fromkeys(skills))
+        interests = list(dict.fromkeys(interests))
+
+        mask = self._available[:n] & (self._experience[:n] >= min_exp)
+        if role is not None:
+            code = self._role_ids.get(role)
+            if code is None:
+                return [], None
+            mask &= self._role[:n] == code
+
+        skill_words, known_skills = self._query_words(skills, self._skill_ids, self._skill_bits.shape[1])
+        if skills:
+            if not known_skills:
+                return [], None
+            skill_overlap = _popcount_rows(self._skill_bits[:n] & skill_words)
+            mask &= skill_overlap > 0
+        else:
+            skill_overlap = np.zeros(n, dtype=np.int32)
+        interest_words, known_interests = self._query_words(interests, self._interest_ids, self._interest_bits.shape[1])
+        if known_interests:
+            interest_overlap = _popcount_rows(self._interest_bits[:n] & interest_words)
+        else:
+            interest_overlap = np.zeros(n, dtype=np.int32)
+
+        rows = np.flatnonzero(mask)
+        scores = (
+            skill_overlap[rows] * settings.MATCH_WEIGHT_SKILL
+            + interest_overlap[rows] * settings.MATCH_WEIGHT_INTEREST
+            + self._experience[rows] * settings.MATCH_WEIGHT_EXPERIENCE
+        ).astype(np.float64)
+
+        if after.get("score") is not None:
+            after_score, after_username = after["score"], after.get("username") or ""
+            keep = scores < after_score
+            for i in np.flatnonzero(scores == after_score):
+                keep[i] = self._usernames[rows[i]] > after_username
+            rows, scores = rows[keep], scores[keep]
+
+        k = limit + 1
+        if len(rows) > k:
+            threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+            candidates = np.flatnonzero(scores >= threshold)
+        else:
+            candidates = np.arange(len(rows))
+        ordered = sorted(candidates, key=lambda i: (-scores[i], self._usernames[rows[i]]))[:k]
+
+        users = []
+        for i in ordered:
+            profile = self._profiles[rows[i]]
+            user_skills = set(profile.get("skills") or [])
+            user_interests = set(profile.get("interests") or [])
+            users.append({
+                "username": profile["username"],
+                "name": profile.get("name"),
+                "role": profile.get("role"),
+                "experience": profile.get("experience"),
+                "availability": bool(self._available[rows[i]]),
+                "email": profile.get("email"),
+                "number": profile.get("number"),
+                "skills": [s for s in known_skills if s in user_skills],
+                "interests": [s for s in known_interests if s in user_interests],
+                "score": float(scores[i]),
+            })
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = encode_cursor({"score": users[-1]["score"], "username": users[-1]["username"]})
+        return users, next_cursor
+
+    def sample_queries(self, count: int, seed: int = 0) -> List[dict]:
+        rng = random.Random(seed)
+        skills = list(self._skill_ids)
+        interests = list(self._interest_ids)
+        roles = list(self._role_ids)
+        queries = []
+        for _ in range(count):
+            queries.append({
+                "role": rng.choice(roles) if roles and rng.random() < 0.3 else None,
+                "skills": rng.sample(skills, min(len(skills), rng.randint(1, 3))) if skills else [],
+                "interests": rng.sample(interests, min(len(interests), rng.randint(0, 2))) if interests else [],
+                "min_experience": rng.randint(0, 5),
+            })
+        return queries
+
+
+# The index lives in this worker only and follows the user events published
+# here, i.e. writes served by this worker. Writes served by other workers show
+# up at the next rebuild, every MATCHING_INDEX_REFRESH_SECONDS.
+_index: Optional[MatchingIndex] = None
+# One buffer per rebuild in progress, so overlapping rebuilds each replay every
+# write made while they ran.
+_pending: List[List[dict]] = []
+
+
+def is_available() -> bool:
+    global np, _POPCOUNT8
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        _POPCOUNT8 = numpy.array([bin(i).count("1") for i in range(256)], dtype=numpy.uint8)
+        np = numpy
+    return True
+
+
+def get_index() -> Optional[MatchingIndex]:
+    return _index
+
+
+async def rebuild(db=None, source: Optional[str] = None, batch_size: int = 5000) -> int:
+    # Builds a fresh index off to the side and swaps it in; writes that arrive
+    # meanwhile are queued and replayed on the new index before the swap.
+    global _index
+    if not is_available():
+        raise RuntimeError("The matching index needs numpy installed")
+    source = source or settings.MATCHING_INDEX_SOURCE
+    pending: List[dict] = []
+    _pending.append(pending)
+    index = MatchingIndex()
+    try:
+        if source == "mongo":
+            batches = iter_user_batches(db, batch_size)
+        else:
+            batches = neo4j_service.iter_user_profiles(batch_size)
+        async for batch in batches:
+            for user in batch:
+                index.upsert(user)
+            await asyncio.sleep(0)
+        for user in pending:
+            index.upsert(user)
+        _index = index
+    finally:
+        _pending.remove(pending)
+    logger.info("Matching index loaded %d users from %s", len(index), source)
+    return len(index)
+
+
+async def run_index_refresher(db):
+    # Long-running task started by the app lifespan: loads the index, then
+    # rebuilds it every MATCHING_INDEX_REFRESH_SECONDS.
+    while True:
+        try:
+            await rebuild(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Matching index rebuild failed")
+        if settings.MATCHING_INDEX_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(settings.MATCHING_INDEX_REFRESH_SECONDS)
+
+
+@subscribe
+async def _on_user_change(source: str, old: Optional[dict], new: dict):
+    if _index is not None:
+        _index.upsert(new)
+    for pending in _pending:
+        pending.append(new)
+
+
+def _comparable(users: List[dict]) -> List[tuple]:
+    return [(u["username"], round(float(u["score"]), 6), tuple(sorted(u["skills"])), tuple(sorted(u["interests"])))
+            for u in users]
+
+
+async def check_consistency(queries: Optional[List[dict]] = None, samples: int = 20, limit: int = 20) -> dict:
+    if _index is None:
+        raise RuntimeError("The matching index is not loaded")
+    queries = queries or _index.sample_queries(samples)
+    mismatches = []
+    for query in queries:
+        args = (query.get("role"), query.get("skills") or [], query.get("interests") or [],
+                query.get("min_experience") or 0, limit)
+        from_index, _ = _index.search(*args)
+        from_cypher, _ = await neo4j_service.find_ranked_matches(*args)
+        expected, actual = _comparable(from_cypher), _comparable(from_index)
+        if expected != actual:
+            mismatches.append({
+                "query": query,
+                "only_in_cypher": [row for row in expected if row not in actual],
+                "only_in_index": [row for row in actual if row not in expected],
+            })
+    return {"queries": len(queries), "mismatches": mismatches, "consistent": not mismatches}
@@ -0,0 +1,277 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Minimal Prometheus-style metrics.
+#
+# Metrics live in process memory and are rendered in the text exposition
+# format by /metrics. Recording is a dict lookup plus an add under an
+# uncontended lock (pymongo listeners run on Motor's executor threads), so it
+# can stay on under load. Values that already exist elsewhere, like the cache
+# counters in redis_service or pool sizes, are read by collectors at scrape
+# time instead of being recorded on the hot path.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, *labels: str, value: float):
+        # For counters mirrored from elsewhere by a collector.
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in list(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, *labels: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*labels, value=time.perf_counter() - started)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.label_names, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+_registry: List[_Metric] = []
+_collectors: List[Callable[[], None]] = []
+
+
+def collector(func: Callable[[], None]) -> Callable[[], None]:
+    # Registers a function that refreshes gauges right before each scrape.
+    _collectors.append(func)
+    return func
+
+
+def render() -> str:
+    for collect in _collectors:
+        collect()
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# HTTP
+http_requests = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests being served")
+
+# Databases
+db_operation_latency = Histogram(
+    "db_operation_duration_seconds", "Latency of named store operations", ("store", "operation")
+)
+db_operation_errors = Counter("db_operation_errors_total", "Failed named store operations", ("store", "operation"))
+mongo_command_latency = Histogram(
+    "mongo_command_duration_seconds", "Mongo command latency", ("command", "collection")
+)
+mongo_command_failures = Counter("mongo_command_failures_total", "Failed Mongo commands", ("command", "collection"))
+mongo_connections = Gauge("mongo_pool_connections", "Mongo pool connections by state", ("state",))
+neo4j_sessions_in_use = Gauge("neo4j_sessions_in_use", "Neo4j sessions currently open by this worker")
+neo4j_pool_max = Gauge("neo4j_pool_max_connections", "Configured Neo4j connection pool size")
+redis_pool_connections = Gauge("redis_pool_connections", "Redis pool connections by state", ("state",))
+
+# Cache
+cache_requests = Counter("cache_requests_total", "Cache lookups by tier and result", ("tier", "result"))
+cache_bytes = Counter("cache_bytes_total", "Bytes moved to and from Redis", ("direction",))
+cache_l1_size = Gauge("cache_l1_bytes", "Bytes held by the in-process cache")
+cache_l1_evictions = Counter("cache_l1_evictions_total", "In-process cache evictions and expirations", ("reason",))
+
+
+def timed_operation(store: str, name: Optional[str] = None):
+    # Decorator for async service functions: records their latency, and errors,
+    # as db_operation_duration_seconds{store, operation}.
+    def decorate(func):
+        operation = name or func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                db_operation_errors.inc(store, operation)
+                raise
+            finally:
+                db_operation_latency.observe(store, operation, value=time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware (no request/response wrapping), labelled by the
+    # route template so path parameters do not explode the label set.
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            http_latency.observe(method, path, value=time.perf_counter() - started)
+            http_requests.inc(method, path, status)
+
+
+def mongo_event_listeners() -> list:
+    # pymongo is imported when a Mongo client is created, not with the app.
+    from pymongo import monitoring
+
+    class MongoCommandListener(monitoring.CommandListener):
+        # Only started events carry the command document, so the collection is
+        # remembered until the matching succeeded/failed event.
+
+        def __init__(self):
+            self._collections: Dict[Tuple[int, int], str] = {}
+
+        def started(self, event):
+            collection = event.command.get(event.command_name)
+            self._collections[(event.request_id, event.operation_id or 0)] = collection if isinstance(collection, str) else ""
+
+        def _finish(self, event, failed: bool):
+            collection = self._collections.pop((event.request_id, event.operation_id or 0), "")
+            mongo_command_latency.observe(event.command_name, collection, value=event.duration_micros / 1e6)
+            if failed:
+                mongo_command_failures.inc(event.command_name, collection)
+
+        def succeeded(self, event):
+            self._finish(event, False)
+
+        def failed(self, event):
+            self._finish(event, True)
+
+    class MongoPoolListener(monitoring.ConnectionPoolListener):
+        def pool_created(self, event):
+            pass
+
+        def pool_ready(self, event):
+            pass
+
+        def pool_cleared(self, event):
+            pass
+
+        def pool_closed(self, event):
+            pass
+
+        def connection_created(self, event):
+            mongo_connections.inc("open")
+
+        def connection_ready(self, event):
+            pass
+
+        def connection_closed(self, event):
+            mongo_connections.dec("open")
+
+        def connection_check_out_started(self, event):
+            pass
+
+        def connection_check_out_failed(self, event):
+            mongo_connections.inc("checkout_failures")
+
+        def connection_checked_out(self, event):
+            mongo_connections.inc("in_use")
+
+        def connection_checked_in(self, event):
+            mongo_connections.dec("in_use")
+
+    return [MongoCommandListener(), MongoPoolListener()]
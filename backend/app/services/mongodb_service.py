@@ -1,7 +1,120 @@
 import asyncio
+from bson import ObjectId
+from bson.errors import InvalidId
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from backend.app.services.metrics import timed_operation
+from backend.app.services.pagination import decode_cursor, encode_cursor
+from backend.app.services.redis_service import delete_cached_data, invalidate_dependents
+from backend.app.services.serialization import dumps
 
+ALL_USERS_CACHE_KEY = "mongo:all_users"
 
-async def get_all_users(db):
-    cursor = db["users"].find({}, {"_id": 0})
-    users = await cursor.to_list(length=1000)
-    return users
\ No newline at end of file
+# Dimensions /mongo/filterUsers can filter on, as user document fields.
+USER_FILTER_EQUALS = ["role", "availability", "skills", "interests"]
+USER_FILTER_MINIMUMS = ["experience"]
+
+
+@timed_operation("mongo")
+async def get_all_users(db, max_users: int):
+    # Read in cursor batches with no fixed cap, so the cached list is never
+    # silently cut short; a collection past max_users is refused instead.
+    too_many = f"More than {max_users} users; page with /mongo/filterUsers/page or stream /mongo/exportUsers"
+    if await db["users"].estimated_document_count() > max_users:
+        raise ValueError(too_many)
+    users = []
+    async for batch in iter_user_batches(db, min(max_users + 1, 5000)):
+        users.extend(batch)
+        if len(users) > max_users:
+            raise ValueError(too_many)
+    return users
+
+
+@timed_operation("mongo")
+async def get_users_by_usernames(db, usernames: List[str]) -> Dict[str, dict]:
+    # One $in query on the unique username index; unknown usernames are left
+    # out of the result.
+    names = list(dict.fromkeys(usernames))
+    docs = await db["users"].find({"username": {"$in": names}}, {"_id": 0}).to_list(length=len(names))
+    return {doc["username"]: doc for doc in docs}
+
+
+def build_user_filter(
+    role: Optional[str] = None,
+    availability: Optional[bool] = None,
+    skill: Optional[str] = None,
+    experience_min: Optional[int] = None,
+    interest: Optional[str] = None,
+) -> dict:
+    filt: dict = {}
+    if role is not None:
+        filt["role"] = role
+    if availability is not None:
+        filt["availability"] = availability
+    if skill is not None:
+        filt["skills"] = skill
+    if interest is not None:
+        filt["interests"] = interest
+    if experience_min is not None:
+        filt["experience"] = {"$gte": experience_min}
+    return filt
+
+
+def encode_page_cursor(last_id: ObjectId) -> str:
+    return encode_cursor({"after": str(last_id)})
+
+
+def decode_page_cursor(token: str) -> ObjectId:
+    try:
+        return ObjectId(decode_cursor(token)["after"])
+    except (KeyError, TypeError, InvalidId):
+        raise ValueError("Invalid page cursor")
+
+
+@timed_operation("mongo")
+async def find_users_page(db, filt: dict, limit: int, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    # Keyset pagination on _id: each page is an index range scan that starts
+    # where the previous one stopped, so deep pages cost the same as the first.
+    query = dict(filt)
+    if cursor:
+        query["_id"] = {"$gt": decode_page_cursor(cursor)}
+    docs = await db["users"].find(query).sort("_id", 1).limit(limit + 1).to_list(length=limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_page_cursor(docs[-1]["_id"])
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    return docs, next_cursor
+
+
+async def iter_users_ndjson(db, filt: Optional[dict] = None, batch_size: int = 1000) -> AsyncIterator[bytes]:
+    # Yields one chunk of newline-delimited JSON per cursor batch, so memory use
+    # stays at one batch regardless of collection size.
+    cursor = db["users"].find(filt or {}).batch_size(batch_size)
+    lines = []
+    async for doc in cursor:
+        lines.append(dumps(doc))
+        if len(lines) >= batch_size:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def iter_user_batches(db, batch_size: int = 5000, sort_by_username: bool = False) -> AsyncIterator[List[dict]]:
+    cursor = db["users"].find({}, {"_id": 0}).batch_size(batch_size)
+    if sort_by_username:
+        cursor = cursor.sort("username", 1)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def invalidate_user_caches(*docs: Optional[dict]):
+    await delete_cached_data(ALL_USERS_CACHE_KEY)
+    await invalidate_dependents(list(docs), USER_FILTER_EQUALS, USER_FILTER_MINIMUMS)
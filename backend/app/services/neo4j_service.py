@@ -1,37 +1,82 @@
-from backend.app.config.db.neo4j_conn import get_session
-from typing import List
+import time
+from backend.app.config import settings
+from backend.app.config.db.neo4j_conn import execute_read, execute_write
+from backend.app.services.batch_loader import DataLoader
+from backend.app.services.metrics import timed_operation
+from backend.app.services.pagination import decode_ranked_cursor, encode_cursor
+from backend.app.services.slow_query_log import observe_cypher
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-def get_user_by_username(username: str):
+
+async def _fetch_single(tx, query: str, params: dict):
+    started = time.perf_counter()
+    result = await tx.run(query, params)
+    record = await result.single()
+    observe_cypher(query, params, time.perf_counter() - started)
+    return record
+
+
+async def _fetch_all(tx, query: str, params: dict):
+    started = time.perf_counter()
+    result = await tx.run(query, params)
+    records = [record async for record in result]
+    observe_cypher(query, params, time.perf_counter() - started)
+    return records
+
+
+async def _consume(tx, query: str, params: dict):
+    started = time.perf_counter()
+    result = await tx.run(query, params)
+    summary = await result.consume()
+    observe_cypher(query, params, time.perf_counter() - started)
+    return summary
+
+
+@timed_operation("neo4j")
+async def get_user_by_username(username: str):
     query = """
     MATCH (u:User {username: $username})
     RETURN u
     """
-    with get_session() as session:
-        result = session.run(query, username=username)
-        record = result.single()
-        if not record:
-            return None
-        u = record["u"]
-        return {
-            "username": u.get("username", ""),
-            "name": u.get("name", ""),
-            "number": u.get("number", ""),
-            "email": u.get("email", ""),
-            "role": u.get("role", ""),
-            "skills": u.get("skills", []),
-            "interests": u.get("interests", []),
-            "experience": u.get("experience", 0),
-            "organization": u.get("organization", ""),
-            "availability": u.get("availability", False)
-        }
-
-def check_user_exists(username: str) -> bool:
+    record = await execute_read(_fetch_single, query, {"username": username})
+    if not record:
+        return None
+    return _user_from_node(record["u"])
+
+@timed_operation("neo4j")
+async def get_users_by_usernames(usernames: List[str]) -> Dict[str, dict]:
+    # One read for many users; unknown usernames are left out of the result.
+    query = """
+    UNWIND $names AS name
+    MATCH (u:User {username: name})
+    RETURN u
+    """
+    records = await execute_read(_fetch_all, query, {"names": list(dict.fromkeys(usernames))})
+    users = [_user_from_node(record["u"]) for record in records]
+    return {user["username"]: user for user in users}
+
+def _user_from_node(u) -> dict:
+    return {
+        "username": u.get("username", ""),
+        "name": u.get("name", ""),
+        "number": u.get("number", ""),
+        "email": u.get("email", ""),
+        "role": u.get("role", ""),
+        "skills": u.get("skills", []),
+        "interests": u.get("interests", []),
+        "experience": u.get("experience", 0),
+        "organization": u.get("organization", ""),
+        "availability": u.get("availability", False)
+    }
+
+@timed_operation("neo4j")
+async def check_user_exists(username: str) -> bool:
     query = "MATCH (u:User {username: $username}) RETURN u.username LIMIT 1"
-    with get_session() as session:
-        result = session.run(query, {"username": username}).single()
-        return result is not None
+    record = await execute_read(_fetch_single, query, {"username": username})
+    return record is not None
 
-def create_user(user) -> bool:
+@timed_operation("neo4j")
+async def create_user(user) -> bool:
     query = """
     CREATE (u:User {
         username: $username,
@@ -47,49 +92,306 @@ def create_user(user) -> bool:
     FOREACH (skill IN $skills | MERGE (s:Skill {name: skill}) MERGE (u)-[:HAS_SKILL]->(s))
     FOREACH (interest IN $interests | MERGE (i:Interest {name: interest}) MERGE (u)-[:HAS_INTEREST]->(i))
     """
-    with get_session() as session:
-        session.run(query, **user.dict())
+    await execute_write(_consume, query, user.dict())
     return True
 
-def update_availability(username: str, availability: bool) -> bool:
-    with get_session() as session:
-        result = session.run("""
-            MATCH (u:User {username: $username})
-            SET u.availability = $availability
-            RETURN u
-        """, username=username, availability=availability)
-        return result.single() is not None
-
-def find_matching_users(role: str, skills: List[str], min_exp: int):
-    with get_session() as session:
-        query = """
-        MATCH (u:User)
-        WHERE ($role IS NULL OR u.role = $role)
-          AND u.experience >= $min_exp
-          AND u.availability = true
-        OPTIONAL MATCH (u)-[:HAS_SKILL]->(s:Skill)
-        WHERE size($skills) = 0 OR s.name IN $skills
-        WITH u, collect(DISTINCT s.name) as skill_names
-        RETURN {
-            username: u.username,
-            name: u.name,
-            role: u.role,
-            experience: u.experience,
-            availability: u.availability,
-            email: u.email,
-            number: u.number,
-            skills: skill_names
-        } AS user
-        """
-        result = session.run(query, {
-            "role": role,
-            "skills": skills,
-            "min_exp": min_exp
-        })
-        return [record["user"] for record in result]
-
-def get_contact(username: str):
+@timed_operation("neo4j")
+async def bulk_upsert_users(users: List[dict]) -> int:
+    # One UNWIND transaction per batch; MERGE keeps retried batches idempotent.
+    # Skill/interest edges not in the row are dropped so edits replace them.
+    query = """
+    UNWIND $rows AS row
+    MERGE (u:User {username: row.username})
+    SET u.name = row.name,
+        u.number = row.number,
+        u.email = row.email,
+        u.role = row.role,
+        u.experience = row.experience,
+        u.organization = row.organization,
+        u.availability = row.availability
+    WITH u, row
+    OPTIONAL MATCH (u)-[stale_skill:HAS_SKILL]->(s:Skill)
+    WHERE NOT s.name IN row.skills
+    WITH u, row, collect(stale_skill) AS stale_skills
+    OPTIONAL MATCH (u)-[stale_interest:HAS_INTEREST]->(i:Interest)
+    WHERE NOT i.name IN row.interests
+    WITH u, row, stale_skills, collect(stale_interest) AS stale_interests
+    FOREACH (r IN stale_skills + stale_interests | DELETE r)
+    FOREACH (skill IN row.skills | MERGE (s:Skill {name: skill}) MERGE (u)-[:HAS_SKILL]->(s))
+    FOREACH (interest IN row.interests | MERGE (i:Interest {name: interest}) MERGE (u)-[:HAS_INTEREST]->(i))
+    RETURN count(u) AS written
+    """
+    record = await execute_write(_fetch_single, query, {"rows": users})
+    return record["written"] if record else 0
+
+@timed_operation("neo4j")
+async def bulk_set_properties(rows: List[dict]) -> int:
+    # rows: [{"username": ..., "props": {...}}]; scalar properties only.
+    query = """
+    UNWIND $rows AS row
+    MATCH (u:User {username: row.username})
+    SET u += row.props
+    RETURN count(u) AS written
+    """
+    record = await execute_write(_fetch_single, query, {"rows": rows})
+    return record["written"] if record else 0
+
+@timed_operation("neo4j")
+async def update_availability(username: str, availability: bool) -> bool:
+    query = """
+    MATCH (u:User {username: $username})
+    SET u.availability = $availability
+    RETURN u
+    """
+    record = await execute_write(_fetch_single, query, {"username": username, "availability": availability})
+    return record is not None
+
+@timed_operation("neo4j")
+async def find_matching_users(role: str, skills: List[str], min_exp: int):
+    query = """
+    MATCH (u:User)
+    WHERE ($role IS NULL OR u.role = $role)
+      AND u.experience >= $min_exp
+      AND u.availability = true
+    OPTIONAL MATCH (u)-[:HAS_SKILL]->(s:Skill)
+    WHERE size($skills) = 0 OR s.name IN $skills
+    WITH u, collect(DISTINCT s.name) as skill_names
+    RETURN {
+        username: u.username,
+        name: u.name,
+        role: u.role,
+        experience: u.experience,
+        availability: u.availability,
+        email: u.email,
+        number: u.number,
+        skills: skill_names
+    } AS user
+    """
+    records = await execute_read(_fetch_all, query, {
+        "role": role,
+        "skills": skills,
+        "min_exp": min_exp
+    })
+    return [record["user"] for record in records]
+
+# Candidates come from the requested Skill nodes when there are any, so the
+# work done is proportional to the users holding those skills rather than to
+# every User node. Without skills the role index (or a label scan) is used.
+_RANKED_FROM_SKILLS = """
+MATCH (s:Skill) WHERE s.name IN $skills
+MATCH (s)<-[:HAS_SKILL]-(u:User)
+WHERE u.availability = true
+  AND u.experience >= $min_exp
+  AND ($role IS NULL OR u.role = $role)
+WITH u, collect(s.name) AS matched_skills
+"""
+
+_RANKED_FROM_USERS = """
+MATCH (u:User)
+WHERE ($role IS NULL OR u.role = $role)
+  AND u.availability = true
+  AND u.experience >= $min_exp
+WITH u, [] AS matched_skills
+"""
+
+_RANKED_TAIL = """
+OPTIONAL MATCH (u)-[:HAS_INTEREST]->(i:Interest)
+WHERE i.name IN $interests
+WITH u, matched_skills, collect(i.name) AS matched_interests
+WITH u, matched_skills, matched_interests,
+     size(matched_skills) * $w_skill
+     + size(matched_interests) * $w_interest
+     + u.experience * $w_experience AS score
+WHERE $after_score IS NULL
+   OR score < $after_score
+   OR (score = $after_score AND u.username > $after_username)
+WITH u, matched_skills, matched_interests, score
+ORDER BY score DESC, u.username ASC
+LIMIT $limit
+RETURN {
+    username: u.username,
+    name: u.name,
+    role: u.role,
+    experience: u.experience,
+    availability: u.availability,
+    email: u.email,
+    number: u.number,
+    skills: matched_skills,
+    interests: matched_interests,
+    score: score
+} AS user
+"""
+
+
+# Team candidates: the most experienced available holders of each required
+# skill, capped per skill so a popular skill cannot crowd out a rare one, then
+# every required skill each of them has.
+_TEAM_CANDIDATES = """
+UNWIND $skills AS skill
+MATCH (:Skill {name: skill})<-[:HAS_SKILL]-(u:User)
+WHERE u.availability = true AND u.experience >= $min_exp
+WITH skill, u ORDER BY u.experience DESC, u.username ASC
+WITH skill, collect(u)[..$per_skill] AS holders
+UNWIND holders AS u
+WITH DISTINCT u
+MATCH (u)-[:HAS_SKILL]->(s:Skill)
+WHERE s.name IN $skills
+WITH u, collect(s.name) AS matched_skills
+RETURN {
+    username: u.username,
+    name: u.name,
+    role: u.role,
+    experience: u.experience,
+    availability: u.availability,
+    email: u.email,
+    number: u.number,
+    skills: matched_skills
+} AS user
+"""
+
+
+@timed_operation("neo4j")
+async def find_team_candidates(skills: List[str], min_exp: int, per_skill: int) -> List[dict]:
+    records = await execute_read(_fetch_all, _TEAM_CANDIDATES, {
+        "skills": skills,
+        "min_exp": min_exp,
+        "per_skill": per_skill,
+    })
+    return [record["user"] for record in records]
+
+
+@timed_operation("neo4j")
+async def find_ranked_matches(
+    role: Optional[str],
+    skills: List[str],
+    interests: List[str],
+    min_exp: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    after = decode_ranked_cursor(cursor) if cursor else {}
+    query = (_RANKED_FROM_SKILLS if skills else _RANKED_FROM_USERS) + _RANKED_TAIL
+    records = await execute_read(_fetch_all, query, {
+        "role": role,
+        "skills": skills,
+        "interests": interests,
+        "min_exp": min_exp,
+        "w_skill": settings.MATCH_WEIGHT_SKILL,
+        "w_interest": settings.MATCH_WEIGHT_INTEREST,
+        "w_experience": settings.MATCH_WEIGHT_EXPERIENCE,
+        "after_score": after.get("score"),
+        "after_username": after.get("username"),
+        "limit": limit + 1,
+    })
+    users = [record["user"] for record in records]
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor({"score": users[-1]["score"], "username": users[-1]["username"]})
+    return users, next_cursor
+
+async def iter_user_profiles(batch_size: int = 5000) -> AsyncIterator[List[dict]]:
+    # Walks all users in username order, one read transaction per batch.
+    query = """
+    MATCH (u:User)
+    WHERE $after IS NULL OR u.username > $after
+    WITH u ORDER BY u.username LIMIT $limit
+    RETURN {
+        username: u.username,
+        name: u.name,
+        email: u.email,
+        number: u.number,
+        role: u.role,
+        experience: u.experience,
+        organization: u.organization,
+        availability: u.availability,
+        skills: [(u)-[:HAS_SKILL]->(s:Skill) | s.name],
+        interests: [(u)-[:HAS_INTEREST]->(i:Interest) | i.name]
+    } AS user
+    """
+    after = None
+    while True:
+        records = await execute_read(_fetch_all, query, {"after": after, "limit": batch_size})
+        if not records:
+            return
+        users = [record["user"] for record in records]
+        yield users
+        after = users[-1]["username"]
+
+async def iter_usernames(batch_size: int = 10000) -> AsyncIterator[List[str]]:
+    # Same walk as iter_user_profiles, usernames only.
+    query = """
+    MATCH (u:User)
+    WHERE $after IS NULL OR u.username > $after
+    WITH u ORDER BY u.username LIMIT $limit
+    RETURN u.username AS username
+    """
+    after = None
+    while True:
+        records = await execute_read(_fetch_all, query, {"after": after, "limit": batch_size})
+        if not records:
+            return
+        usernames = [record["username"] for record in records]
+        yield usernames
+        after = usernames[-1]
+
+@timed_operation("neo4j")
+async def get_contact(username: str):
     query = "MATCH (u:User {username: $username}) RETURN u.number AS number, u.email AS email"
-    with get_session() as session:
-        result = session.run(query, {"username": username}).single()
-        return result.data() if result else None
+    record = await execute_read(_fetch_single, query, {"username": username})
+    return record.data() if record else None
+
+@timed_operation("neo4j")
+async def get_contacts(usernames: List[str]) -> Dict[str, dict]:
+    query = """
+    UNWIND $names AS name
+    MATCH (u:User {username: name})
+    RETURN u.username AS username, u.number AS number, u.email AS email
+    """
+    records = await execute_read(_fetch_all, query, {"names": list(dict.fromkeys(usernames))})
+    return {record["username"]: {"number": record["number"], "email": record["email"]} for record in records}
+
+@timed_operation("neo4j")
+async def compute_recommendations(usernames: List[str], top_n: int) -> dict:
+    # Collaborator candidates are available users sharing at least one interest;
+    # they are ranked by shared interests and by the skills they have that the
+    # user lacks. One read transaction for the whole batch of users.
+    query = """
+    UNWIND $usernames AS name
+    MATCH (u:User {username: name})
+    CALL {
+        WITH u
+        MATCH (u)-[:HAS_INTEREST]->(:Interest)<-[:HAS_INTEREST]-(o:User)
+        WHERE o <> u AND o.availability = true
+        WITH u, o, count(*) AS shared_interests
+        WITH o, shared_interests,
+             size([(o)-[:HAS_SKILL]->(s:Skill) WHERE NOT (u)-[:HAS_SKILL]->(s) | s]) AS complementary_skills
+        WITH o, shared_interests, complementary_skills,
+             shared_interests * $w_interest + complementary_skills * $w_skill AS score
+        ORDER BY score DESC, o.username ASC
+        LIMIT $top_n
+        RETURN collect({
+            username: o.username,
+            name: o.name,
+            role: o.role,
+            availability: o.availability,
+            shared_interests: shared_interests,
+            complementary_skills: complementary_skills,
+            score: score
+        }) AS recommendations
+    }
+    RETURN u.username AS username, recommendations
+    """
+    records = await execute_read(_fetch_all, query, {
+        "usernames": usernames,
+        "top_n": top_n,
+        "w_interest": settings.RECOMMENDATION_WEIGHT_SHARED_INTEREST,
+        "w_skill": settings.RECOMMENDATION_WEIGHT_COMPLEMENTARY_SKILL,
+    })
+    return {record["username"]: record["recommendations"] for record in records}
+
+
+# Single-user lookups issued in the same event-loop tick, e.g. by concurrent
+# /get_user or /contact requests, share one UNWIND read.
+user_loader = DataLoader(get_users_by_usernames)
+contact_loader = DataLoader(get_contacts)
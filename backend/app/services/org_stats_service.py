@@ -0,0 +1,305 @@
+import argparse
+import asyncio
+import json
+import logging
+from bson import ObjectId
+from collections import Counter
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+from backend.app.services.redis_service import delete_many_cached, get_many_cached, set_many_cached
+
+logger = logging.getLogger(__name__)
+
+# Materialized per-org statistics.
+#
+# org_stats holds one document per organization with the member count, the sum
+# and count of member experience and a skill histogram. add_member and profile
+# edits keep it current with $inc, so the stats endpoints are a single _id
+# lookup instead of a $lookup over every member. rebuild_org_stats recomputes it
+# from scratch to repair drift, and is also used lazily for orgs that predate it.
+#
+# Member adds bump the organization's stats_version in the same update, and the
+# stats document records the version it reflects. A member delta is applied
+# only on top of the version just before it, anything else rebuilds; a rebuild
+# is written only when it is at least as new as what is stored. So a rebuild
+# taken before an add can never overwrite the increment for it. Profile edits
+# do not change the member list and $inc whatever is stored.
+ORG_STATS = "org_stats"
+ORG_VERSION_FIELD = "stats_version"
+ORG_ANALYTICS_TTL_SECONDS = 300
+
+
+def _skill_field(skill: str) -> str:
+    # Skill names become field names, so escape the characters Mongo reserves.
+    return "skills." + skill.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def _skill_name(field: str) -> str:
+    return field.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
+
+def _experience(user: dict) -> Optional[float]:
+    # Like $avg, missing and non-numeric values are left out of the average.
+    value = user.get("experience")
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _member_delta(user: dict, sign: int) -> dict:
+    experience = _experience(user)
+    delta = {
+        "member_count": sign,
+        "experience_sum": sign * (experience or 0),
+        "experience_count": sign if experience is not None else 0,
+    }
+    for skill in set(user.get("skills") or []):
+        delta[_skill_field(skill)] = sign
+    return delta
+
+
+async def apply_member_added(db, org_id: ObjectId, user: dict, version: int):
+    # version is the organization's stats_version after adding user.
+    result = await db[ORG_STATS].update_one(
+        {"_id": org_id, "version": version - 1},
+        {"$inc": {**_member_delta(user, 1), "version": 1}},
+    )
+    if result.matched_count == 0:
+        # Missing, or another add is not applied yet: rebuild from the member
+        # list, which now includes user.
+        await rebuild_org_stats(db, [org_id])
+    await invalidate_org_analytics([org_id])
+
+
+async def apply_user_change(db, old: Optional[dict], new: dict):
+    # Shifts the stats of every org the user belongs to from old to new, and
+    # drops their cached analytics.
+    if not old:
+        return
+    org_ids = [org["_id"] async for org in db["organizations"].find({"members": new["username"]}, {"_id": 1})]
+    if not org_ids:
+        return
+    delta = Counter(_member_delta(new, 1))
+    delta.update(_member_delta(old, -1))
+    delta = {field: value for field, value in delta.items() if value}
+    if delta:
+        await db[ORG_STATS].update_many({"_id": {"$in": org_ids}}, {"$inc": delta})
+    await invalidate_org_analytics(org_ids)
+
+
+async def rebuild_org_stats(db, org_ids: Optional[Iterable[ObjectId]] = None) -> int:
+    from pymongo.errors import DuplicateKeyError
+
+    match = {"_id": {"$in": list(org_ids)}} if org_ids is not None else {}
+    pipeline = [
+        {"$match": match},
+        {"$lookup": {
+            "from": "users",
+            "localField": "members",
+            "foreignField": "username",
+            "as": "team"
+        }},
+        {"$project": {ORG_VERSION_FIELD: 1, "team.experience": 1, "team.skills": 1}},
+    ]
+    rebuilt = 0
+    async for org in db["organizations"].aggregate(pipeline):
+        skills = Counter()
+        for member in org["team"]:
+            skills.update(set(member.get("skills") or []))
+        experience = [value for value in map(_experience, org["team"]) if value is not None]
+        version = org.get(ORG_VERSION_FIELD, 0)
+        doc = {
+            "version": version,
+            "member_count": len(org["team"]),
+            "experience_sum": sum(experience),
+            "experience_count": len(experience),
+            "skills": {},
+        }
+        for skill, count in skills.items():
+            doc["skills"][_skill_field(skill)[len("skills."):]] = count
+        try:
+            await db[ORG_STATS].replace_one(
+                {"_id": org["_id"], "$or": [{"version": {"$lte": version}}, {"version": {"$exists": False}}]},
+                doc,
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # A newer version is already stored.
+            pass
+        rebuilt += 1
+    return rebuilt
+
+
+async def get_org_stats(db, org_id: ObjectId) -> Optional[dict]:
+    stats = await db[ORG_STATS].find_one({"_id": org_id})
+    if stats is None or "experience_count" not in stats:
+        # Missing, or written before experience_count was kept.
+        if not await rebuild_org_stats(db, [org_id]):
+            return None
+        stats = await db[ORG_STATS].find_one({"_id": org_id})
+    member_count = stats.get("member_count", 0)
+    experience_count = stats.get("experience_count", 0)
+    skills = [
+        {"skill": _skill_name(field), "count": count}
+        for field, count in (stats.get("skills") or {}).items() if count > 0
+    ]
+    skills.sort(key=lambda item: item["count"], reverse=True)
+    if experience_count:
+        average_experience = stats.get("experience_sum", 0) / experience_count
+    else:
+        # As $avg: null when no member has a value, 0.0 for an empty org.
+        average_experience = None if member_count else 0.0
+    return {
+        "member_count": member_count,
+        "average_experience": average_experience,
+        "skills": skills,
+    }
+
+
+def _analytics_cache_key(org_id) -> str:
+    return f"mongo:org_analytics:{org_id}"
+
+
+async def invalidate_org_analytics(org_ids: Iterable[ObjectId]):
+    await delete_many_cached([_analytics_cache_key(org_id) for org_id in org_ids])
+
+
+def _analytics_pipeline(org_ids: List[ObjectId]) -> list:
+    # One round trip for the whole chunk of orgs, grouped per org throughout:
+    # every member row is tagged once for the summary, once per distinct skill
+    # and once for its role, counted per (org, tag), then folded into one
+    # document per org. No stage holds more than one org's histograms, so the
+    # 16 MB document limit is not reached however large the orgs are (the
+    # $lookup is followed directly by its $unwind, which MongoDB runs as one
+    # stage without building the member array).
+    return [
+        {"$match": {"_id": {"$in": org_ids}}},
+        {"$project": {"name": 1, "members": 1}},
+        {"$lookup": {
+            "from": "users",
+            "localField": "members",
+            "foreignField": "username",
+            "as": "team"
+        }},
+        {"$unwind": {"path": "$team", "preserveNullAndEmptyArrays": True}},
+        {"$project": {
+            "name": 1,
+            "member": {"$cond": [{"$ifNull": ["$team.username", False]}, 1, 0]},
+            "experience": "$team.experience",
+            "available": {"$cond": [{"$eq": ["$team.availability", True]}, 1, 0]},
+            "tags": {"$concatArrays": [
+                [{"kind": "member", "name": None}],
+                {"$map": {
+                    "input": {"$setUnion": [{"$ifNull": ["$team.skills", []]}, []]},
+                    "as": "skill",
+                    "in": {"kind": "skill", "name": "$$skill"},
+                }},
+                {"$map": {
+                    "input": {"$cond": [{"$ifNull": ["$team.role", False]}, [1], []]},
+                    "as": "one",
+                    "in": {"kind": "role", "name": "$team.role"},
+                }},
+            ]},
+        }},
+        {"$unwind": "$tags"},
+        {"$group": {
+            "_id": {"org": "$_id", "kind": "$tags.kind", "name": "$tags.name"},
+            "org_name": {"$first": "$name"},
+            "count": {"$sum": "$member"},
+            "average_experience": {"$avg": "$experience"},
+            "available": {"$sum": "$available"},
+        }},
+        {"$group": {
+            "_id": "$_id.org",
+            "name": {"$first": "$org_name"},
+            "tags": {"$push": {
+                "kind": "$_id.kind",
+                "name": "$_id.name",
+                "count": "$count",
+                "average_experience": "$average_experience",
+                "available": "$available",
+            }},
+        }},
+    ]
+
+
+async def _compute_analytics(db, org_ids: List[ObjectId]) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    async for org in db["organizations"].aggregate(_analytics_pipeline(org_ids)):
+        result = {
+            "org_id": str(org["_id"]),
+            "name": org.get("name"),
+            "member_count": 0,
+            "average_experience": 0.0,
+            "availability_ratio": 0.0,
+            "skills": [],
+            "roles": [],
+        }
+        for tag in org["tags"]:
+            if tag["kind"] == "member":
+                member_count = tag["count"]
+                result["member_count"] = member_count
+                result["average_experience"] = tag["average_experience"] or 0.0
+                result["availability_ratio"] = tag["available"] / member_count if member_count else 0.0
+            elif tag["kind"] == "skill":
+                result["skills"].append({"skill": tag["name"], "count": tag["count"]})
+            else:
+                result["roles"].append({"role": tag["name"], "count": tag["count"]})
+        result["skills"].sort(key=lambda item: item["count"], reverse=True)
+        result["roles"].sort(key=lambda item: item["count"], reverse=True)
+        results[result["org_id"]] = result
+    return results
+
+
+async def _all_org_ids(db) -> AsyncIterator[ObjectId]:
+    async for org in db["organizations"].find({}, {"_id": 1}).sort("_id", 1):
+        yield org["_id"]
+
+
+async def _iter_given(org_ids: List[ObjectId]) -> AsyncIterator[ObjectId]:
+    for org_id in org_ids:
+        yield org_id
+
+
+async def iter_org_analytics(db, org_ids: Optional[List[ObjectId]] = None, chunk_size: int = 200) -> AsyncIterator[dict]:
+    # Yields one analytics document per org, in request order. Cached orgs are
+    # read in one MGET per chunk; the rest share a single aggregation.
+    source = _iter_given(org_ids) if org_ids is not None else _all_org_ids(db)
+    chunk: List[ObjectId] = []
+
+    async def flush():
+        keys = [_analytics_cache_key(org_id) for org_id in chunk]
+        cached = await get_many_cached(keys)
+        missing = [org_id for org_id, key in zip(chunk, keys) if key not in cached]
+        computed = await _compute_analytics(db, missing) if missing else {}
+        if computed:
+            await set_many_cached(
+                {_analytics_cache_key(org_id): doc for org_id, doc in computed.items()},
+                ORG_ANALYTICS_TTL_SECONDS,
+            )
+        for org_id, key in zip(chunk, keys):
+            yield cached.get(key) or computed.get(str(org_id)) or {"org_id": str(org_id), "error": "Organization not found"}
+
+    async for org_id in source:
+        chunk.append(org_id)
+        if len(chunk) >= chunk_size:
+            async for doc in flush():
+                yield doc
+            chunk = []
+    if chunk:
+        async for doc in flush():
+            yield doc
+
+
+async def _main(org_ids: List[str]):
+    from fastapi import FastAPI
+    from backend.app.config.db import resources
+
+    app = FastAPI()
+    async with resources.lifespan(app, stores=("mongo",), warmup=False):
+        rebuilt = await rebuild_org_stats(app.state.mongodb, [ObjectId(i) for i in org_ids] if org_ids else None)
+    print(json.dumps({"rebuilt": rebuilt}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild materialized organization statistics")
+    parser.add_argument("org_ids", nargs="*", help="Only rebuild these organizations (default: all)")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args().org_ids))
@@ -0,0 +1,31 @@
+import base64
+import json
+import math
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        raise ValueError("Invalid page cursor")
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid page cursor")
+    return payload
+
+
+def decode_ranked_cursor(token: str) -> dict:
+    # Cursors of score-ordered listings: the score and username of the last row.
+    # Checked here, so a tampered value is a bad request and not a query error.
+    payload = decode_cursor(token)
+    score, username = payload.get("score"), payload.get("username")
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not math.isfinite(score):
+        raise ValueError("Invalid page cursor")
+    if not isinstance(username, str):
+        raise ValueError("Invalid page cursor")
+    return payload
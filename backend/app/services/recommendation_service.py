@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import List, Optional
+from backend.app.config import settings
+from backend.app.config.db.redis_conn import get_redis_client
+from backend.app.services import neo4j_service
+from backend.app.services.redis_service import cache_many_recommendations, clear_recommendations
+from backend.app.services.user_events import subscribe
+
+logger = logging.getLogger(__name__)
+
+# Precomputed "people you should team up with".
+#
+# Users whose skills or interests changed are added to a dirty set; the worker
+# takes them off in batches, computes their top collaborators in one Cypher
+# read per batch and writes the lists to Redis in one pipeline. The endpoint
+# only ever reads Redis. Lists of users who did not change are left as they
+# are until they expire, so a new user shows up in other users' lists after
+# those users are next recomputed.
+RECOMMENDATION_DIRTY_KEY = "recommendations:dirty"
+RELEVANT_FIELDS = ("skills", "interests")
+
+_stats = {"runs": 0, "computed_users": 0, "last_run_users": 0, "last_run_seconds": 0.0}
+
+
+async def mark_dirty(usernames: List[str]) -> int:
+    if not usernames:
+        return 0
+    redis_client = get_redis_client()
+    return await redis_client.sadd(RECOMMENDATION_DIRTY_KEY, *usernames)
+
+
+async def refresh_batch(usernames: List[str]) -> int:
+    started = time.perf_counter()
+    computed = await neo4j_service.compute_recommendations(usernames, settings.RECOMMENDATION_TOP_N)
+    await cache_many_recommendations(computed, settings.RECOMMENDATION_TTL_SECONDS)
+    # Users missing from the graph have nothing to recommend.
+    for username in usernames:
+        if username not in computed:
+            await clear_recommendations(username)
+    _stats["runs"] += 1
+    _stats["computed_users"] += len(computed)
+    _stats["last_run_users"] = len(computed)
+    _stats["last_run_seconds"] = round(time.perf_counter() - started, 4)
+    return len(computed)
+
+
+async def refresh_dirty(batch_size: Optional[int] = None) -> int:
+    # Recomputes one batch of dirty users; returns how many were taken off the
+    # dirty set. On failure they are put back for the next run.
+    redis_client = get_redis_client()
+    popped = await redis_client.spop(RECOMMENDATION_DIRTY_KEY, batch_size or settings.RECOMMENDATION_BATCH_SIZE)
+    if not popped:
+        return 0
+    usernames = [name.decode() if isinstance(name, bytes) else name for name in popped]
+    try:
+        await refresh_batch(usernames)
+    except Exception:
+        await redis_client.sadd(RECOMMENDATION_DIRTY_KEY, *usernames)
+        raise
+    return len(usernames)
+
+
+async def run_recommendation_worker():
+    # Long-running task started by the app lifespan: drains the dirty set, then
+    # waits for the next run.
+    while True:
+        try:
+            while await refresh_dirty() >= settings.RECOMMENDATION_BATCH_SIZE:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Recommendation refresh failed")
+        await asyncio.sleep(settings.RECOMMENDATION_INTERVAL_SECONDS)
+
+
+async def refresh_all(batch_size: Optional[int] = None) -> int:
+    refreshed = 0
+    async for batch in neo4j_service.iter_user_profiles(batch_size or settings.RECOMMENDATION_BATCH_SIZE):
+        refreshed += await refresh_batch([user["username"] for user in batch])
+    return refreshed
+
+
+async def recommendation_stats() -> dict:
+    redis_client = get_redis_client()
+    return {"dirty": await redis_client.scard(RECOMMENDATION_DIRTY_KEY), **_stats}
+
+
+@subscribe
+async def _on_user_change(source: str, old: Optional[dict], new: dict):
+    if not settings.RECOMMENDATIONS_ENABLED or not new.get("username"):
+        return
+    if any(field in new and (old is None or old.get(field) != new[field]) for field in RELEVANT_FIELDS):
+        await mark_dirty([new["username"]])
+
+
+async def _main(args):
+    from fastapi import FastAPI
+    from backend.app.config.db import resources
+
+    app = FastAPI()
+    async with resources.lifespan(app, stores=("neo4j", "redis"), warmup=False):
+        if args.command == "all":
+            result = {"refreshed": await refresh_all(args.batch_size)}
+        else:
+            drained = 0
+            while processed := await refresh_dirty(args.batch_size):
+                drained += processed
+            result = {"refreshed": drained}
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute collaborator recommendations")
+    parser.add_argument("command", choices=["dirty", "all"], help="Drain the dirty set, or recompute every user")
+    parser.add_argument("--batch-size", type=int, default=None)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -1,56 +1,513 @@
+import asyncio
 import json
-from typing import Any, List, Optional, Union
-from redis import Redis
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from backend.app.config import settings
 from backend.app.config.db.redis_conn import get_redis_client
+from backend.app.services import metrics
+from backend.app.services.local_cache import LocalCache
+from backend.app.services.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+# L1: per-worker copy of hot entries, kept for at most L1_CACHE_TTL_SECONDS and
+# dropped early when any worker invalidates the key over pub/sub.
+_local_cache = LocalCache(settings.L1_CACHE_MAX_BYTES, settings.L1_CACHE_TTL_SECONDS)
+_redis_stats = {"hits": 0, "misses": 0, "bytes_read": 0, "bytes_written": 0}
+
+
+def _decode_key(key: Union[str, bytes]) -> str:
+    return key.decode() if isinstance(key, bytes) else key
 
 
 async def get_cached_data(key: str) -> Optional[Any]:
+    data = _local_cache.get(key)
+    if data is not None:
+        return data
     redis_client = get_redis_client()
-    data = redis_client.get(key)
-    if data:
-        return json.loads(data)
+    with metrics.db_operation_latency.time("redis", "get"):
+        raw = await redis_client.get(key)
+    if raw:
+        _redis_stats["hits"] += 1
+        _redis_stats["bytes_read"] += len(raw)
+        data = loads(raw)
+        _local_cache.set(key, data, len(raw))
+        return data
+    _redis_stats["misses"] += 1
     return None
 
 
 async def set_cached_data(key: str, data: Any, expiration_seconds: int = 3600) -> bool:
     redis_client = get_redis_client()
-    serialized_data = json.dumps(data)
-    return redis_client.setex(key, expiration_seconds, serialized_data)
+    serialized_data = dumps(data)
+    _redis_stats["bytes_written"] += len(serialized_data)
+    _local_cache.set(key, data, len(serialized_data), expiration_seconds)
+    return await redis_client.setex(key, expiration_seconds, serialized_data)
+
+
+async def get_many_cached(keys: List[str]) -> Dict[str, Any]:
+    # Served from L1 where possible, the rest in one MGET round trip; keys that
+    # are missing are left out of the result.
+    found = {}
+    remote_keys = []
+    for key in keys:
+        data = _local_cache.get(key)
+        if data is not None:
+            found[key] = data
+        else:
+            remote_keys.append(key)
+    if not remote_keys:
+        return found
+    redis_client = get_redis_client()
+    with metrics.db_operation_latency.time("redis", "mget"):
+        values = await redis_client.mget(remote_keys)
+    for key, raw in zip(remote_keys, values):
+        if raw:
+            _redis_stats["hits"] += 1
+            _redis_stats["bytes_read"] += len(raw)
+            found[key] = loads(raw)
+            _local_cache.set(key, found[key], len(raw))
+        else:
+            _redis_stats["misses"] += 1
+    return found
+
+
+async def set_many_cached(items: Dict[str, Any], expiration_seconds: int = 3600) -> bool:
+    if not items:
+        return True
+    redis_client = get_redis_client()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for key, data in items.items():
+            serialized_data = dumps(data)
+            _redis_stats["bytes_written"] += len(serialized_data)
+            _local_cache.set(key, data, len(serialized_data), expiration_seconds)
+            pipe.setex(key, expiration_seconds, serialized_data)
+        results = await pipe.execute()
+    return all(results)
 
 
 async def delete_cached_data(key: str) -> bool:
     redis_client = get_redis_client()
-    return redis_client.delete(key) > 0
+    deleted = await redis_client.delete(key)
+    await publish_invalidation([key])
+    return deleted > 0
+
+
+async def delete_many_cached(keys: List[str]) -> int:
+    if not keys:
+        return 0
+    redis_client = get_redis_client()
+    deleted = await redis_client.delete(*keys)
+    await publish_invalidation(keys)
+    return deleted
 
 
 async def clear_cache_pattern(pattern: str) -> int:
+    # Admin/maintenance only: walks the keyspace with SCAN. Request paths should
+    # invalidate through invalidate_dependents instead.
     redis_client = get_redis_client()
-    keys = redis_client.keys(pattern)
+    keys = [_decode_key(key) async for key in redis_client.scan_iter(match=pattern, count=1000)]
     if keys:
-        return redis_client.delete(*keys)
+        return await delete_many_cached(keys)
     return 0
 
 
-async def set_user_availability(username: str, available: bool):
-    return await set_cached_data(f"availability:{username}", {"available": available}, 3600)
+async def publish_invalidation(keys: Iterable[str]):
+    # Drops the keys from this worker's L1 immediately and tells the others.
+    keys = list(keys)
+    for key in keys:
+        _local_cache.delete(key)
+    if keys:
+        await get_redis_client().publish(CACHE_INVALIDATION_CHANNEL, json.dumps(keys))
+
+
+async def run_invalidation_listener():
+    # Long-running task started by the app lifespan. On every (re)subscribe the
+    # L1 is flushed, since messages sent while disconnected are lost.
+    backoff = 0.5
+    while True:
+        try:
+            async with get_redis_client().pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                _local_cache.clear()
+                backoff = 0.5
+                async for message in pubsub.listen():
+                    for key in json.loads(message["data"]):
+                        _local_cache.delete(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Cache invalidation listener failed, resubscribing in %.1fs", backoff)
+            _local_cache.clear()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+def cache_stats() -> dict:
+    return {"l1": _local_cache.stats(), "l2": dict(_redis_stats)}
+
+
+@metrics.collector
+def _collect_cache_metrics():
+    l1 = _local_cache.stats()
+    metrics.cache_requests.set("l1", "hit", value=l1["hits"])
+    metrics.cache_requests.set("l1", "miss", value=l1["misses"])
+    metrics.cache_requests.set("redis", "hit", value=_redis_stats["hits"])
+    metrics.cache_requests.set("redis", "miss", value=_redis_stats["misses"])
+    metrics.cache_bytes.set("read", value=_redis_stats["bytes_read"])
+    metrics.cache_bytes.set("written", value=_redis_stats["bytes_written"])
+    metrics.cache_l1_size.set(value=l1["size_bytes"])
+    metrics.cache_l1_evictions.set("evicted", value=l1["evictions"])
+    metrics.cache_l1_evictions.set("expired", value=l1["expirations"])
+
+
+# Dependency index for cached query results.
+#
+# Every cached query records, per dimension it filters on, which index set it
+# belongs to: "cache:dep:<dim>:*" when the dimension is unconstrained,
+# "cache:dep:<dim>:=<value>" for an equality filter, and a score in the sorted
+# set "cache:dep:<dim>:min" for a lower-bound filter. A write to a document then
+# resolves the exact set of entries whose filters the document satisfies with
+# a handful of SUNION/ZRANGEBYSCORE calls, without touching the keyspace.
+CACHE_DEP_PREFIX = "cache:dep"
+CACHE_DEP_TTL_SECONDS = 3600
+
+
+def _dep_any_key(dimension: str) -> str:
+    return f"{CACHE_DEP_PREFIX}:{dimension}:*"
+
+
+def _dep_value_key(dimension: str, value: Any) -> str:
+    return f"{CACHE_DEP_PREFIX}:{dimension}:={json.dumps(value)}"
+
+
+def _dep_min_key(dimension: str) -> str:
+    return f"{CACHE_DEP_PREFIX}:{dimension}:min"
+
+
+def _as_values(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def _queue_dependencies(pipe, key: str, expiration_seconds: int, equals: Dict[str, Any],
+                        minimums: Optional[Dict[str, Optional[float]]]):
+    index_ttl = max(expiration_seconds, CACHE_DEP_TTL_SECONDS)
+    for dimension, value in equals.items():
+        index_key = _dep_any_key(dimension) if value is None else _dep_value_key(dimension, value)
+        pipe.sadd(index_key, key)
+        pipe.expire(index_key, index_ttl)
+    for dimension, minimum in (minimums or {}).items():
+        if minimum is None:
+            index_key = _dep_any_key(dimension)
+            pipe.sadd(index_key, key)
+        else:
+            index_key = _dep_min_key(dimension)
+            pipe.zadd(index_key, {key: minimum})
+        pipe.expire(index_key, index_ttl)
+
+
+async def set_cached_query(
+    key: str,
+    data: Any,
+    expiration_seconds: int,
+    equals: Dict[str, Any],
+    minimums: Optional[Dict[str, Optional[float]]] = None,
+) -> bool:
+    redis_client = get_redis_client()
+    serialized_data = dumps(data)
+    _redis_stats["bytes_written"] += len(serialized_data)
+    _local_cache.set(key, data, len(serialized_data), expiration_seconds)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.setex(key, expiration_seconds, serialized_data)
+        _queue_dependencies(pipe, key, expiration_seconds, equals, minimums)
+        results = await pipe.execute()
+    return bool(results[0])
+
+
+async def invalidate_dependents(
+    docs: List[Optional[dict]],
+    equals: List[str],
+    minimums: Optional[List[str]] = None,
+) -> int:
+    # Deletes every cached query whose filter matches any of docs. Callers pass
+    # both the old and the new version of a modified document, so entries that
+    # used to include it and entries that now should are both dropped.
+    docs = [doc for doc in docs if doc]
+    minimums = minimums or []
+    if not docs or not (equals or minimums):
+        return 0
+
+    redis_client = get_redis_client()
+    touched_sets = set()
+    touched_zsets = set()
+    # For each doc, one list of pipeline positions per dimension: the members
+    # of those positions are unioned, then intersected across dimensions.
+    plan = []
+    position = 0
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for doc in docs:
+            dimensions = []
+            for dimension in equals:
+                index_keys = [_dep_any_key(dimension)]
+                index_keys += [_dep_value_key(dimension, v) for v in _as_values(doc.get(dimension))]
+                touched_sets.update(index_keys)
+                pipe.sunion(index_keys)
+                dimensions.append([position])
+                position += 1
+            for dimension in minimums:
+                touched_sets.add(_dep_any_key(dimension))
+                pipe.smembers(_dep_any_key(dimension))
+                positions = [position]
+                position += 1
+                value = doc.get(dimension)
+                if value is not None:
+                    touched_zsets.add(_dep_min_key(dimension))
+                    pipe.zrangebyscore(_dep_min_key(dimension), "-inf", value)
+                    positions.append(position)
+                    position += 1
+                dimensions.append(positions)
+            plan.append(dimensions)
+        results = await pipe.execute()
+
+    stale = set()
+    for dimensions in plan:
+        matched = set.intersection(*(
+            set().union(*(results[p] for p in positions)) for positions in dimensions
+        ))
+        stale |= matched
+
+    if not stale:
+        return 0
+    stale = [_decode_key(key) for key in stale]
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.delete(*stale)
+        for index_key in touched_sets:
+            pipe.srem(index_key, *stale)
+        for index_key in touched_zsets:
+            pipe.zrem(index_key, *stale)
+        results = await pipe.execute()
+    await publish_invalidation(stale)
+    return results[0]
+
+
+# Read-through loading with stampede protection.
+#
+# Entries written by get_or_load live for expiration + stale seconds, next to a
+# "<key>:fresh" marker that expires after expiration seconds. While the marker
+# exists the value is fresh; after that callers still get the stale value and a
+# single background refresh is started. Concurrent misses for the same key
+# share one in-process load, and a short Redis lease keeps other workers from
+# running the same loader at the same time.
+_inflight: Dict[str, "asyncio.Task"] = {}
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def _fresh_key(key: str) -> str:
+    return f"{key}:fresh"
+
+
+def _lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+def _start_flight(key: str, load: Callable[[], Awaitable[Any]]) -> "asyncio.Task":
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(load())
+        _inflight[key] = task
+
+        def _done(finished):
+            if _inflight.get(key) is finished:
+                del _inflight[key]
+            if not finished.cancelled() and finished.exception() is not None:
+                logger.warning("Cache load for %s failed: %r", key, finished.exception())
+
+        task.add_done_callback(_done)
+    return task
+
+
+async def _read_entry(key: str, count_key: Optional[str] = None):
+    redis_client = get_redis_client()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.pttl(_fresh_key(key))
+        if count_key is not None:
+            pipe.scard(count_key)
+        with metrics.db_operation_latency.time("redis", "read_entry"):
+            results = await pipe.execute()
+    # The set size is 0 when no count_key was given.
+    return results[0], results[1], results[2] if count_key is not None else 0
+
+
+async def _load_and_store(key, loader, expiration_seconds, stale_seconds, equals, minimums, wait: bool, raw: bool):
+    redis_client = get_redis_client()
+    token = None
+    if settings.CACHE_LOCK_ENABLED:
+        token = uuid.uuid4().hex
+        lease_ms = int(settings.CACHE_LOCK_LEASE_SECONDS * 1000)
+        if not await redis_client.set(_lock_key(key), token, nx=True, px=lease_ms):
+            token = None
+            if not wait:
+                # Another worker is already refreshing this stale entry.
+                return None
+            deadline = time.monotonic() + settings.CACHE_LOCK_LEASE_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(settings.CACHE_LOCK_POLL_SECONDS)
+                stored, fresh_ms, _ = await _read_entry(key)
+                if stored and fresh_ms > 0:
+                    return stored if raw else loads(stored)
+            # The lease ran out without a value showing up; load it ourselves.
+    try:
+        data = await loader()
+        serialized_data = dumps(data)
+        _redis_stats["bytes_written"] += len(serialized_data)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.setex(key, expiration_seconds + stale_seconds, serialized_data)
+            pipe.setex(_fresh_key(key), expiration_seconds, b"1")
+            if equals is not None or minimums:
+                _queue_dependencies(pipe, key, expiration_seconds + stale_seconds, equals or {}, minimums)
+            await pipe.execute()
+        if raw:
+            data = serialized_data
+        _local_cache.set(key, data, len(serialized_data), expiration_seconds)
+        return data
+    finally:
+        if token is not None:
+            try:
+                await redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, _lock_key(key), token)
+            except Exception:
+                # The lease expires on its own; never fail a load over it.
+                logger.warning("Could not release cache lock for %s", key, exc_info=True)
+
+
+async def get_or_load(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    expiration_seconds: int,
+    stale_seconds: int = 0,
+    equals: Optional[Dict[str, Any]] = None,
+    minimums: Optional[Dict[str, Optional[float]]] = None,
+    raw: bool = False,
+) -> Any:
+    # With raw=True the encoded JSON is returned as bytes, exactly as stored, so
+    # a hit can be sent to the client without decoding it. A key must always be
+    # read in the same mode, since L1 holds whichever form was stored.
+    data, _ = await get_or_load_counting(key, loader, expiration_seconds, stale_seconds, equals, minimums, raw)
+    return data
+
+
+async def get_or_load_counting(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    expiration_seconds: int,
+    stale_seconds: int = 0,
+    equals: Optional[Dict[str, Any]] = None,
+    minimums: Optional[Dict[str, Optional[float]]] = None,
+    raw: bool = False,
+    count_key: Optional[str] = None,
+) -> Tuple[Any, int]:
+    # get_or_load() that also returns the size of the set at count_key (0 when
+    # it is None), read in the same round trip as the entry on a Redis hit.
+    data = _local_cache.get(key)
+    if data is not None:
+        return data, await get_redis_client().scard(count_key) if count_key is not None else 0
+
+    stored, fresh_ms, count = await _read_entry(key, count_key)
+    if stored:
+        _redis_stats["hits"] += 1
+        _redis_stats["bytes_read"] += len(stored)
+        data = stored if raw else loads(stored)
+        if fresh_ms > 0:
+            _local_cache.set(key, data, len(stored), fresh_ms / 1000)
+        else:
+            _start_flight(f"{key}:refresh", lambda: _load_and_store(
+                key, loader, expiration_seconds, stale_seconds, equals, minimums, wait=False, raw=raw
+            ))
+        return data, count
+
+    _redis_stats["misses"] += 1
+    task = _start_flight(key, lambda: _load_and_store(
+        key, loader, expiration_seconds, stale_seconds, equals, minimums, wait=True, raw=raw
+    ))
+    data = await asyncio.shield(task)
+    if count_key is not None:
+        # The set may have changed while loading.
+        count = await get_redis_client().scard(count_key)
+    return data, count
+
+
+# Availability lives in one hash (username -> b"1"/b"0") that is the source of
+# truth for reads; usernames written since the last flush to the databases are
+# kept in a set, so repeated toggles coalesce into one database write.
+AVAILABILITY_KEY = "user_availability"
+AVAILABILITY_DIRTY_KEY = "user_availability:dirty"
+
+
+def _availability_value(raw) -> Optional[bool]:
+    return None if raw is None else raw in (b"1", "1")
+
+
+async def set_user_availability(username: str, available: bool, dirty: bool = True) -> Optional[bool]:
+    # Returns the previous value, or None if the user was not in the hash.
+    redis_client = get_redis_client()
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hget(AVAILABILITY_KEY, username)
+        pipe.hset(AVAILABILITY_KEY, username, "1" if available else "0")
+        if dirty:
+            pipe.sadd(AVAILABILITY_DIRTY_KEY, username)
+        results = await pipe.execute()
+    return _availability_value(results[0])
 
 
 async def get_user_availability(username: str) -> Optional[bool]:
-    data = await get_cached_data(f"availability:{username}")
-    return data["available"] if data else None
+    redis_client = get_redis_client()
+    return _availability_value(await redis_client.hget(AVAILABILITY_KEY, username))
+
+
+async def get_many_user_availability(usernames: List[str]) -> Dict[str, bool]:
+    # Users missing from the hash are left out of the result.
+    if not usernames:
+        return {}
+    redis_client = get_redis_client()
+    values = await redis_client.hmget(AVAILABILITY_KEY, usernames)
+    return {username: _availability_value(raw) for username, raw in zip(usernames, values) if raw is not None}
 
 
 async def clear_user_availability(username: str):
-    return await delete_cached_data(f"availability:{username}")
+    redis_client = get_redis_client()
+    return await redis_client.hdel(AVAILABILITY_KEY, username)
+
+
+def _recommendation_key(username: str) -> str:
+    return f"recommendation:{username}"
+
+
+async def cache_recommendations(username: str, recommendations: List[dict], expiration_seconds: int = 1800):
+    return await set_cached_data(_recommendation_key(username), recommendations, expiration_seconds)
 
 
-async def cache_recommendations(username: str, recommendations: List[str], expiration_seconds: int = 1800):
-    return await set_cached_data(f"recommendation:{username}", recommendations, expiration_seconds)
+async def cache_many_recommendations(recommendations: Dict[str, List[dict]], expiration_seconds: int = 1800):
+    # One pipelined round trip for a whole batch of users.
+    return await set_many_cached(
+        {_recommendation_key(username): recs for username, recs in recommendations.items()}, expiration_seconds
+    )
 
 
-async def get_cached_recommendations(username: str) -> Optional[List[str]]:
-    return await get_cached_data(f"recommendation:{username}")
+async def get_cached_recommendations(username: str) -> Optional[List[dict]]:
+    return await get_cached_data(_recommendation_key(username))
 
 
 async def clear_recommendations(username: str):
-    return await delete_cached_data(f"recommendation:{username}")
\ No newline at end of file
+    return await delete_cached_data(_recommendation_key(username))
@@ -0,0 +1,55 @@
+import json
+import logging
+from datetime import date, datetime
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # a declared dependency; without it log_encoder() warns at startup
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value: Any):
+    # ObjectIds are written as their hex string, so documents can be encoded
+    # straight from Mongo without converting _id first.
+    if isinstance(value, ObjectId):
+        return str(value)
+    if orjson is None and isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(data: Any) -> bytes:
+        return orjson.dumps(data, default=_default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps(data: Any) -> bytes:
+        return json.dumps(data, default=_default, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+
+def log_encoder():
+    # Called once at startup, so running without orjson is visible.
+    if orjson is None:
+        logger.warning("orjson is not installed, JSON is encoded with the stdlib json module")
+
+
+class FastJSONResponse(JSONResponse):
+    # Default response class of the app.
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(Response):
+    # For bodies that are already encoded JSON, e.g. cache entries, which are
+    # sent as they are.
+    media_type = "application/json"
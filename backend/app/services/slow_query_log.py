@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from backend.app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Slow-query log.
+#
+# Mongo commands (through a pymongo command listener) and Cypher queries
+# (through the neo4j_service transaction helpers) that take longer than
+# SLOW_QUERY_THRESHOLD_MS are logged and aggregated by query shape: literal
+# values are replaced by "?" for Mongo, and Cypher is already parameterized,
+# with parameters reduced to their types. A sample of slow queries, at most one
+# per shape every SLOW_QUERY_PLAN_INTERVAL_SECONDS, is re-run in the
+# background as explain("executionStats") or PROFILE, and the plan summary is
+# attached to the shape. Only reads are re-run.
+
+_MONGO_META_FIELDS = {"$db", "lsid", "$clusterTime", "$readPreference", "txnNumber", "autocommit",
+                      "startTransaction", "readConcern", "writeConcern", "comment", "maxTimeMS", "apiVersion"}
+_MONGO_IGNORED_COMMANDS = {"getMore", "killCursors", "endSessions", "explain", "hello", "isMaster", "ismaster",
+                           "ping", "buildInfo", "saslStart", "saslContinue", "listIndexes", "createIndexes"}
+_MONGO_READ_COMMANDS = {"find", "aggregate", "count", "distinct"}
+_CYPHER_WRITE = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DETACH|FOREACH|LOAD\s+CSV)\b", re.IGNORECASE)
+
+_shapes: Dict[str, dict] = {}
+_lock = threading.Lock()
+_plan_queue: Optional["asyncio.Queue"] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def is_enabled() -> bool:
+    return settings.SLOW_QUERY_ENABLED
+
+
+def _shape(value: Any) -> Any:
+    # Keeps the structure of a query document and drops its values.
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return ["?"] if value else []
+        return [_shape(item) for item in value]
+    return "?"
+
+
+def redact(value: Any) -> Any:
+    # Parameters reduced to their types, e.g. {"skills": "<list[3]>", "min_exp": "<int>"}.
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return f"<list[{len(value)}]>"
+    return f"<{type(value).__name__}>"
+
+
+def _walk_plan(plan: Any, key: str, found: List[str]):
+    if isinstance(plan, dict):
+        if key in plan:
+            found.append(str(plan[key]).split("@")[0])
+        for value in plan.values():
+            _walk_plan(value, key, found)
+    elif isinstance(plan, list):
+        for item in plan:
+            _walk_plan(item, key, found)
+
+
+def _record(store: str, operation: str, shape: Any, params: Any, duration_ms: float) -> Optional[str]:
+    # Returns the shape key when a plan should be sampled for this occurrence.
+    shape_text = shape if isinstance(shape, str) else json.dumps(shape, sort_keys=True, default=str)
+    key = f"{store}:{operation}:{shape_text}"
+    now = time.time()
+    with _lock:
+        entry = _shapes.get(key)
+        if entry is None:
+            if len(_shapes) >= settings.SLOW_QUERY_MAX_SHAPES:
+                # Make room by forgetting the shape that cost the least so far.
+                del _shapes[min(_shapes, key=lambda k: _shapes[k]["total_ms"])]
+            entry = _shapes[key] = {
+                "store": store, "operation": operation, "shape": shape, "count": 0, "total_ms": 0.0,
+                "max_ms": 0.0, "last_params": None, "last_seen": None, "plan": None, "plan_sampled_at": 0.0,
+            }
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        entry["last_params"] = params
+        entry["last_seen"] = now
+        sample = (now - entry["plan_sampled_at"] >= settings.SLOW_QUERY_PLAN_INTERVAL_SECONDS
+                  and random.random() < settings.SLOW_QUERY_PLAN_SAMPLE_RATE)
+        if sample:
+            entry["plan_sampled_at"] = now
+    logger.warning("Slow %s %s (%.1f ms): %s params=%s", store, operation, duration_ms, shape_text[:500], params)
+    return key if sample else None
+
+
+def _submit_plan(item: tuple):
+    # Safe from any thread; drops the sample when the sampler is not running
+    # or is behind.
+    if _loop is None or _plan_queue is None:
+        return
+
+    def put():
+        try:
+            _plan_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            pass
+
+    _loop.call_soon_threadsafe(put)
+
+
+def observe_cypher(query: str, params: dict, duration_seconds: float):
+    duration_ms = duration_seconds * 1000
+    if not is_enabled() or duration_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+        return
+    shape = " ".join(query.split())
+    operation = "write" if _CYPHER_WRITE.search(shape) else "read"
+    key = _record("neo4j", operation, shape, redact(params or {}), duration_ms)
+    if key is not None and operation == "read":
+        _submit_plan(("neo4j", key, query, params))
+
+
+def mongo_event_listeners() -> list:
+    if not is_enabled():
+        return []
+    # pymongo is imported when a Mongo client is created, not with the app.
+    from pymongo import monitoring
+
+    class MongoSlowCommandListener(monitoring.CommandListener):
+        # Commands are held from started to succeeded so the slow ones can be
+        # shaped and explained; the rest are dropped without further work.
+
+        def __init__(self):
+            self._commands: Dict[tuple, tuple] = {}
+
+        def started(self, event):
+            if event.command_name in _MONGO_IGNORED_COMMANDS:
+                return
+            self._commands[(event.request_id, event.operation_id or 0)] = (event.command, event.database_name)
+
+        def succeeded(self, event):
+            self._finish(event)
+
+        def failed(self, event):
+            self._finish(event)
+
+        def _finish(self, event):
+            entry = self._commands.pop((event.request_id, event.operation_id or 0), None)
+            if entry is None or event.duration_micros < settings.SLOW_QUERY_THRESHOLD_MS * 1000:
+                return
+            command, database = entry
+            collection = command.get(event.command_name)
+            body = {k: v for k, v in command.items() if k not in _MONGO_META_FIELDS and k != event.command_name}
+            shape = {"collection": collection if isinstance(collection, str) else "?", **_shape(body)}
+            key = _record("mongo", event.command_name, shape, None, event.duration_micros / 1000)
+            if key is not None and event.command_name in _MONGO_READ_COMMANDS:
+                explain = {k: v for k, v in command.items() if k not in _MONGO_META_FIELDS}
+                _submit_plan(("mongo", key, explain, database))
+
+    return [MongoSlowCommandListener()]
+
+
+def _summarize_mongo(explain: dict) -> dict:
+    stats = explain.get("executionStats", {})
+    stages: List[str] = []
+    _walk_plan(explain.get("queryPlanner", {}).get("winningPlan", {}), "stage", stages)
+    if not stages and "stages" in explain:
+        # Aggregations nest the cursor stage's explain under "stages".
+        _walk_plan(explain["stages"], "stage", stages)
+        for stage in explain["stages"]:
+            stats = stage.get("$cursor", {}).get("executionStats", stats)
+    index_names: List[str] = []
+    _walk_plan(explain.get("queryPlanner", explain.get("stages", {})), "indexName", index_names)
+    return {
+        "stages": stages,
+        "indexes": sorted(set(index_names)),
+        "returned": stats.get("nReturned"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+def _summarize_profile(profile: dict) -> dict:
+    operators: List[str] = []
+    _walk_plan(profile, "operatorType", operators)
+
+    def total_hits(node: dict) -> int:
+        return (node.get("dbHits") or 0) + sum(total_hits(child) for child in node.get("children") or [])
+
+    return {"operators": operators, "db_hits": total_hits(profile), "rows": profile.get("rows")}
+
+
+async def _profile(tx, query: str, params: dict):
+    result = await tx.run(f"PROFILE {query}", params)
+    summary = await result.consume()
+    return summary.profile
+
+
+async def _sample_plan(db, item: tuple):
+    store, key, query, extra = item
+    if store == "mongo":
+        explain = await db.client[extra].command({"explain": query, "verbosity": "executionStats"})
+        plan = _summarize_mongo(explain)
+    else:
+        from backend.app.config.db.neo4j_conn import execute_read
+        plan = _summarize_profile(await execute_read(_profile, query, extra) or {})
+    with _lock:
+        if key in _shapes:
+            _shapes[key]["plan"] = {**plan, "sampled_at": time.time()}
+
+
+async def run_plan_sampler(db):
+    # Long-running task started by the app lifespan: runs the queued explains
+    # and PROFILEs one at a time, so sampling never competes with itself.
+    global _plan_queue, _loop
+    _loop = asyncio.get_running_loop()
+    _plan_queue = asyncio.Queue(maxsize=100)
+    try:
+        while True:
+            item = await _plan_queue.get()
+            try:
+                await _sample_plan(db, item)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Could not sample a plan for %s", item[1][:200], exc_info=True)
+    finally:
+        _loop = None
+        _plan_queue = None
+
+
+def top_shapes(limit: int = 20, store: Optional[str] = None) -> List[dict]:
+    with _lock:
+        entries = [dict(entry) for entry in _shapes.values() if store is None or entry["store"] == store]
+    entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+    for entry in entries:
+        entry["total_ms"] = round(entry["total_ms"], 3)
+        entry["max_ms"] = round(entry["max_ms"], 3)
+        entry["mean_ms"] = round(entry["total_ms"] / entry["count"], 3)
+        del entry["plan_sampled_at"]
+    return entries[:limit]
+
+
+def reset():
+    with _lock:
+        _shapes.clear()
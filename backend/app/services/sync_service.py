@@ -0,0 +1,325 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, List, Optional
+from backend.app.config import settings
+from backend.app.services import neo4j_service
+from backend.app.services.mongodb_service import invalidate_user_caches, iter_user_batches
+from backend.app.services.org_stats_service import apply_user_change
+from backend.app.services.user_events import subscribe
+
+logger = logging.getLogger(__name__)
+
+# Outbox replication between Mongo and Neo4j.
+#
+# A user write to one store adds an entry to the Mongo "outbox" collection
+# naming the other store as target. A background worker claims pending entries
+# in batches, collapses them per username, and applies them with one UNWIND
+# (Neo4j) or bulk_write (Mongo) per batch. Every apply is an upsert keyed on
+# username, so retries and duplicate deliveries are harmless.
+OUTBOX = "outbox"
+SYNC_FIELDS = ("name", "number", "email", "role", "experience", "organization", "availability", "skills", "interests")
+GRAPH_LIST_FIELDS = ("skills", "interests")
+FULL_FIELDS = ("username",) + SYNC_FIELDS
+TARGET_FOR_SOURCE = {"mongo": "neo4j", "neo4j": "mongo"}
+
+_db = None
+_worker_id = uuid.uuid4().hex
+_stats = {
+    "batches": 0,
+    "applied": 0,
+    "failed_attempts": 0,
+    "last_batch_size": 0,
+    "last_batch_seconds": 0.0,
+    "last_lag_seconds": None,
+    "max_lag_seconds": 0.0,
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_aware(value: datetime) -> datetime:
+    # Motor returns naive UTC datetimes unless the client is tz_aware.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _is_full(doc: dict) -> bool:
+    return all(field in doc for field in FULL_FIELDS)
+
+
+def _outbox_entry(target: str, doc: dict) -> dict:
+    now = _now()
+    return {
+        "target": target,
+        "username": doc["username"],
+        "fields": {field: doc[field] for field in FULL_FIELDS if field in doc},
+        "full": _is_full(doc),
+        "status": "pending",
+        "attempts": 0,
+        "created_at": now,
+        "next_attempt_at": now,
+    }
+
+
+async def enqueue(db, target: str, docs: List[dict]):
+    if docs:
+        await db[OUTBOX].insert_many([_outbox_entry(target, doc) for doc in docs], ordered=False)
+
+
+@subscribe
+async def _on_user_change(source: str, old: Optional[dict], new: dict):
+    target = TARGET_FOR_SOURCE.get(source)
+    if _db is None or target is None or not new.get("username"):
+        return
+    await enqueue(_db, target, [new])
+
+
+async def _claim_batch(db, limit: int) -> List[dict]:
+    now = _now()
+    ready = {"$or": [
+        {"status": "pending", "next_attempt_at": {"$lte": now}},
+        # Entries whose worker died mid-batch become claimable again.
+        {"status": "processing", "lease_until": {"$lt": now}},
+    ]}
+    ids = [doc["_id"] async for doc in db[OUTBOX].find(ready, {"_id": 1}).sort("created_at", 1).limit(limit)]
+    if not ids:
+        return []
+    claim = f"{_worker_id}:{uuid.uuid4().hex}"
+    await db[OUTBOX].update_many(
+        {"_id": {"$in": ids}, **ready},
+        {"$set": {"status": "processing", "claim": claim,
+                  "lease_until": now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)}},
+    )
+    return await db[OUTBOX].find({"claim": claim}).sort("created_at", 1).to_list(length=limit)
+
+
+def _collapse(entries: List[dict]) -> Dict[str, dict]:
+    # Latest write wins per username; a full document makes the result full.
+    merged: Dict[str, dict] = {}
+    for entry in entries:
+        current = merged.setdefault(entry["username"], {"fields": {}, "full": False})
+        current["fields"].update(entry["fields"])
+        current["full"] = current["full"] or entry["full"]
+    return merged
+
+
+async def _apply_to_neo4j(changes: Dict[str, dict]):
+    full = [change["fields"] for change in changes.values() if change["full"]]
+    partial = [
+        {"username": username,
+         "props": {k: v for k, v in change["fields"].items() if k not in GRAPH_LIST_FIELDS and k != "username"}}
+        for username, change in changes.items() if not change["full"]
+    ]
+    if full:
+        await neo4j_service.bulk_upsert_users(full)
+    if partial:
+        await neo4j_service.bulk_set_properties(partial)
+
+
+async def _apply_to_mongo(db, changes: Dict[str, dict]):
+    # pymongo is imported here, not with the app (see resources).
+    from pymongo import UpdateOne
+
+    requests = [
+        UpdateOne({"username": username}, {"$set": change["fields"]}, upsert=change["full"])
+        for username, change in changes.items()
+    ]
+    if requests:
+        previous = {doc["username"]: doc async for doc in db["users"].find(
+            {"username": {"$in": list(changes)}}, {"_id": 0}
+        )}
+        await db["users"].bulk_write(requests, ordered=False)
+        # Cached queries are matched against whole documents, so partial
+        # changes are laid over the previous version.
+        updated = {username: {**previous.get(username, {}), **change["fields"]} for username, change in changes.items()}
+        await invalidate_user_caches(*previous.values(), *updated.values())
+        for username in previous:
+            await apply_user_change(db, previous[username], updated[username])
+
+
+async def process_outbox_batch(db, limit: Optional[int] = None) -> int:
+    entries = await _claim_batch(db, limit or settings.OUTBOX_BATCH_SIZE)
+    if not entries:
+        return 0
+    started = time.perf_counter()
+    for target in ("neo4j", "mongo"):
+        batch = [entry for entry in entries if entry["target"] == target]
+        if not batch:
+            continue
+        ids = [entry["_id"] for entry in batch]
+        try:
+            changes = _collapse(batch)
+            if target == "neo4j":
+                await _apply_to_neo4j(changes)
+            else:
+                await _apply_to_mongo(db, changes)
+        except Exception as e:
+            logger.warning("Outbox apply to %s failed for %d entries: %s", target, len(batch), e)
+            _stats["failed_attempts"] += len(batch)
+            await _reschedule(db, batch, str(e))
+            continue
+        now = _now()
+        await db[OUTBOX].update_many(
+            {"_id": {"$in": ids}},
+            {"$set": {"status": "done", "applied_at": now}, "$unset": {"claim": "", "lease_until": ""}},
+        )
+        lag = max((now - _as_aware(entry["created_at"])).total_seconds() for entry in batch)
+        _stats["applied"] += len(batch)
+        _stats["last_lag_seconds"] = round(lag, 3)
+        _stats["max_lag_seconds"] = max(_stats["max_lag_seconds"], round(lag, 3))
+    _stats["batches"] += 1
+    _stats["last_batch_size"] = len(entries)
+    _stats["last_batch_seconds"] = round(time.perf_counter() - started, 4)
+    return len(entries)
+
+
+async def _reschedule(db, entries: List[dict], error: str):
+    from pymongo import UpdateOne
+
+    now = _now()
+    requests = []
+    for entry in entries:
+        attempts = entry.get("attempts", 0) + 1
+        status = "failed" if attempts >= settings.OUTBOX_MAX_ATTEMPTS else "pending"
+        delay = min(settings.OUTBOX_POLL_SECONDS * (2 ** attempts), 300)
+        requests.append(UpdateOne({"_id": entry["_id"]}, {
+            "$set": {"status": status, "attempts": attempts, "last_error": error[:500],
+                     "next_attempt_at": now + timedelta(seconds=delay)},
+            "$unset": {"claim": "", "lease_until": ""},
+        }))
+    await db[OUTBOX].bulk_write(requests, ordered=False)
+
+
+async def run_outbox_worker(db):
+    # Long-running task started by the app lifespan.
+    global _db
+    _db = db
+    while True:
+        try:
+            processed = await process_outbox_batch(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Outbox worker iteration failed")
+            processed = 0
+        if processed < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_SECONDS)
+
+
+async def outbox_stats(db) -> dict:
+    counts = {doc["_id"]: doc["count"] async for doc in db[OUTBOX].aggregate([
+        {"$match": {"status": {"$in": ["pending", "processing", "failed"]}}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+    ])}
+    oldest = await db[OUTBOX].find_one(
+        {"status": {"$in": ["pending", "processing"]}}, {"created_at": 1}, sort=[("created_at", 1)]
+    )
+    oldest_age = (_now() - _as_aware(oldest["created_at"])).total_seconds() if oldest else 0.0
+    return {
+        "pending": counts.get("pending", 0),
+        "processing": counts.get("processing", 0),
+        "failed": counts.get("failed", 0),
+        "oldest_pending_seconds": round(oldest_age, 3),
+        **_stats,
+    }
+
+
+def _normalise(user: dict) -> dict:
+    normalised = {field: user.get(field) for field in SYNC_FIELDS}
+    for field in GRAPH_LIST_FIELDS:
+        normalised[field] = sorted(normalised[field] or [])
+    return normalised
+
+
+async def _flatten(batches) -> AsyncIterator[dict]:
+    async for batch in batches:
+        for user in batch:
+            yield user
+
+
+async def _next(iterator) -> Optional[dict]:
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+async def reconcile(db, batch_size: int = 5000, repair_from: Optional[str] = None, max_reported: int = 100) -> dict:
+    # Merge-joins both stores in username order, one batch from each side at a
+    # time, so memory use does not depend on the number of users.
+    mongo_users = _flatten(iter_user_batches(db, batch_size, sort_by_username=True))
+    graph_users = _flatten(neo4j_service.iter_user_profiles(batch_size))
+    report = {"compared": 0, "only_in_mongo": 0, "only_in_neo4j": 0, "different": 0, "samples": [], "repaired": 0}
+    repairs: List[dict] = []
+
+    def record(kind: str, username: str, detail=None):
+        report[kind] += 1
+        if len(report["samples"]) < max_reported:
+            report["samples"].append({"kind": kind, "username": username, **({"fields": detail} if detail else {})})
+
+    async def flush_repairs():
+        if repair_from and repairs:
+            await enqueue(db, TARGET_FOR_SOURCE[repair_from], repairs)
+            report["repaired"] += len(repairs)
+            repairs.clear()
+
+    mongo_user, graph_user = await _next(mongo_users), await _next(graph_users)
+    while mongo_user is not None or graph_user is not None:
+        if graph_user is None or (mongo_user is not None and mongo_user["username"] < graph_user["username"]):
+            record("only_in_mongo", mongo_user["username"])
+            if repair_from == "mongo":
+                repairs.append(mongo_user)
+            mongo_user = await _next(mongo_users)
+        elif mongo_user is None or graph_user["username"] < mongo_user["username"]:
+            record("only_in_neo4j", graph_user["username"])
+            if repair_from == "neo4j":
+                repairs.append(graph_user)
+            graph_user = await _next(graph_users)
+        else:
+            report["compared"] += 1
+            left, right = _normalise(mongo_user), _normalise(graph_user)
+            fields = [field for field in SYNC_FIELDS if left[field] != right[field]]
+            if fields:
+                record("different", mongo_user["username"], fields)
+                if repair_from:
+                    repairs.append(mongo_user if repair_from == "mongo" else graph_user)
+            mongo_user, graph_user = await _next(mongo_users), await _next(graph_users)
+        if len(repairs) >= batch_size:
+            await flush_repairs()
+    await flush_repairs()
+    return report
+
+
+async def _main(args):
+    from fastapi import FastAPI
+    from backend.app.config.db import resources
+
+    app = FastAPI()
+    async with resources.lifespan(app, warmup=False):
+        db = app.state.mongodb
+        if args.command == "reconcile":
+            result = await reconcile(db, args.batch_size, args.repair_from)
+        elif args.command == "drain":
+            drained = 0
+            while processed := await process_outbox_batch(db):
+                drained += processed
+            result = {"processed": drained, **await outbox_stats(db)}
+        else:
+            result = await outbox_stats(db)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mongo/Neo4j user replication tools")
+    parser.add_argument("command", choices=["reconcile", "drain", "stats"])
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--repair-from", choices=["mongo", "neo4j"],
+                        help="Queue outbox entries that copy differing users from this store to the other")
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,137 @@
+import heapq
+import math
+import time
+from typing import Dict, List, Optional
+from backend.app.config import settings
+from backend.app.services import availability_service, neo4j_service
+
+# Greedy weighted set cover for /neo4j/form_team.
+#
+# Required skills are bits of an int, and each candidate is the mask of the
+# required skills they have. Candidates with the same mask are interchangeable
+# for coverage, so only the best of each mask (most experienced) is kept; the
+# pool is then at most one entry per distinct skill combination. Each pick
+# maximizes (weight of newly covered skills) * (1 + TEAM_EXPERIENCE_WEIGHT *
+# experience), where a skill weighs more the fewer candidates have it, so rare
+# skills are secured first. Gains only shrink as skills get covered, which
+# allows lazy evaluation from a heap (CELF): most candidates are never
+# re-scored. The search stops when every skill is covered, the team is full,
+# or the time budget is spent, in which case the team picked so far is
+# returned and flagged as truncated.
+
+
+def _bits(mask: int):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _rank(candidate: dict) -> tuple:
+    return -(candidate.get("experience") or 0), candidate["username"]
+
+
+def select_team(candidates: List[dict], skills: List[str], team_size: int, budget_seconds: float) -> dict:
+    started = time.perf_counter()
+    deadline = started + budget_seconds
+    skills = list(dict.fromkeys(skills))
+    bit_of = {skill: i for i, skill in enumerate(skills)}
+    required = (1 << len(skills)) - 1
+
+    best_by_mask: Dict[int, dict] = {}
+    holders = [0] * len(skills)
+    for candidate in candidates:
+        mask = 0
+        for skill in candidate.get("skills") or []:
+            i = bit_of.get(skill)
+            if i is not None and not mask >> i & 1:
+                mask |= 1 << i
+                holders[i] += 1
+        if not mask:
+            continue
+        best = best_by_mask.get(mask)
+        if best is None or _rank(candidate) < _rank(best):
+            best_by_mask[mask] = candidate
+
+    available = 0
+    for mask in best_by_mask:
+        available |= mask
+    pool = sum(holders) or 1
+    weight = [1 + math.log(pool / count) if count else 0.0 for count in holders]
+    # Summed weights of every byte of the mask, so scoring a candidate is one
+    # lookup per 8 skills instead of one per bit.
+    tables = []
+    for offset in range(0, len(skills), 8):
+        chunk = weight[offset:offset + 8] + [0.0] * 8
+        table = [0.0] * 256
+        for byte in range(1, 256):
+            low = byte & -byte
+            table[byte] = table[byte ^ low] + chunk[low.bit_length() - 1]
+        tables.append(table)
+    experience_weight = settings.TEAM_EXPERIENCE_WEIGHT
+
+    def gain(mask: int, uncovered: int, experience: int) -> float:
+        mask &= uncovered
+        total = 0.0
+        for table in tables:
+            if mask:
+                total += table[mask & 255]
+                mask >>= 8
+        return total * (1 + experience_weight * experience)
+
+    entries = list(best_by_mask.items())
+    heap = [(-gain(mask, required, c.get("experience") or 0), c["username"], n) for n, (mask, c) in enumerate(entries)]
+    heapq.heapify(heap)
+
+    uncovered = required & available
+    team = []
+    truncated = False
+    evaluations = 0
+    while heap and uncovered and len(team) < team_size:
+        # The first pick is always made, so a budget spent on building the
+        # pool still returns someone.
+        if team and time.perf_counter() > deadline:
+            truncated = True
+            break
+        _, username, n = heapq.heappop(heap)
+        mask, candidate = entries[n]
+        current = gain(mask, uncovered, candidate.get("experience") or 0)
+        evaluations += 1
+        if current <= 0:
+            continue
+        if heap and -heap[0][0] > current:
+            # Stale score: re-queue with the current gain and look again.
+            heapq.heappush(heap, (-current, username, n))
+            continue
+        team.append({
+            **candidate,
+            "covers": [skills[i] for i in _bits(mask & uncovered)],
+        })
+        uncovered &= ~mask
+
+    covered = required & ~uncovered & available
+    return {
+        "team": team,
+        "covered_skills": [skills[i] for i in _bits(covered)],
+        "uncovered_skills": [skills[i] for i in _bits(required & ~covered)],
+        # Skills no available candidate has, as opposed to ones left over
+        # because the team is full or time ran out.
+        "unavailable_skills": [skills[i] for i in _bits(required & ~available)],
+        "coverage": round(bin(covered).count("1") / len(skills), 4) if skills else 1.0,
+        "candidates": len(candidates),
+        "distinct_profiles": len(entries),
+        "evaluations": evaluations,
+        "truncated": truncated,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+async def form_team(skills: List[str], team_size: int, min_experience: int,
+                    time_budget_ms: Optional[float] = None) -> dict:
+    skills = list(dict.fromkeys(skill.strip() for skill in skills if skill.strip()))
+    if not skills:
+        raise ValueError("At least one skill is required")
+    candidates = await neo4j_service.find_team_candidates(skills, min_experience, settings.TEAM_CANDIDATES_PER_SKILL)
+    candidates = await availability_service.overlay(candidates, True)
+    budget_ms = time_budget_ms or settings.TEAM_TIME_BUDGET_MS
+    return select_team(candidates, skills, team_size, budget_ms / 1000)
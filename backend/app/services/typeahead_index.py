@@ -0,0 +1,260 @@
+import asyncio
+import heapq
+import logging
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.app.config import settings
+from backend.app.services import neo4j_service
+from backend.app.services.mongodb_service import iter_user_batches
+from backend.app.services.user_events import subscribe
+
+logger = logging.getLogger(__name__)
+
+# In-process typeahead over skill, interest and role names and user display
+# names, ranked by how many users have each term.
+#
+# Per kind, terms are kept in a list sorted by their normalized (casefolded)
+# form, so a prefix is a bisect to a contiguous range. Narrow ranges are ranked
+# on the fly; wide ranges (more than TYPEAHEAD_RANGE_SCAN_LIMIT terms, i.e. the
+# first one or two keystrokes) have their top TYPEAHEAD_MAX_LIMIT terms cached
+# and patched in place when a count changes. The index remembers which terms
+# each user contributed, so applying the same user twice changes nothing and
+# edits only move the difference.
+KINDS = {"skill": "skills", "interest": "interests", "role": "role", "name": "name"}
+_LAST_CHAR = "\U0010ffff"
+
+
+def normalize(term: str) -> str:
+    return " ".join(term.split()).casefold()
+
+
+def _user_terms(user: dict, field: str) -> Optional[Tuple[str, ...]]:
+    # None when the document does not carry the field (partial events).
+    if field not in user:
+        return None
+    value = user[field]
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return tuple(sorted({v.strip() for v in values if isinstance(v, str) and v.strip()}))
+
+
+class _TermSet:
+    def __init__(self, max_limit: int, range_scan_limit: int):
+        self.max_limit = max_limit
+        self.range_scan_limit = range_scan_limit
+        self.counts: Dict[str, int] = {}
+        # Parallel lists sorted by (normalized, term).
+        self._norms: List[str] = []
+        self._terms: List[str] = []
+        # prefix -> exact top entries of its range, as (-count, norm, term)
+        self._top: Dict[str, List[Tuple[int, str, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        return bisect_left(self._norms, prefix), bisect_right(self._norms, prefix + _LAST_CHAR)
+
+    def change(self, term: str, delta: int):
+        old = self.counts.get(term, 0)
+        new = old + delta
+        norm = normalize(term)
+        if old == 0 and new > 0:
+            at = self._position(norm, term)
+            self._norms.insert(at, norm)
+            self._terms.insert(at, term)
+        elif old > 0 and new <= 0:
+            at = self._position(norm, term)
+            del self._norms[at]
+            del self._terms[at]
+        if new > 0:
+            self.counts[term] = new
+        else:
+            self.counts.pop(term, None)
+        for length in range(len(norm) + 1):
+            prefix = norm[:length]
+            if prefix in self._top:
+                self._patch_top(prefix, norm, term, max(new, 0), delta)
+
+    def _position(self, norm: str, term: str) -> int:
+        lo, hi = bisect_left(self._norms, norm), bisect_right(self._norms, norm)
+        while lo < hi and self._terms[lo] < term:
+            lo += 1
+        return lo
+
+    def _patch_top(self, prefix: str, norm: str, term: str, count: int, delta: int):
+        # Cached lists hold the exact top entries of their range, up to twice
+        # max_limit deep so that a few decrements can be absorbed by dropping
+        # entries instead of rescanning the range.
+        top = self._top[prefix]
+        lo, hi = self._range(prefix)
+        current = next((i for i, entry in enumerate(top) if entry[2] == term), None)
+        entry = (-count, norm, term)
+        if current is None:
+            outside = (hi - lo) - len(top) - (1 if count > 0 else 0)
+            if count > 0 and ((top and entry < top[-1]) or (outside == 0 and len(top) < 2 * self.max_limit)):
+                top.append(entry)
+                top.sort()
+                del top[2 * self.max_limit:]
+            return
+        del top[current]
+        outside = (hi - lo) - len(top) - (1 if count > 0 else 0)
+        if count > 0 and (outside == 0 or not top or entry <= top[-1]):
+            top.append(entry)
+            top.sort()
+        if len(top) < self.max_limit and hi - lo > len(top):
+            # Too shallow to answer a full query; rebuilt on the next search.
+            del self._top[prefix]
+
+    def _rank(self, lo: int, hi: int, limit: int) -> List[Tuple[int, str, str]]:
+        return heapq.nsmallest(
+            limit, ((-self.counts[self._terms[i]], self._norms[i], self._terms[i]) for i in range(lo, hi))
+        )
+
+    def search(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        lo, hi = self._range(prefix)
+        if hi - lo <= self.range_scan_limit or limit > self.max_limit:
+            entries = self._rank(lo, hi, limit)
+        else:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._top[prefix] = self._rank(lo, hi, 2 * self.max_limit)
+            entries = top[:limit]
+        return [(term, -negative) for negative, _, term in entries]
+
+    def warm(self, max_prefix_length: int = 2):
+        # Caches the wide short prefixes up front so first keystrokes are fast.
+        for norm in set(n[:length] for n in self._norms for length in range(1, max_prefix_length + 1)):
+            lo, hi = self._range(norm)
+            if hi - lo > self.range_scan_limit and norm not in self._top:
+                self._top[norm] = self._rank(lo, hi, 2 * self.max_limit)
+
+    def bulk_load(self, counts: Dict[str, int]):
+        self.counts = {term: count for term, count in counts.items() if count > 0}
+        pairs = sorted((normalize(term), term) for term in self.counts)
+        self._norms = [norm for norm, _ in pairs]
+        self._terms = [term for _, term in pairs]
+        self._top = {}
+
+    def cached_prefixes(self) -> int:
+        return len(self._top)
+
+
+class TypeaheadIndex:
+    def __init__(self, max_limit: Optional[int] = None, range_scan_limit: Optional[int] = None):
+        max_limit = max_limit or settings.TYPEAHEAD_MAX_LIMIT
+        range_scan_limit = range_scan_limit or settings.TYPEAHEAD_RANGE_SCAN_LIMIT
+        self._sets = {kind: _TermSet(max_limit, range_scan_limit) for kind in KINDS}
+        # username -> kind -> terms that user contributed
+        self._contributions: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+
+    def upsert(self, user: dict):
+        username = user.get("username")
+        if not username:
+            return
+        contributed = self._contributions.setdefault(username, {})
+        for kind, field in KINDS.items():
+            terms = _user_terms(user, field)
+            if terms is None:
+                continue
+            previous = contributed.get(kind, ())
+            if terms == previous:
+                continue
+            term_set = self._sets[kind]
+            for term in set(previous) - set(terms):
+                term_set.change(term, -1)
+            for term in set(terms) - set(previous):
+                term_set.change(term, 1)
+            contributed[kind] = terms
+
+    def load(self, users: Iterable[dict]):
+        # Initial build: counts first, then one sort per kind.
+        counts: Dict[str, Dict[str, int]] = {kind: {} for kind in KINDS}
+        for user in users:
+            username = user.get("username")
+            if not username:
+                continue
+            contributed = self._contributions.setdefault(username, {})
+            for kind, field in KINDS.items():
+                terms = _user_terms(user, field) or ()
+                contributed[kind] = terms
+                for term in terms:
+                    counts[kind][term] = counts[kind].get(term, 0) + 1
+        for kind, term_set in self._sets.items():
+            term_set.bulk_load(counts[kind])
+            term_set.warm()
+
+    def search(self, kind: str, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        return [{"term": term, "count": count} for term, count in self._sets[kind].search(prefix, limit)]
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._contributions),
+            **{f"{kind}_terms": len(term_set) for kind, term_set in self._sets.items()},
+            "cached_prefixes": sum(term_set.cached_prefixes() for term_set in self._sets.values()),
+        }
+
+
+# Per worker, like the matching index: writes served by other workers show up
+# at the next rebuild, every TYPEAHEAD_REFRESH_SECONDS.
+_index: Optional[TypeaheadIndex] = None
+# One buffer per rebuild in progress (see matching_index).
+_pending: List[List[dict]] = []
+
+
+def get_index() -> Optional[TypeaheadIndex]:
+    return _index
+
+
+async def rebuild(db=None, source: Optional[str] = None, batch_size: int = 5000) -> int:
+    # Same swap-in as the matching index: writes that arrive during the build
+    # are replayed on the new index before it replaces the old one.
+    global _index
+    source = source or settings.TYPEAHEAD_SOURCE
+    started = time.perf_counter()
+    pending: List[dict] = []
+    _pending.append(pending)
+    index = TypeaheadIndex()
+    try:
+        users: List[dict] = []
+        if source == "mongo":
+            batches = iter_user_batches(db, batch_size)
+        else:
+            batches = neo4j_service.iter_user_profiles(batch_size)
+        async for batch in batches:
+            users.extend({field: user.get(field) for field in ("username", *KINDS.values())} for user in batch)
+            await asyncio.sleep(0)
+        index.load(users)
+        for user in pending:
+            index.upsert(user)
+        _index = index
+    finally:
+        _pending.remove(pending)
+    logger.info("Typeahead index loaded %d users from %s in %.2fs", len(users), source, time.perf_counter() - started)
+    return len(users)
+
+
+async def run_index_refresher(db):
+    # Long-running task started by the app lifespan: loads the index, then
+    # rebuilds it every TYPEAHEAD_REFRESH_SECONDS.
+    while True:
+        try:
+            await rebuild(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Typeahead index rebuild failed")
+        if settings.TYPEAHEAD_REFRESH_SECONDS <= 0:
+            return
+        await asyncio.sleep(settings.TYPEAHEAD_REFRESH_SECONDS)
+
+
+@subscribe
+async def _on_user_change(source: str, old: Optional[dict], new: dict):
+    if _index is not None:
+        _index.upsert(new)
+    for pending in _pending:
+        pending.append(new)
@@ -0,0 +1,29 @@
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# In-process notifications for user writes, so derived state (indexes, caches,
+# replication) can follow every store without the routes knowing about it.
+#
+# Handlers receive (source, old, new): source is the store that was written
+# ("mongo", "neo4j", "bulk" when both were, or "redis" for an availability
+# toggle not yet flushed to either), old is the previous document if known,
+# and new is the written document. new may be partial, e.g. only username and
+# availability for an availability toggle.
+UserEventHandler = Callable[[str, Optional[dict], dict], Awaitable[None]]
+
+_handlers: List[UserEventHandler] = []
+
+
+def subscribe(handler: UserEventHandler) -> UserEventHandler:
+    _handlers.append(handler)
+    return handler
+
+
+async def publish_user_change(source: str, old: Optional[dict], new: dict):
+    for handler in _handlers:
+        try:
+            await handler(source, old, new)
+        except Exception:
+            logger.exception("User event handler %s failed for %s", handler.__name__, new.get("username"))
@@ -0,0 +1,251 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+import uuid
+from typing import Iterable, List, Optional, Tuple
+from backend.app.config import settings
+from backend.app.config.db.redis_conn import get_redis_client
+from backend.app.services import neo4j_service
+from backend.app.services.local_cache import LocalCache
+from backend.app.services.user_events import subscribe
+
+logger = logging.getLogger(__name__)
+
+# Bloom filter of every known username, stored as a Redis bitmap.
+#
+# Existence checks (login, signup, add_member) ask the filter first: a
+# "definitely not there" answer skips the database, a "maybe" falls through to
+# the real lookup. Usernames are added on every user create (through user
+# events) and the whole filter is rebuilt from Mongo and Neo4j at startup when
+# missing, or on demand. The size is fixed by USERNAME_FILTER_CAPACITY and
+# USERNAME_FILTER_ERROR_RATE; the parameters are stored next to the bitmap and
+# checked on every lookup, so a worker with other settings, a filter being
+# built, or any Redis error all answer "maybe" and never reject a real user.
+#
+# A rebuild fills a bitmap in memory, writes it under a temporary key and
+# RENAMEs it over the live one. Adds also go to a short-lived journal set, and
+# names journaled while the rebuild was scanning are re-applied after the
+# rename, so users created during a rebuild are not lost.
+#
+# A Bloom filter only grows, so a "maybe" stays a "maybe" until a rebuild drops
+# deleted users. Those answers are kept in-process for a few minutes and known
+# users, who are most of the lookups, skip the Redis round trip entirely; only
+# names not seen recently pay for it before the database lookup.
+FILTER_KEY = "usernames:bloom"
+META_KEY = "usernames:bloom:meta"
+JOURNAL_KEY = "usernames:bloom:journal"
+REBUILD_LOCK_KEY = "usernames:bloom:rebuilding"
+JOURNAL_TTL_SECONDS = 3600
+REBUILD_LOCK_SECONDS = 600
+
+_stats = {"checks": 0, "definite_negatives": 0, "possible_hits": 0, "false_positives": 0, "bypassed": 0, "local_hits": 0}
+_known = LocalCache(settings.USERNAME_FILTER_LOCAL_MAX_BYTES, settings.USERNAME_FILTER_LOCAL_TTL_SECONDS)
+
+
+def is_enabled() -> bool:
+    return settings.USERNAME_FILTER_ENABLED
+
+
+def filter_params(capacity: Optional[int] = None, error_rate: Optional[float] = None) -> Tuple[int, int]:
+    # Optimal bit count m and hash count k for n items at false-positive rate p.
+    n = max(1, capacity or settings.USERNAME_FILTER_CAPACITY)
+    p = error_rate or settings.USERNAME_FILTER_ERROR_RATE
+    m = max(8, math.ceil(-n * math.log(p) / math.log(2) ** 2))
+    k = max(1, round(m / n * math.log(2)))
+    return m, k
+
+
+def _params_tag(m: int, k: int) -> str:
+    return f"{m}:{k}"
+
+
+def _positions(username: str, m: int, k: int) -> List[int]:
+    # Double hashing (Kirsch-Mitzenmacher) over one 128-bit digest.
+    digest = hashlib.blake2b(username.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % m for i in range(k)]
+
+
+async def might_contain(username: str) -> bool:
+    # False only when the username is certainly unknown.
+    if not is_enabled() or not username:
+        return True
+    _stats["checks"] += 1
+    if _known.get(username):
+        _stats["local_hits"] += 1
+        return True
+    m, k = filter_params()
+    try:
+        async with get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.hget(META_KEY, "params")
+            for position in _positions(username, m, k):
+                pipe.getbit(FILTER_KEY, position)
+            params, *bits = await pipe.execute()
+    except Exception:
+        logger.warning("Username filter lookup failed", exc_info=True)
+        _stats["bypassed"] += 1
+        return True
+    if params is None or params.decode() != _params_tag(m, k):
+        # Not built yet, being built, or built with other settings.
+        _stats["bypassed"] += 1
+        return True
+    if all(bits):
+        _stats["possible_hits"] += 1
+        _known.set(username, True, len(username))
+        return True
+    _stats["definite_negatives"] += 1
+    return False
+
+
+def record_false_positive():
+    # Called by callers when a "maybe" turned out to be absent in the database.
+    _stats["false_positives"] += 1
+
+
+async def add(usernames: Iterable[str]):
+    usernames = [name for name in usernames if name]
+    if not usernames:
+        return
+    m, k = filter_params()
+    async with get_redis_client().pipeline(transaction=True) as pipe:
+        for username in usernames:
+            for position in _positions(username, m, k):
+                pipe.setbit(FILTER_KEY, position, 1)
+        pipe.sadd(JOURNAL_KEY, *usernames)
+        pipe.expire(JOURNAL_KEY, JOURNAL_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def _iter_all_usernames(db):
+    # Users can exist in only one of the stores, so both are scanned.
+    batch: List[str] = []
+    async for doc in db["users"].find({}, {"_id": 0, "username": 1}).batch_size(10000):
+        if doc.get("username"):
+            batch.append(doc["username"])
+        if len(batch) >= 10000:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+    async for usernames in neo4j_service.iter_usernames():
+        yield usernames
+
+
+async def rebuild(db) -> Optional[dict]:
+    # Returns None when another worker is already rebuilding.
+    redis_client = get_redis_client()
+    if not await redis_client.set(REBUILD_LOCK_KEY, "1", nx=True, ex=REBUILD_LOCK_SECONDS):
+        return None
+    started = time.perf_counter()
+    temp_key = f"{FILTER_KEY}:tmp:{uuid.uuid4().hex}"
+    try:
+        # Names added from here on are re-applied after the rename.
+        await redis_client.delete(JOURNAL_KEY)
+        m, k = filter_params()
+        bits = bytearray((m + 7) // 8)
+        scanned = 0
+        async for usernames in _iter_all_usernames(db):
+            for username in usernames:
+                for position in _positions(username, m, k):
+                    # Redis bitmaps number bits from the most significant one.
+                    bits[position >> 3] |= 0x80 >> (position & 7)
+            scanned += len(usernames)
+        await redis_client.set(temp_key, bytes(bits))
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.rename(temp_key, FILTER_KEY)
+            pipe.hset(META_KEY, mapping={"params": _params_tag(m, k), "built_at": time.time(), "scanned": scanned})
+            pipe.smembers(JOURNAL_KEY)
+            _, _, journaled = await pipe.execute()
+        await add(name.decode() for name in journaled)
+        # Deleted users are gone from the new filter; other workers catch up
+        # within USERNAME_FILTER_LOCAL_TTL_SECONDS.
+        _known.clear()
+    finally:
+        await redis_client.delete(temp_key, REBUILD_LOCK_KEY)
+    seconds = time.perf_counter() - started
+    logger.info("Rebuilt username filter from %d usernames in %.2fs", scanned, seconds)
+    return {"scanned": scanned, "journaled": len(journaled), "bits": m, "hashes": k, "seconds": round(seconds, 3)}
+
+
+async def ensure_built(db):
+    # Startup: rebuild only when the stored filter is missing or was built with
+    # other parameters.
+    params = await get_redis_client().hget(META_KEY, "params")
+    if params is None or params.decode() != _params_tag(*filter_params()):
+        await rebuild(db)
+
+
+async def report() -> dict:
+    # Expected false-positive rate from the bitmap fill, and the rate observed
+    # by this worker: false positives over all lookups of absent usernames.
+    m, k = filter_params()
+    redis_client = get_redis_client()
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hgetall(META_KEY)
+        pipe.bitcount(FILTER_KEY)
+        pipe.exists(REBUILD_LOCK_KEY)
+        meta, bits_set, rebuilding = await pipe.execute()
+    meta = {key.decode(): value.decode() for key, value in meta.items()}
+    fill = bits_set / m
+    estimated_items = round(-m / k * math.log(1 - fill)) if fill < 1 else None
+    negatives = _stats["definite_negatives"] + _stats["false_positives"]
+    return {
+        "enabled": is_enabled(),
+        "ready": meta.get("params") == _params_tag(m, k),
+        "rebuilding": bool(rebuilding),
+        "bits": m,
+        "hashes": k,
+        "bytes": (m + 7) // 8,
+        "capacity": settings.USERNAME_FILTER_CAPACITY,
+        "target_error_rate": settings.USERNAME_FILTER_ERROR_RATE,
+        "bits_set": bits_set,
+        "fill_ratio": round(fill, 6),
+        "estimated_items": estimated_items,
+        "estimated_error_rate": round(fill ** k, 6),
+        "observed_error_rate": round(_stats["false_positives"] / negatives, 6) if negatives else None,
+        "built_at": float(meta["built_at"]) if "built_at" in meta else None,
+        "scanned_at_build": int(meta["scanned"]) if "scanned" in meta else None,
+        **_stats,
+    }
+
+
+@subscribe
+async def _on_user_change(source: str, old: Optional[dict], new: dict):
+    # Creates are the events without a previous document. Re-adding an existing
+    # name is harmless, so partial events (availability) need no special case.
+    if not is_enabled() or old is not None or source == "redis" or not new.get("username"):
+        return
+    try:
+        await add([new["username"]])
+    except Exception:
+        # A missed add would make the filter reject a real user; switch it off
+        # until the next rebuild instead.
+        logger.exception("Could not add %s to the username filter, disabling it", new["username"])
+        await get_redis_client().delete(META_KEY)
+
+
+async def _main(args):
+    from fastapi import FastAPI
+    from backend.app.config.db import resources
+
+    app = FastAPI()
+    async with resources.lifespan(app, warmup=False):
+        if args.command == "rebuild":
+            result = await rebuild(app.state.mongodb)
+            if result is None:
+                result = {"message": "A rebuild is already running"}
+        else:
+            result = await report()
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Username Bloom filter")
+    parser.add_argument("command", choices=["rebuild", "report"])
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,41 @@
+import random
+from typing import List
+from bson import ObjectId
+
+# Synthetic users and organizations shared by the benchmarks. Generation is
+# seeded, so the same size always produces the same dataset.
+
+SKILLS = ["python", "java", "go", "rust", "sql", "react", "docker", "k8s", "ml", "spark",
+          "scala", "swift", "kotlin", "c++", "terraform", "graphql"]
+INTERESTS = ["ai", "web", "data", "devops", "security", "mobile", "games", "cloud", "iot", "fintech"]
+ROLES = ["developer", "designer", "manager", "analyst"]
+
+
+def make_users(count: int, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    return [{
+        "_id": ObjectId(),
+        "username": f"user{i}",
+        "name": f"User {i}",
+        "number": f"555-{i:07d}",
+        "email": f"user{i}@example.com",
+        "role": rng.choice(ROLES),
+        "skills": rng.sample(SKILLS, rng.randint(1, 4)),
+        "interests": rng.sample(INTERESTS, rng.randint(1, 3)),
+        "experience": rng.randint(0, 20),
+        "organization": f"org{rng.randint(0, 50)}",
+        "availability": rng.random() < 0.5,
+    } for i in range(count)]
+
+
+def make_orgs(usernames: List[str], org_size: int = 50, seed: int = 0) -> List[dict]:
+    rng = random.Random(seed)
+    orgs = []
+    for i in range(max(1, len(usernames) // org_size)):
+        orgs.append({
+            "_id": ObjectId(),
+            "name": f"Org {i}",
+            "description": None,
+            "members": rng.sample(usernames, min(org_size, len(usernames))),
+        })
+    return orgs
@@ -0,0 +1,299 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Endpoint latency benchmarks that run without any database server.
+#
+# The app is driven in-process through httpx's ASGI transport. Mongo is
+# mongomock-motor (or a real mongod with --mongo-uri), Redis is fakeredis (or
+# --redis-url), and Neo4j is the in-memory stub in neo4j_stub. Every endpoint
+# is measured twice: cold, with Redis and the L1 cache flushed before each
+# request, and warm, after one priming pass over the same requests. Results
+# are written to results/<commit>-<users>u.json so runs can be compared:
+#
+#   python -m backend.benchmarks.harness run --users 1000 --requests 500 --concurrency 16
+#   python -m backend.benchmarks.harness compare results/abc123-1000u.json results/def456-1000u.json
+#
+# mongomock evaluates queries in Python, so 100k+ user runs are slow to seed
+# and measure mostly mongomock; use --mongo-uri against a local mongod there.
+
+RESULTS_DIR = Path(__file__).parent / "results"
+ROLES = ["developer", "designer", "manager", "analyst"]
+
+
+def _require(module: str, package: str):
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError:
+        raise SystemExit(f"The benchmarks need {package}, a dev dependency: poetry install --with dev")
+
+
+class Environment:
+    # Seeds the stand-in stores and attaches them to the app through the
+    # resource manager, in place of the real lifespan.
+
+    def __init__(self, users: int, mongo_uri: Optional[str], redis_url: Optional[str], neo4j_latency_ms: float):
+        self.user_count = users
+        self.mongo_uri = mongo_uri
+        self.redis_url = redis_url
+        self.neo4j_latency_ms = neo4j_latency_ms
+        self.usernames: List[str] = []
+        self.org_ids: List[str] = []
+        self.db = None
+        self.redis = None
+        self.driver = None
+        self._mongo_client = None
+
+    async def __aenter__(self):
+        from backend.app.config.db import resources
+        from backend.app.config.db.indexes import ensure_mongo_indexes
+        from backend.app.services import availability_service
+        from backend.benchmarks.datasets import make_orgs, make_users
+        from backend.benchmarks.neo4j_stub import StubNeo4jDriver
+        from backend.main import app
+
+        if self.mongo_uri:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            self._mongo_client = AsyncIOMotorClient(self.mongo_uri)
+            self.db = self._mongo_client[f"bench_{int(time.time())}"]
+        else:
+            mongomock_motor = _require("mongomock_motor", "mongomock-motor")
+            self.db = mongomock_motor.AsyncMongoMockClient()["bench"]
+        if self.redis_url:
+            from redis.asyncio import Redis
+            self.redis = Redis.from_url(self.redis_url)
+        else:
+            fakeredis = _require("fakeredis", "fakeredis")
+            self.redis = fakeredis.FakeAsyncRedis()
+
+        users = make_users(self.user_count)
+        self.usernames = [user["username"] for user in users]
+        self.driver = StubNeo4jDriver(users, self.neo4j_latency_ms)
+        resources.attach(app, mongodb=self.db, neo4j=self.driver, redis=self.redis)
+
+        started = time.perf_counter()
+        await ensure_mongo_indexes(self.db)
+        for i in range(0, len(users), 10000):
+            await self.db["users"].insert_many([dict(user) for user in users[i:i + 10000]])
+        orgs = make_orgs(self.usernames)
+        await self.db["organizations"].insert_many(orgs)
+        self.org_ids = [str(org["_id"]) for org in orgs]
+        await self.redis.flushdb()
+        if availability_service.is_enabled():
+            await availability_service.load_availability(self.db)
+        print(f"Seeded {len(users)} users and {len(orgs)} orgs in {time.perf_counter() - started:.1f}s")
+        return self
+
+    async def __aexit__(self, *exc):
+        from backend.app.config.db import resources
+        from backend.main import app
+        resources.detach(app)
+        if self._mongo_client is not None:
+            await self._mongo_client.drop_database(self.db.name)
+            self._mongo_client.close()
+        if self.redis_url:
+            await self.redis.aclose()
+        return False
+
+    async def clear_caches(self):
+        from backend.app.services import redis_service
+        # The availability store is state, not cache: keep it across the flush.
+        availability = await self.redis.hgetall(redis_service.AVAILABILITY_KEY)
+        await self.redis.flushdb()
+        if availability:
+            await self.redis.hset(redis_service.AVAILABILITY_KEY, mapping=availability)
+        redis_service._local_cache.clear()
+
+
+# A request is (method, url, json body). Parameters are drawn from small
+# value sets so the warm phase sees a realistic mix of repeated queries.
+RequestFactory = Callable[[random.Random, Environment], Tuple[str, str, Optional[dict]]]
+
+SCENARIOS: Dict[str, RequestFactory] = {
+    "GET /mongo/filterUsers": lambda rng, env: (
+        "GET",
+        f"/mongo/filterUsers?role={rng.choice(ROLES)}&availability=true&experience_min={rng.choice([0, 5, 10])}",
+        None,
+    ),
+    "GET /mongo/filterUsers/page": lambda rng, env: (
+        "GET", f"/mongo/filterUsers/page?role={rng.choice(ROLES)}&limit=50", None,
+    ),
+    "GET /mongo/getallusers": lambda rng, env: ("GET", "/mongo/getallusers", None),
+    "POST /neo4j/find_matches": lambda rng, env: (
+        "POST", "/neo4j/find_matches",
+        {"role": rng.choice(ROLES + [None]), "skills": rng.sample(["python", "go", "sql", "react", "ml"], 2),
+         "min_experience": rng.choice([0, 5])},
+    ),
+    "POST /neo4j/find_top_matches": lambda rng, env: (
+        "POST", "/neo4j/find_top_matches",
+        {"skills": rng.sample(["python", "go", "sql", "react", "ml"], 2), "interests": [rng.choice(["ai", "web"])],
+         "min_experience": rng.choice([0, 5]), "limit": 20},
+    ),
+    "GET /neo4j/get_user/{username}": lambda rng, env: (
+        "GET", f"/neo4j/get_user/{rng.choice(env.usernames)}", None,
+    ),
+    "POST /neo4j/users/batch": lambda rng, env: (
+        "POST", "/neo4j/users/batch", {"usernames": rng.sample(env.usernames, min(50, len(env.usernames)))},
+    ),
+    "POST /neo4j/form_team": lambda rng, env: (
+        "POST", "/neo4j/form_team",
+        {"skills": rng.sample(["python", "go", "sql", "react", "ml"], 4), "team_size": 3,
+         "min_experience": rng.choice([0, 5])},
+    ),
+    "GET /mongo/orgs/{id}/stats": lambda rng, env: (
+        "GET", f"/mongo/orgs/{rng.choice(env.org_ids[:20])}/stats", None,
+    ),
+    "POST /mongo/orgs/analytics": lambda rng, env: (
+        "POST", "/mongo/orgs/analytics", {"org_ids": rng.sample(env.org_ids[:20], min(5, len(env.org_ids)))},
+    ),
+}
+
+
+def _percentile(quantiles: List[float], p: int) -> float:
+    return quantiles[p - 1] if quantiles else 0.0
+
+
+async def _drive(client, requests: List[tuple], concurrency: int, before_each=None) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    queue: "asyncio.Queue" = asyncio.Queue()
+    for request in requests:
+        queue.put_nowait(request)
+
+    async def worker() -> float:
+        nonlocal errors
+        busy = 0.0
+        while not queue.empty():
+            method, url, body = queue.get_nowait()
+            if before_each is not None:
+                await before_each()
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            await response.aread()
+            latency = time.perf_counter() - started
+            latencies.append(latency)
+            busy += latency
+            if response.status_code >= 400:
+                errors += 1
+        return busy
+
+    started = time.perf_counter()
+    busy = await asyncio.gather(*(worker() for _ in range(concurrency)))
+    # Time spent in before_each (cache flushes) is not part of throughput.
+    elapsed = max(busy) if before_each is not None else time.perf_counter() - started
+    quantiles = statistics.quantiles([l * 1000 for l in latencies], n=100) if len(latencies) > 1 else []
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(_percentile(quantiles, 50), 3),
+        "p95_ms": round(_percentile(quantiles, 95), 3),
+        "p99_ms": round(_percentile(quantiles, 99), 3),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    httpx = _require("httpx", "httpx")
+    from backend.main import app
+
+    scenarios = {name: factory for name, factory in SCENARIOS.items()
+                 if not args.endpoints or any(e in name for e in args.endpoints)}
+    results = []
+    async with Environment(args.users, args.mongo_uri, args.redis_url, args.neo4j_latency_ms) as env:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name, factory in scenarios.items():
+                rng = random.Random(args.seed)
+                requests = [factory(rng, env) for _ in range(args.requests)]
+                for cache in ("cold", "warm"):
+                    await env.clear_caches()
+                    if cache == "warm":
+                        unique = list({(m, u, json.dumps(b, sort_keys=True)): (m, u, b) for m, u, b in requests}.values())
+                        await _drive(client, unique, args.concurrency)
+                        stats = await _drive(client, requests, args.concurrency)
+                    else:
+                        stats = await _drive(client, requests, args.concurrency, before_each=env.clear_caches)
+                    results.append({"endpoint": name, "cache": cache, **stats})
+                    print(f"{name:<32} {cache:<5} {stats['throughput_rps']:>9} rps  p50 {stats['p50_ms']:>9} ms  "
+                          f"p95 {stats['p95_ms']:>9} ms  p99 {stats['p99_ms']:>9} ms  errors {stats['errors']}")
+        if env.driver.unhandled:
+            print(f"Neo4j stub could not answer: {dict(env.driver.unhandled)}")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "users": args.users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mongo": "mongod" if args.mongo_uri else "mongomock",
+            "redis": "redis" if args.redis_url else "fakeredis",
+            "neo4j_latency_ms": args.neo4j_latency_ms,
+        },
+        "results": results,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['meta']['commit']}-{args.users}u.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+    return report
+
+
+def compare(baseline_path: str, candidate_path: str):
+    baseline = json.loads(Path(baseline_path).read_text())
+    candidate = json.loads(Path(candidate_path).read_text())
+    before = {(r["endpoint"], r["cache"]): r for r in baseline["results"]}
+    print(f"{baseline['meta']['commit']} -> {candidate['meta']['commit']}")
+    for row in candidate["results"]:
+        old = before.get((row["endpoint"], row["cache"]))
+        if old is None:
+            continue
+        changes = []
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            change = (row[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            changes.append(f"{metric} {old[metric]} -> {row[metric]} ({change:+.1f}%)")
+        print(f"{row['endpoint']:<32} {row['cache']:<5} " + "  ".join(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline endpoint latency benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Seed a synthetic dataset and measure the endpoints")
+    run_parser.add_argument("--users", type=int, default=1000, help="Dataset size, e.g. 1000, 100000, 1000000")
+    run_parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and cache mode")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--endpoints", nargs="*", help="Only endpoints whose name contains one of these")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--mongo-uri", help="Use this mongod instead of mongomock-motor")
+    run_parser.add_argument("--redis-url", help="Use this Redis instead of fakeredis (it is flushed)")
+    run_parser.add_argument("--neo4j-latency-ms", type=float, default=0.0, help="Simulated Neo4j round trip")
+    run_parser.add_argument("--output", help="Result file (default: results/<commit>-<users>u.json)")
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    args = parser.parse_args()
+    if args.command == "run":
+        asyncio.run(run(args))
+    else:
+        compare(args.baseline, args.candidate)
@@ -0,0 +1,179 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+# In-process stand-in for the Neo4j driver, good enough to drive the read
+# endpoints offline. It only understands the queries of neo4j_service that the
+# benchmarks call, recognized by a marker in the query text, and answers them
+# from an in-memory copy of the users. Anything else returns no records and is
+# counted in unhandled, so a benchmark silently hitting it shows up.
+
+
+class StubRecord(dict):
+    def data(self) -> dict:
+        return dict(self)
+
+
+class StubResult:
+    def __init__(self, records: List[StubRecord]):
+        self._records = records
+
+    async def single(self) -> Optional[StubRecord]:
+        return self._records[0] if self._records else None
+
+    async def consume(self):
+        return None
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self._records:
+            yield record
+
+
+class StubTransaction:
+    def __init__(self, driver: "StubNeo4jDriver"):
+        self._driver = driver
+
+    async def run(self, query: str, params: Optional[dict] = None) -> StubResult:
+        return StubResult(self._driver.answer(query, params or {}))
+
+
+class StubSession:
+    def __init__(self, driver: "StubNeo4jDriver"):
+        self._driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def _execute(self, work, *args, **kwargs):
+        if self._driver.latency_seconds:
+            await asyncio.sleep(self._driver.latency_seconds)
+        return await work(StubTransaction(self._driver), *args, **kwargs)
+
+    execute_read = _execute
+    execute_write = _execute
+
+
+class StubNeo4jDriver:
+    def __init__(self, users: List[dict], latency_ms: float = 0.0):
+        self.latency_seconds = latency_ms / 1000
+        self.unhandled: Dict[str, int] = defaultdict(int)
+        self._users: Dict[str, dict] = {}
+        self._by_skill: Dict[str, List[dict]] = defaultdict(list)
+        for user in users:
+            user = {k: v for k, v in user.items() if k != "_id"}
+            self._users[user["username"]] = user
+            for skill in user.get("skills") or []:
+                self._by_skill[skill].append(user)
+        self._handlers = [
+            ("collect(DISTINCT s.name) as skill_names", self._matching_users),
+            ("AS matched_interests", self._ranked_matches),
+            ("RETURN u.username LIMIT 1", self._user_exists),
+            ("RETURN u.number AS number, u.email AS email", self._contact),
+            ("RETURN u.username AS username, u.number AS number, u.email AS email", self._contacts),
+            ("collect(u)[..$per_skill] AS holders", self._team_candidates),
+            ("SET u += row.props", self._set_properties),
+            ("SET u.availability = $availability", self._set_availability),
+        ]
+
+    def session(self, database: Optional[str] = None) -> StubSession:
+        return StubSession(self)
+
+    async def close(self):
+        pass
+
+    def answer(self, query: str, params: dict) -> List[StubRecord]:
+        for marker, handler in self._handlers:
+            if marker in query:
+                return handler(params)
+        if query.strip().endswith("RETURN u"):
+            names = params["names"] if "names" in params else [params.get("username")]
+            return [StubRecord(u=self._users[name]) for name in names if name in self._users]
+        self.unhandled[" ".join(query.split())[:80]] += 1
+        return []
+
+    @staticmethod
+    def _public(user: dict) -> dict:
+        return {k: user.get(k) for k in ("username", "name", "role", "experience", "availability", "email", "number")}
+
+    def _matching_users(self, p: dict) -> List[StubRecord]:
+        wanted = set(p["skills"])
+        records = []
+        for user in self._users.values():
+            if p["role"] is not None and user["role"] != p["role"]:
+                continue
+            if user["experience"] < p["min_exp"] or not user["availability"]:
+                continue
+            # Users without any of the skills are still returned, with none listed.
+            skills = [s for s in user["skills"] if not wanted or s in wanted]
+            records.append(StubRecord(user={**self._public(user), "skills": skills}))
+        return records
+
+    def _ranked_matches(self, p: dict) -> List[StubRecord]:
+        skills, interests = set(p["skills"]), set(p["interests"])
+        if skills:
+            candidates = {u["username"]: u for s in skills for u in self._by_skill.get(s, [])}.values()
+        else:
+            candidates = self._users.values()
+        rows = []
+        for user in candidates:
+            if p["role"] is not None and user["role"] != p["role"]:
+                continue
+            if user["experience"] < p["min_exp"] or not user["availability"]:
+                continue
+            matched_skills = [s for s in user["skills"] if s in skills]
+            matched_interests = [i for i in user["interests"] if i in interests]
+            score = (len(matched_skills) * p["w_skill"] + len(matched_interests) * p["w_interest"]
+                     + user["experience"] * p["w_experience"])
+            if p["after_score"] is not None and not (
+                score < p["after_score"] or (score == p["after_score"] and user["username"] > p["after_username"])
+            ):
+                continue
+            rows.append({**self._public(user), "skills": matched_skills, "interests": matched_interests,
+                         "score": score})
+        rows.sort(key=lambda row: (-row["score"], row["username"]))
+        return [StubRecord(user=row) for row in rows[:p["limit"]]]
+
+    def _user_exists(self, p: dict) -> List[StubRecord]:
+        user = self._users.get(p["username"])
+        return [StubRecord({"u.username": user["username"]})] if user else []
+
+    def _contact(self, p: dict) -> List[StubRecord]:
+        user = self._users.get(p["username"])
+        return [StubRecord(number=user.get("number"), email=user.get("email"))] if user else []
+
+    def _contacts(self, p: dict) -> List[StubRecord]:
+        return [StubRecord(username=name, number=self._users[name].get("number"), email=self._users[name].get("email"))
+                for name in p["names"] if name in self._users]
+
+    def _team_candidates(self, p: dict) -> List[StubRecord]:
+        wanted = set(p["skills"])
+        pool = {}
+        for skill in p["skills"]:
+            holders = [u for u in self._by_skill.get(skill, []) if u["availability"] and u["experience"] >= p["min_exp"]]
+            holders.sort(key=lambda u: (-u["experience"], u["username"]))
+            for user in holders[:p["per_skill"]]:
+                pool[user["username"]] = user
+        return [StubRecord(user={**self._public(user), "skills": [s for s in user["skills"] if s in wanted]})
+                for user in pool.values()]
+
+    def _set_properties(self, p: dict) -> List[StubRecord]:
+        written = 0
+        for row in p["rows"]:
+            user = self._users.get(row["username"])
+            if user is not None:
+                user.update(row["props"])
+                written += 1
+        return [StubRecord(written=written)]
+
+    def _set_availability(self, p: dict) -> List[StubRecord]:
+        user = self._users.get(p["username"])
+        if user is None:
+            return []
+        user["availability"] = p["availability"]
+        return [StubRecord(u=user)]
@@ -0,0 +1,78 @@
+import argparse
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from backend.app.services.serialization import dumps, loads, orjson
+from backend.benchmarks.datasets import make_users
+
+# Compares the old and new JSON paths of the cached user list endpoints on a
+# synthetic payload:
+#   hit:  old = json.loads(redis value) -> jsonable_encoder -> json.dumps
+#         new = the stored bytes as they are (decoded and re-encoded with
+#               orjson only while availability toggles are pending)
+#   miss: old = str(_id) loop, json.dumps for Redis, then the hit path
+#         new = one dumps() shared by Redis and the response
+#
+#   python -m backend.benchmarks.serialization_bench --users 10000
+
+
+def old_miss(users: list) -> tuple:
+    docs = [dict(doc) for doc in users]
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    stored = json.dumps(docs)
+    return json.dumps(jsonable_encoder(docs)).encode(), stored
+
+
+def old_hit(stored) -> bytes:
+    return json.dumps(jsonable_encoder(json.loads(stored))).encode()
+
+
+def new_miss(users: list) -> bytes:
+    return dumps(users)
+
+
+def new_hit(stored: bytes) -> bytes:
+    return stored
+
+
+def new_hit_decoded(stored: bytes) -> bytes:
+    # Hit while availability toggles are pending: decoded for the overlay.
+    return dumps(loads(stored))
+
+
+def timed(func, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(users: int, repeat: int):
+    docs = make_users(users)
+    _, old_stored = old_miss(docs)
+    new_stored = new_miss(docs)
+    assert loads(new_stored) == json.loads(old_stored)
+
+    results = {
+        "users": users,
+        "encoder": "orjson" if orjson is not None else "json",
+        "payload_bytes": len(new_stored),
+        "miss_old_ms": timed(old_miss, docs, repeat) * 1000,
+        "miss_new_ms": timed(new_miss, docs, repeat) * 1000,
+        "hit_old_ms": timed(old_hit, old_stored, repeat) * 1000,
+        "hit_new_ms": timed(new_hit, new_stored, repeat) * 1000,
+        "hit_new_decoded_ms": timed(new_hit_decoded, new_stored, repeat) * 1000,
+    }
+    results = {k: round(v, 3) if isinstance(v, float) else v for k, v in results.items()}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark for cached user lists")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.users, args.repeat)
@@ -1,13 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from backend.app.routes.neo4j import user as neo4j_user
 from backend.app.routes.mongo import user as mongo_user
 from backend.app.routes.mongo import org as mongo_org
-from backend.app.config.db.mongo_conn import lifespan as mongo_lifespan
+from backend.app.routes import bulk, cache, dev, health, metrics, recommendations, sync, typeahead
+from backend.app.config.db import resources
+from backend.app.config import settings
+from backend.app.services import (
+    availability_service,
+    matching_index,
+    recommendation_service,
+    serialization,
+    slow_query_log,
+    sync_service,
+    typeahead_index,
+    username_filter,
+)
+from backend.app.services.redis_service import run_invalidation_listener
+from backend.app.services.metrics import MetricsMiddleware
 
-app = FastAPI(lifespan=mongo_lifespan)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    serialization.log_encoder()
+    async with resources.lifespan(app):
+        if settings.ENSURE_INDEXES_ON_STARTUP:
+            # The index registry is built from pymongo models, so it is only
+            # imported once the stores are open.
+            from backend.app.config.db.indexes import ensure_mongo_indexes, ensure_neo4j_schema
+
+            await ensure_mongo_indexes(app.state.mongodb)
+            await ensure_neo4j_schema(app.state.neo4j, settings.NEO4J_DATABASE)
+        tasks = [asyncio.create_task(run_invalidation_listener())]
+        if settings.AVAILABILITY_WRITE_BEHIND:
+            await availability_service.load_availability(app.state.mongodb)
+            tasks.append(asyncio.create_task(availability_service.run_availability_flusher(app.state.mongodb)))
+        if settings.MATCHING_INDEX_ENABLED and matching_index.is_available():
+            tasks.append(asyncio.create_task(matching_index.run_index_refresher(app.state.mongodb)))
+        if settings.TYPEAHEAD_ENABLED:
+            tasks.append(asyncio.create_task(typeahead_index.run_index_refresher(app.state.mongodb)))
+        if settings.OUTBOX_ENABLED:
+            tasks.append(asyncio.create_task(sync_service.run_outbox_worker(app.state.mongodb)))
+        if settings.RECOMMENDATIONS_ENABLED:
+            tasks.append(asyncio.create_task(recommendation_service.run_recommendation_worker()))
+        if settings.USERNAME_FILTER_ENABLED:
+            # Lookups answer "maybe" until the filter is built.
+            tasks.append(asyncio.create_task(username_filter.ensure_built(app.state.mongodb)))
+        if settings.SLOW_QUERY_ENABLED:
+            tasks.append(asyncio.create_task(slow_query_log.run_plan_sampler(app.state.mongodb)))
+        yield
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(Exception, asyncio.CancelledError):
+                await task
+
+app = FastAPI(lifespan=lifespan, default_response_class=serialization.FastJSONResponse)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(neo4j_user.router)
 
 app.include_router(mongo_user.router)
 
 app.include_router(mongo_org.router)
+
+app.include_router(cache.router)
+
+app.include_router(bulk.router)
+
+app.include_router(sync.router)
+
+app.include_router(recommendations.router)
+
+app.include_router(typeahead.router)
+
+app.include_router(metrics.router)
+
+app.include_router(health.router)
+
+if settings.DEV_ENDPOINTS_ENABLED:
+    app.include_router(dev.router)
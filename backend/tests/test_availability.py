@@ -0,0 +1,45 @@
+import asyncio
+import httpx
+import pytest
+from backend.app.services.redis_service import set_user_availability
+from backend.main import app
+
+
+def test_filter_users_overlays_unflushed_toggles(db):
+    async def scenario():
+        await db["users"].insert_many([
+            {"username": "ann", "role": "developer", "availability": True},
+            {"username": "bob", "role": "developer", "availability": True},
+            {"username": "cat", "role": "developer", "availability": False},
+        ])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            before = await http.get("/mongo/filterUsers", params={"availability": True})
+            # Toggled in Redis only; the flusher has not persisted them yet.
+            await set_user_availability("bob", False)
+            await set_user_availability("cat", True)
+            after = await http.get("/mongo/filterUsers", params={"availability": True})
+            everyone = await http.get("/mongo/filterUsers")
+        return before.json(), after.json(), everyone.json()
+
+    before, after, everyone = asyncio.run(scenario())
+    assert [user["username"] for user in before] == ["ann", "bob"]
+    # bob is dropped at once; cat only shows up after the flush.
+    assert [user["username"] for user in after] == ["ann"]
+    assert {user["username"]: user["availability"] for user in everyone} == {"ann": True, "bob": False, "cat": True}
+
+
+def test_all_users_overlays_unflushed_toggles(db):
+    async def scenario():
+        await db["users"].insert_many([
+            {"username": "ann", "availability": True},
+            {"username": "bob", "availability": True},
+        ])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            before = await http.get("/mongo/getallusers")
+            await set_user_availability("bob", False)
+            after = await http.get("/mongo/getallusers")
+        return before.json(), after.json()
+
+    before, after = asyncio.run(scenario())
+    assert {user["username"]: user["availability"] for user in before} == {"ann": True, "bob": True}
+    assert {user["username"]: user["availability"] for user in after} == {"ann": True, "bob": False}
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from backend.app.services.batch_loader import DataLoader
+
+
+def _recording(calls, fail=None):
+    async def batch_fn(keys):
+        calls.append(list(keys))
+        await asyncio.sleep(0)
+        if fail is not None:
+            raise fail
+        return {key: key.upper() for key in keys if key != "ghost"}
+    return batch_fn
+
+
+def test_loads_in_one_tick_make_one_batch():
+    calls = []
+    loader = DataLoader(_recording(calls))
+
+    async def scenario():
+        return await asyncio.gather(*(loader.load(key) for key in ["ann", "bob", "ann", "ghost", "cat"]))
+
+    assert asyncio.run(scenario()) == ["ANN", "BOB", "ANN", None, "CAT"]
+    assert calls == [["ann", "bob", "ghost", "cat"]]
+    assert loader.stats() == {"loads": 5, "batches": 1, "keys": 4}
+
+
+def test_loads_from_concurrent_tasks_share_a_batch():
+    calls = []
+    loader = DataLoader(_recording(calls))
+
+    async def handler(key):
+        # A request doing some work of its own before its lookup.
+        await asyncio.sleep(0)
+        return await loader.load(key)
+
+    async def scenario():
+        return await asyncio.gather(*(handler(key) for key in ["bob", "ann", "cat"]))
+
+    assert asyncio.run(scenario()) == ["BOB", "ANN", "CAT"]
+    assert calls == [["bob", "ann", "cat"]]
+
+
+def test_batches_are_split_at_max_batch_size():
+    calls = []
+    loader = DataLoader(_recording(calls), max_batch_size=2)
+
+    async def scenario():
+        return await loader.load_many(["a", "b", "c", "d", "e"])
+
+    assert asyncio.run(scenario()) == ["A", "B", "C", "D", "E"]
+    assert calls == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_key_in_flight_joins_the_running_batch():
+    calls = []
+    loader = DataLoader(_recording(calls))
+
+    async def scenario():
+        first = loader.load("ann")
+        await asyncio.sleep(0)
+        # The batch has been dispatched but has not returned yet.
+        second = loader.load("ann")
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(scenario()) == ["ANN", "ANN"]
+    assert calls == [["ann"]]
+
+
+def test_failing_batch_rejects_every_waiter():
+    calls = []
+    loader = DataLoader(_recording(calls, fail=ConnectionError("neo4j down")))
+
+    async def scenario():
+        waiters = [loader.load(key) for key in ["ann", "bob", "ann"]]
+        # Bounded, so a waiter left hanging fails the test instead of blocking it.
+        results = await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), 1)
+        return results, dict(loader._in_flight), dict(loader._queue)
+
+    results, in_flight, queued = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert calls == [["ann", "bob"]]
+    assert in_flight == {} and queued == {}
+
+
+def test_failure_is_not_cached():
+    calls = []
+    outcomes = [ConnectionError("neo4j down"), None]
+
+    async def flaky(keys):
+        calls.append(list(keys))
+        error = outcomes.pop(0)
+        if error is not None:
+            raise error
+        return {key: key.upper() for key in keys}
+
+    loader = DataLoader(flaky)
+
+    async def scenario():
+        with pytest.raises(ConnectionError):
+            await loader.load("ann")
+        return await loader.load("ann")
+
+    assert asyncio.run(scenario()) == "ANN"
+    assert calls == [["ann"], ["ann"]]
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    calls = []
+    loader = DataLoader(_recording(calls))
+
+    async def scenario():
+        cancelled = asyncio.ensure_future(loader.load("ann"))
+        kept = loader.load("ann")
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await kept
+
+    assert asyncio.run(scenario()) == "ANN"
+    assert calls == [["ann"]]
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from backend.app.services import bulk_import_service, neo4j_service
+
+
+@pytest.fixture
+def stores(redis, monkeypatch):
+    # Mongo with the unique username index, Neo4j and user events recorded.
+    db = AsyncMongoMockClient()["test"]
+    asyncio.run(db["users"].create_index("username", unique=True))
+    graph, events, invalidated = [], [], []
+
+    async def bulk_upsert_users(users):
+        graph.extend(user["username"] for user in users)
+        return len(users)
+
+    async def publish_user_change(source, old, new):
+        events.append((source, new["username"], new["role"]))
+
+    async def invalidate_user_caches(*docs):
+        invalidated.extend(doc["username"] for doc in docs)
+
+    monkeypatch.setattr(neo4j_service, "bulk_upsert_users", bulk_upsert_users)
+    monkeypatch.setattr(bulk_import_service, "publish_user_change", publish_user_change)
+    monkeypatch.setattr(bulk_import_service, "invalidate_user_caches", invalidate_user_caches)
+    return db, graph, events, invalidated
+
+
+def _user(username, role):
+    return {"username": username, "name": username.title(), "number": "", "email": f"{username}@example.com",
+            "role": role, "skills": ["sql"], "experience": 2, "interests": [], "organization": "acme",
+            "availability": True}
+
+
+def _lines(*users):
+    async def chunks():
+        yield "\n".join(json.dumps(_user(name, role)) for name, role in users).encode()
+    return chunks()
+
+
+def _import(db, *users, **kwargs):
+    return asyncio.run(bulk_import_service.import_users(db, _lines(*users), **kwargs))
+
+
+def test_duplicate_rows_are_not_written_anywhere(stores):
+    db, graph, events, invalidated = stores
+    asyncio.run(db["users"].insert_one({"username": "ann", "role": "developer"}))
+
+    report = _import(db, ("ann", "hacker"), ("bob", "designer"), ("bob", "hacker"), ("cat", "developer"))
+
+    assert report["rows"] == 4 and report["valid"] == 4
+    assert report["mongo_inserted"] == 2
+    assert report["neo4j_written"] == 2
+    assert report["neo4j_skipped"] == 2
+    assert report["failed_rows"] == 2
+    assert {(error["row"], error["target"]) for error in report["errors"]} == {(1, "mongo"), (3, "mongo")}
+    # The rejected rows reach neither Neo4j nor the event handlers.
+    assert graph == ["bob", "cat"]
+    assert events == [("bulk", "bob", "designer"), ("bulk", "cat", "developer")]
+    assert invalidated == ["bob", "cat"]
+    assert asyncio.run(db["users"].find_one({"username": "ann"}))["role"] == "developer"
+
+
+def test_failed_neo4j_batch_leaves_mongo_rows_to_the_outbox(stores, monkeypatch):
+    db, graph, events, invalidated = stores
+
+    async def broken(users):
+        raise ConnectionError("neo4j down")
+
+    monkeypatch.setattr(neo4j_service, "bulk_upsert_users", broken)
+    report = _import(db, ("ann", "developer"), ("bob", "designer"))
+
+    assert report["mongo_inserted"] == 2 and report["neo4j_written"] == 0
+    assert report["failed_rows"] == 2
+    assert {error["target"] for error in report["errors"]} == {"neo4j"}
+    # Published as Mongo writes, which the outbox replicates to Neo4j.
+    assert events == [("mongo", "ann", "developer"), ("mongo", "bob", "designer")]
+
+
+def test_chunks_are_written_independently(stores):
+    db, graph, events, invalidated = stores
+    report = _import(db, ("ann", "developer"), ("ann", "hacker"), ("bob", "designer"), ("cat", "developer"),
+                     chunk_size=2)
+
+    assert report["mongo_inserted"] == 3 and report["neo4j_written"] == 3 and report["neo4j_skipped"] == 1
+    assert graph == ["ann", "bob", "cat"]
+    assert [event[1:] for event in events] == [("ann", "developer"), ("bob", "designer"), ("cat", "developer")]
+
+
+def test_single_target_imports(stores):
+    db, graph, events, invalidated = stores
+    asyncio.run(db["users"].insert_one({"username": "ann", "role": "developer"}))
+
+    report = _import(db, ("ann", "hacker"), ("bob", "designer"), targets=["mongo"])
+    assert report["mongo_inserted"] == 1 and report["neo4j_skipped"] == 0 and graph == []
+    assert events == [("mongo", "bob", "designer")]
+    assert invalidated == ["bob"]
+
+    events.clear()
+    # Neo4j on its own upserts every row.
+    report = _import(db, ("ann", "hacker"), ("dan", "designer"), targets=["neo4j"])
+    assert report["neo4j_written"] == 2 and report["failed_rows"] == 0
+    assert graph == ["ann", "dan"]
+    assert events == [("neo4j", "ann", "hacker"), ("neo4j", "dan", "designer")]
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+from mongomock_motor import AsyncMongoMockClient
+from backend.app.config.db.indexes import MONGO_INDEXES, NEO4J_SCHEMA, ensure_mongo_indexes, ensure_neo4j_schema
+
+
+async def _index_names(db, collection):
+    return {info["name"] async for info in db[collection].list_indexes()}
+
+
+def test_mongo_indexes_are_created_once():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await ensure_mongo_indexes(db)
+        # Running again at the next startup is a no-op.
+        await ensure_mongo_indexes(db)
+        return {collection: await _index_names(db, collection) for collection in MONGO_INDEXES}
+
+    names = asyncio.run(scenario())
+    for collection, indexes in MONGO_INDEXES.items():
+        assert {index.document["name"] for index in indexes} <= names[collection]
+
+
+def test_an_index_that_cannot_be_built_is_logged_and_skipped(caplog):
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db["users"].insert_many([{"username": "ann"}, {"username": "ann"}])
+        await ensure_mongo_indexes(db)
+        return await _index_names(db, "users")
+
+    with caplog.at_level(logging.ERROR):
+        names = asyncio.run(scenario())
+    assert "username_unique" not in names
+    assert "role_availability_experience" in names
+    assert "users.username_unique" in caplog.text
+
+
+class RecordingSession:
+    def __init__(self, statements, failing):
+        self.statements = statements
+        self.failing = failing
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, statement):
+        self.statements.append(statement)
+        if statement in self.failing:
+            raise RuntimeError("Unsupported administration command")
+        return self
+
+    async def consume(self):
+        return None
+
+
+class RecordingDriver:
+    def __init__(self, failing=()):
+        self.statements = []
+        self.databases = []
+        self.failing = set(failing)
+
+    def session(self, database=None):
+        self.databases.append(database)
+        return RecordingSession(self.statements, self.failing)
+
+
+def test_neo4j_schema_keeps_going_past_a_failed_statement(caplog):
+    failing = NEO4J_SCHEMA["skill_name_unique"]
+    driver = RecordingDriver(failing=[failing])
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(ensure_neo4j_schema(driver, "graph"))
+    assert driver.statements == list(NEO4J_SCHEMA.values())
+    assert driver.databases == ["graph"]
+    assert "skill_name_unique" in caplog.text
@@ -0,0 +1,92 @@
+import pytest
+from backend.app.services import local_cache
+from backend.app.services.local_cache import LocalCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(local_cache, "time", clock)
+    return clock
+
+
+def test_entry_expires_after_its_ttl(clock):
+    cache = LocalCache(max_bytes=100, max_ttl_seconds=60)
+    cache.set("a", "A", size=1, ttl_seconds=5)
+    clock.now += 4.9
+    assert cache.get("a") == "A"
+    clock.now += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.size_bytes == 0
+
+
+def test_ttl_is_capped_by_max_ttl(clock):
+    cache = LocalCache(max_bytes=100, max_ttl_seconds=2)
+    cache.set("a", "A", size=1, ttl_seconds=3600)
+    cache.set("b", "B", size=1)
+    clock.now += 2
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+
+
+def test_non_positive_ttl_is_not_stored(clock):
+    cache = LocalCache(max_bytes=100, max_ttl_seconds=60)
+    cache.set("a", "old", size=1)
+    cache.set("a", "new", size=1, ttl_seconds=0)
+    assert cache.get("a") is None
+
+
+def test_evicts_least_recently_used_first(clock):
+    cache = LocalCache(max_bytes=30, max_ttl_seconds=60)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper(), size=10)
+    # Reading "a" makes "b" the oldest.
+    assert cache.get("a") == "A"
+    cache.set("d", "D", size=10)
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["A", "C", "D"]
+    assert cache.stats()["evictions"] == 1
+
+    # One large entry pushes out as many old ones as it needs.
+    cache.set("e", "E", size=25)
+    assert cache.size_bytes == 25
+    assert [cache.get(key) for key in ("a", "c", "d", "e")] == [None, None, None, "E"]
+
+
+def test_overwrite_replaces_size(clock):
+    cache = LocalCache(max_bytes=30, max_ttl_seconds=60)
+    cache.set("a", "A", size=10)
+    cache.set("a", "AA", size=20)
+    assert cache.size_bytes == 20
+    assert cache.get("a") == "AA"
+
+
+def test_value_larger_than_cache_is_dropped(clock):
+    cache = LocalCache(max_bytes=10, max_ttl_seconds=60)
+    cache.set("a", "old", size=5)
+    cache.set("a", "huge", size=11)
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
+
+
+def test_delete_and_clear(clock):
+    cache = LocalCache(max_bytes=100, max_ttl_seconds=60)
+    cache.set("a", "A", size=10)
+    cache.set("b", "B", size=10)
+    assert cache.delete("a") is True
+    assert cache.delete("a") is False
+    assert cache.get("a") is None
+    assert cache.size_bytes == 10
+    cache.clear()
+    assert cache.get("b") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.size_bytes == 0
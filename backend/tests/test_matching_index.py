@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from backend.app.config.db import neo4j_conn
+from backend.app.services import matching_index, neo4j_service
+from backend.app.services.matching_index import MatchingIndex
+from backend.benchmarks.datasets import make_users
+from backend.benchmarks.neo4j_stub import StubNeo4jDriver
+
+pytest.importorskip("numpy")
+
+# The index must return what find_ranked_matches returns. The benchmark stub
+# answers the ranked Cypher query with a linear scan, so it is the reference.
+
+
+def _build(users):
+    index = MatchingIndex(capacity=4)
+    for user in users:
+        index.upsert(user)
+    return index
+
+
+def _cypher(monkeypatch, users, *args):
+    monkeypatch.setattr(neo4j_conn, "_driver", StubNeo4jDriver(users))
+    return asyncio.run(neo4j_service.find_ranked_matches(*args))
+
+
+def _rows(users):
+    return [(u["username"], u["score"], sorted(u["skills"]), sorted(u["interests"])) for u in users]
+
+
+def _assert_same(monkeypatch, index, users, role, skills, interests, min_exp, limit):
+    expected, expected_cursor = _cypher(monkeypatch, users, role, skills, interests, min_exp, limit)
+    actual, actual_cursor = index.search(role, skills, interests, min_exp, limit)
+    assert _rows(actual) == _rows(expected)
+    assert (actual_cursor is None) == (expected_cursor is None)
+    return actual
+
+
+def _user(username, skills, interests=(), experience=5, role="developer", availability=True):
+    return {"username": username, "name": username, "email": None, "number": None, "role": role,
+            "skills": list(skills), "interests": list(interests), "experience": experience,
+            "availability": availability}
+
+
+def test_search_matches_linear_matcher(monkeypatch):
+    users = make_users(300)
+    index = _build(users)
+    for query in index.sample_queries(40, seed=3):
+        _assert_same(monkeypatch, index, users, query["role"], query["skills"], query["interests"],
+                     query["min_experience"], 15)
+
+
+def test_no_required_skills_ranks_every_available_user(monkeypatch):
+    users = make_users(120)
+    index = _build(users)
+    matches = _assert_same(monkeypatch, index, users, None, [], ["ai", "web"], 0, 200)
+    assert len(matches) == sum(1 for u in users if u["availability"])
+    assert all(m["skills"] == [] for m in matches)
+    _assert_same(monkeypatch, index, users, "designer", [], [], 3, 10)
+
+
+def test_unknown_skill(monkeypatch):
+    users = make_users(120)
+    index = _build(users)
+    assert index.search(None, ["cobol"], [], 0, 10) == ([], None)
+    _assert_same(monkeypatch, index, users, None, ["cobol"], [], 0, 10)
+    # Unknown names alongside known ones only drop out of the match.
+    matches = _assert_same(monkeypatch, index, users, None, ["cobol", "python"], ["knitting"], 0, 50)
+    assert matches and all(m["skills"] == ["python"] for m in matches)
+    assert index.search("astronaut", [], [], 0, 10) == ([], None)
+
+
+def test_patched_user_drops_out(monkeypatch):
+    users = [_user("ann", ["python"], experience=9), _user("bob", ["python", "go"], experience=1),
+             _user("cat", ["go"], experience=4)]
+    index = _build(users)
+    before = _assert_same(monkeypatch, index, users, None, ["python"], [], 0, 10)
+    assert [m["username"] for m in before] == ["ann", "bob"]
+
+    # Partial patches, as sent by user events: availability, then skills.
+    index.upsert({"username": "ann", "availability": False})
+    users[0]["availability"] = False
+    index.upsert({"username": "bob", "skills": ["go"]})
+    users[1]["skills"] = ["go"]
+    assert _assert_same(monkeypatch, index, users, None, ["python"], [], 0, 10) == []
+    after = _assert_same(monkeypatch, index, users, None, ["go"], [], 0, 10)
+    assert [m["username"] for m in after] == ["cat", "bob"]
+
+
+def test_ties_order_by_username_across_pages(monkeypatch):
+    # Same skills and experience: every score ties, so username decides.
+    names = ["eve", "dan", "bea", "fay", "abe", "cal", "gus"]
+    users = [_user(name, ["sql"], ["data"], experience=3) for name in names]
+    users.append(_user("zed", ["sql", "go"], ["data"], experience=3))
+    index = _build(users)
+
+    seen = []
+    index_cursor = cypher_cursor = None
+    while True:
+        page, index_cursor = index.search(None, ["sql", "go"], ["data"], 0, 3, index_cursor)
+        expected, cypher_cursor = _cypher(monkeypatch, users, None, ["sql", "go"], ["data"], 0, 3, cypher_cursor)
+        assert _rows(page) == _rows(expected)
+        assert index_cursor == cypher_cursor
+        seen.extend(m["username"] for m in page)
+        if index_cursor is None:
+            break
+    assert seen == ["zed"] + sorted(names)
+
+
+def test_overlapping_rebuilds_each_replay_writes_made_while_they_ran(monkeypatch):
+    loaded = asyncio.Event()
+    release = asyncio.Event()
+    ann = {"username": "ann", "experience": 3, "availability": True, "skills": ["go"], "interests": []}
+
+    async def batches(db, batch_size):
+        yield [ann]
+        loaded.set()
+        await release.wait()
+
+    monkeypatch.setattr(matching_index, "iter_user_batches", batches)
+    monkeypatch.setattr(matching_index, "_index", None)
+
+    async def scenario():
+        first = asyncio.create_task(matching_index.rebuild(source="mongo"))
+        second = asyncio.create_task(matching_index.rebuild(source="mongo"))
+        await loaded.wait()
+        await asyncio.sleep(0)
+        await matching_index._on_user_change("mongo", None, {**ann, "username": "bob", "experience": 5})
+        release.set()
+        await asyncio.gather(first, second)
+        return matching_index.get_index().search(None, ["go"], [], 0, 10)
+
+    matches, _ = asyncio.run(scenario())
+    assert [user["username"] for user in matches] == ["bob", "ann"]
+    assert matching_index._pending == []
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import httpx
+import pytest
+from backend.app.services import org_stats_service
+from backend.main import app
+
+
+@pytest.mark.parametrize("method, url, kwargs", [
+    ("GET", "/mongo/orgs/not-an-id/avgExp", {}),
+    ("GET", "/mongo/orgs/not-an-id/orgSkillstats", {}),
+    ("GET", "/mongo/orgs/not-an-id/stats", {}),
+    ("GET", "/mongo/orgs/not-an-id/members/profiles", {}),
+    ("GET", "/mongo/orgs/not-an-id/getAllMemebers", {}),
+    ("POST", "/mongo/orgs/not-an-id/addMember", {"json": {"username": "ann"}}),
+    ("POST", "/mongo/orgs/rebuildStats", {"params": {"org_id": "not-an-id"}}),
+    ("POST", "/mongo/orgs/analytics", {"json": {"org_ids": ["64b7f0c2a1b2c3d4e5f60718", "nope"]}}),
+])
+def test_malformed_org_id_is_a_400(api, method, url, kwargs):
+    response = api(method, url, **kwargs)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid organization id"
+
+
+def test_unknown_org_is_a_404(api):
+    assert api("GET", "/mongo/orgs/64b7f0c2a1b2c3d4e5f60718/stats").status_code == 404
+
+
+def _expected_analytics(org, users):
+    team = [users[name] for name in org["members"] if name in users]
+    skills, roles = {}, {}
+    for member in team:
+        for skill in set(member.get("skills") or []):
+            skills[skill] = skills.get(skill, 0) + 1
+        if member.get("role"):
+            roles[member["role"]] = roles.get(member["role"], 0) + 1
+    experience = [member["experience"] for member in team]
+    return {
+        "org_id": str(org["_id"]),
+        "name": org["name"],
+        "member_count": len(team),
+        "average_experience": sum(experience) / len(experience) if experience else 0.0,
+        "availability_ratio": sum(1 for member in team if member["availability"]) / len(team) if team else 0.0,
+        "skills": skills,
+        "roles": roles,
+    }
+
+
+def test_analytics_match_a_direct_count(db):
+    users = {
+        "ann": {"username": "ann", "role": "developer", "experience": 4, "availability": True,
+                "skills": ["go", "sql", "go"]},
+        "bob": {"username": "bob", "role": "developer", "experience": 8, "availability": False, "skills": ["go"]},
+        "cat": {"username": "cat", "experience": 1, "availability": True, "skills": []},
+        "dan": {"username": "dan", "role": "designer", "experience": 6, "availability": True, "skills": ["figma"]},
+    }
+    orgs = [
+        {"name": "core", "members": ["ann", "bob", "cat"]},
+        {"name": "empty", "members": []},
+        {"name": "ghosts", "members": ["nobody", "dan"]},
+    ]
+
+    async def scenario():
+        await db["users"].insert_many([dict(user) for user in users.values()])
+        await db["organizations"].insert_many(orgs)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            ids = [str(org["_id"]) for org in orgs]
+            first = await http.post("/mongo/orgs/analytics", json={"org_ids": ids})
+            # The second read is served from the cache.
+            second = await http.post("/mongo/orgs/analytics", json={"org_ids": ids[::-1]})
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    lines = [json.loads(line) for line in first.text.splitlines()]
+    assert [line["name"] for line in lines] == ["core", "empty", "ghosts"]
+    for line, org in zip(lines, orgs):
+        expected = _expected_analytics(org, users)
+        assert {k: line[k] for k in ("org_id", "name", "member_count", "availability_ratio")} == \
+            {k: expected[k] for k in ("org_id", "name", "member_count", "availability_ratio")}
+        assert line["average_experience"] == pytest.approx(expected["average_experience"])
+        assert {item["skill"]: item["count"] for item in line["skills"]} == expected["skills"]
+        assert {item["role"]: item["count"] for item in line["roles"]} == expected["roles"]
+    assert [json.loads(line) for line in second.text.splitlines()] == lines[::-1]
+
+
+def _create_org(api, name="core"):
+    return api("POST", "/mongo/createNewOrg", json={"name": name}).json()["_id"]
+
+
+def test_add_member_keeps_the_stats_current(db, api):
+    asyncio.run(db["users"].insert_many([
+        {"username": "ann", "experience": 4, "skills": ["go", "sql"]},
+        {"username": "bob", "experience": 8, "skills": ["go"]},
+        # Like $avg, a member without experience is left out of the average.
+        {"username": "cat", "skills": ["go"]},
+    ]))
+    org_id = _create_org(api)
+    for username in ("ann", "bob", "cat", "bob"):
+        response = api("POST", f"/mongo/orgs/{org_id}/addMember", json={"username": username})
+        assert "stats_version" not in response.json()
+
+    stats = api("GET", f"/mongo/orgs/{org_id}/stats").json()
+    assert stats["member_count"] == 3
+    assert stats["average_experience"] == pytest.approx(6.0)
+    assert stats["skills"] == [{"skill": "go", "count": 3}, {"skill": "sql", "count": 1}]
+    stored = asyncio.run(db["org_stats"].find_one({}))
+    assert stored["version"] == 3
+    # Served from the increments, so the same as a rebuild from the members.
+    asyncio.run(org_stats_service.rebuild_org_stats(db))
+    assert api("GET", f"/mongo/orgs/{org_id}/stats").json() == stats
+
+
+def test_average_experience_of_members_without_experience(db, api):
+    asyncio.run(db["users"].insert_one({"username": "cat", "skills": []}))
+    org_id = _create_org(api)
+    assert api("GET", f"/mongo/orgs/{org_id}/avgExp").json() == {"average_experience": 0.0}
+    api("POST", f"/mongo/orgs/{org_id}/addMember", json={"username": "cat"})
+    assert api("GET", f"/mongo/orgs/{org_id}/avgExp").json() == {"average_experience": None}
+
+
+def test_apply_user_change_shifts_every_org_of_the_user(db, api):
+    asyncio.run(db["users"].insert_many([
+        {"username": "ann", "experience": 4, "skills": ["go", "sql"]},
+        {"username": "bob", "experience": 8, "skills": ["go"]},
+    ]))
+    core, other, unrelated = _create_org(api, "core"), _create_org(api, "other"), _create_org(api, "unrelated")
+    for org_id, username in ((core, "ann"), (core, "bob"), (other, "ann"), (unrelated, "bob")):
+        api("POST", f"/mongo/orgs/{org_id}/addMember", json={"username": username})
+
+    response = api("PUT", "/mongo/editProfile", json={
+        "username": "ann", "name": "Ann", "email": "ann@example.com", "number": "1", "role": "developer",
+        "experience": 10, "availability": True, "skills": ["rust", "sql"], "interests": [], "organization": "core",
+    })
+    assert response.status_code == 200
+
+    core_stats = api("GET", f"/mongo/orgs/{core}/stats").json()
+    assert core_stats["average_experience"] == pytest.approx(9.0)
+    assert {item["skill"]: item["count"] for item in core_stats["skills"]} == {"go": 1, "rust": 1, "sql": 1}
+    other_stats = api("GET", f"/mongo/orgs/{other}/stats").json()
+    assert other_stats["average_experience"] == pytest.approx(10.0)
+    assert {item["skill"]: item["count"] for item in other_stats["skills"]} == {"rust": 1, "sql": 1}
+    assert api("GET", f"/mongo/orgs/{unrelated}/stats").json()["average_experience"] == pytest.approx(8.0)
+
+
+def test_rebuild_repairs_drift(db, api):
+    asyncio.run(db["users"].insert_one({"username": "ann", "experience": 4, "skills": ["a.b", "$x"]}))
+    org_id = _create_org(api)
+    api("POST", f"/mongo/orgs/{org_id}/addMember", json={"username": "ann"})
+    asyncio.run(db["org_stats"].update_one({}, {"$inc": {"member_count": 5, "experience_sum": 100}}))
+
+    assert api("POST", "/mongo/orgs/rebuildStats", params={"org_id": org_id}).json() == {"rebuilt": 1}
+    stats = api("GET", f"/mongo/orgs/{org_id}/stats").json()
+    assert stats["member_count"] == 1
+    assert stats["average_experience"] == pytest.approx(4.0)
+    assert sorted(item["skill"] for item in stats["skills"]) == ["$x", "a.b"]
+
+
+def test_a_stale_rebuild_does_not_overwrite_a_newer_increment(db):
+    async def scenario():
+        await db["users"].insert_many([
+            {"username": "ann", "experience": 4, "skills": ["go"]},
+            {"username": "bob", "experience": 8, "skills": ["go"]},
+        ])
+        org_id = (await db["organizations"].insert_one({"name": "core", "members": ["ann"]})).inserted_id
+        # A lazy rebuild reads the org before bob is added...
+        real_aggregate = db["organizations"].aggregate
+        snapshot = [org async for org in real_aggregate([
+            {"$match": {"_id": org_id}},
+            {"$lookup": {"from": "users", "localField": "members", "foreignField": "username", "as": "team"}},
+        ])]
+
+        # ...bob is added (building the stats from the member list)...
+        org = await db["organizations"].find_one_and_update(
+            {"_id": org_id}, {"$push": {"members": "bob"}, "$inc": {"stats_version": 1}}, return_document=True,
+        )
+        await org_stats_service.apply_member_added(db, org_id, {"username": "bob", "experience": 8,
+                                                                "skills": ["go"]}, org["stats_version"])
+
+        # ...and only then does the lazy rebuild write its snapshot.
+        class Snapshot:
+            def __init__(self, docs):
+                self.docs = iter(docs)
+
+            def __aiter__(self):
+                return self
+
+            async def __anext__(self):
+                try:
+                    return next(self.docs)
+                except StopIteration:
+                    raise StopAsyncIteration
+
+        class Organizations:
+            def aggregate(self, pipeline):
+                return Snapshot(snapshot)
+
+        await org_stats_service.rebuild_org_stats({"organizations": Organizations(), "org_stats": db["org_stats"]},
+                                                  [org_id])
+        return await org_stats_service.get_org_stats(db, org_id)
+
+    stats = asyncio.run(scenario())
+    assert stats["member_count"] == 2
+    assert stats["average_experience"] == pytest.approx(6.0)
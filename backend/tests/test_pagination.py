@@ -0,0 +1,130 @@
+import asyncio
+import base64
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from backend.app.config import settings
+from backend.app.config.db import neo4j_conn
+from backend.app.services import neo4j_service
+from backend.app.services.mongodb_service import find_users_page
+from backend.app.services.pagination import decode_cursor, decode_ranked_cursor, encode_cursor
+from backend.benchmarks.neo4j_stub import StubNeo4jDriver
+
+
+def _token(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+BAD_CURSORS = [
+    "not a cursor!",
+    "é",
+    "",
+    _token(b"{not json"),
+    _token(b'["a", "list"]'),
+    _token(b"\xff\xfe"),
+]
+# Well-formed cursors whose contents were edited.
+TAMPERED_RANKED_CURSORS = [
+    encode_cursor({"score": "high", "username": "ann"}),
+    encode_cursor({"score": 10}),
+    encode_cursor({"score": True, "username": "ann"}),
+    _token(b'{"score": NaN, "username": "ann"}'),
+]
+# An empty cursor parameter means the first page.
+BAD_REQUEST_CURSORS = [token for token in BAD_CURSORS if token]
+TAMPERED_PAGE_CURSORS = [
+    encode_cursor({"after": "not-an-object-id"}),
+    encode_cursor({"after": 12}),
+    encode_cursor({"before": "64b7f0c2a1b2c3d4e5f60718"}),
+]
+
+
+def _user(i, experience=3):
+    return {"username": f"user{i:02d}", "name": f"User {i}", "email": None, "number": None,
+            "role": "developer", "skills": ["sql"], "interests": ["data"], "experience": experience,
+            "availability": True}
+
+
+def test_cursor_round_trip():
+    payload = {"score": 12.5, "username": "ann"}
+    assert decode_cursor(encode_cursor(payload)) == payload
+    assert decode_ranked_cursor(encode_cursor(payload)) == payload
+
+
+@pytest.mark.parametrize("token", BAD_CURSORS)
+def test_malformed_cursor_is_a_value_error(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+@pytest.mark.parametrize("token", TAMPERED_RANKED_CURSORS)
+def test_tampered_ranked_cursor_is_a_value_error(token):
+    with pytest.raises(ValueError):
+        decode_ranked_cursor(token)
+
+
+@pytest.fixture
+def neo4j():
+    return StubNeo4jDriver([_user(i) for i in range(5)])
+
+
+@pytest.mark.parametrize("token", BAD_REQUEST_CURSORS + TAMPERED_PAGE_CURSORS)
+def test_bad_page_cursor_is_a_400(api, token):
+    response = api("GET", "/mongo/filterUsers/page", params={"cursor": token})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid page cursor"
+
+
+@pytest.mark.parametrize("token", BAD_REQUEST_CURSORS + TAMPERED_RANKED_CURSORS)
+def test_bad_ranked_cursor_is_a_400(api, token):
+    response = api("POST", "/neo4j/find_top_matches", json={"skills": ["sql"], "cursor": token})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid page cursor"
+
+
+def test_keyset_pages_do_not_repeat_or_skip():
+    # Every user matches the same filter with the same values; _id breaks ties.
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db["users"].insert_many([_user(i) for i in range(23)])
+        seen, cursor = [], None
+        while True:
+            docs, cursor = await find_users_page(db, {"role": "developer", "experience": {"$gte": 3}}, 5, cursor)
+            seen.extend(doc["username"] for doc in docs)
+            if cursor is None:
+                return seen
+
+    assert asyncio.run(scenario()) == [f"user{i:02d}" for i in range(23)]
+
+
+def test_ranked_pages_with_equal_scores_do_not_repeat_or_skip(monkeypatch):
+    users = [_user(i) for i in range(11)] + [_user(i, experience=9) for i in range(11, 14)]
+    monkeypatch.setattr(neo4j_conn, "_driver", StubNeo4jDriver(users))
+
+    async def scenario():
+        seen, cursor = [], None
+        while True:
+            page, cursor = await neo4j_service.find_ranked_matches(None, ["sql"], ["data"], 0, 4, cursor)
+            seen.extend(user["username"] for user in page)
+            if cursor is None:
+                return seen
+
+    expected = [f"user{i:02d}" for i in range(11, 14)] + [f"user{i:02d}" for i in range(11)]
+    assert asyncio.run(scenario()) == expected
+
+
+def test_all_users_are_not_cut_short(db, api):
+    asyncio.run(db["users"].insert_many([_user(i) for i in range(1500)]))
+    response = api("GET", "/mongo/getallusers")
+    assert response.status_code == 200
+    assert len(response.json()) == 1500
+
+
+def test_too_many_users_is_a_400_pointing_to_the_paged_endpoints(db, api, monkeypatch):
+    monkeypatch.setattr(settings, "ALL_USERS_MAX", 10)
+    asyncio.run(db["users"].insert_many([_user(i) for i in range(11)]))
+    response = api("GET", "/mongo/getallusers")
+    assert response.status_code == 400
+    assert "/mongo/filterUsers/page" in response.json()["detail"]
+    # The refusal is not cached.
+    asyncio.run(db["users"].delete_one({"username": "user00"}))
+    assert len(api("GET", "/mongo/getallusers").json()) == 10
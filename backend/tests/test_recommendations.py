@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from backend.app.services import neo4j_service, recommendation_service
+from backend.app.services.recommendation_service import RECOMMENDATION_DIRTY_KEY
+from backend.app.services.redis_service import set_user_availability
+
+
+async def _dirty(redis):
+    return {name.decode() for name in await redis.smembers(RECOMMENDATION_DIRTY_KEY)}
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    # Collaborators the graph would return, per user; users left out are not in the graph.
+    graph = {
+        "ann": [{"username": "bob", "availability": True, "score": 3.0}],
+        "bob": [{"username": "ann", "availability": True, "score": 3.0},
+                {"username": "cat", "availability": True, "score": 1.0},
+                {"username": "dan", "availability": True, "score": 0.5}],
+    }
+    calls = []
+
+    async def compute_recommendations(usernames, top_n):
+        calls.append(sorted(usernames))
+        return {name: graph[name] for name in usernames if name in graph}
+
+    monkeypatch.setattr(neo4j_service, "compute_recommendations", compute_recommendations)
+    return calls
+
+
+def test_only_skill_and_interest_changes_mark_users_dirty(redis):
+    async def scenario():
+        on_change = recommendation_service._on_user_change
+        await on_change("mongo", None, {"username": "ann", "skills": ["go"], "interests": []})
+        await on_change("mongo", {"username": "bob", "skills": ["go"]}, {"username": "bob", "skills": ["go"],
+                                                                         "availability": False})
+        await on_change("redis", None, {"username": "cat", "availability": True})
+        await on_change("mongo", {"username": "dan", "interests": []}, {"username": "dan", "interests": ["ml"]})
+        return await _dirty(redis)
+
+    assert asyncio.run(scenario()) == {"ann", "dan"}
+
+
+def test_the_endpoint_serves_what_the_worker_computed(db, api, redis, computed):
+    first = api("GET", "/recommendations/bob").json()
+    assert first == {"username": "bob", "recommendations": [], "pending": True}
+    # Asking queued the user for the worker.
+    assert asyncio.run(_dirty(redis)) == {"bob"}
+
+    asyncio.run(recommendation_service.mark_dirty(["ann", "ghost"]))
+    assert asyncio.run(recommendation_service.refresh_dirty()) == 3
+    assert computed == [["ann", "bob", "ghost"]]
+    assert asyncio.run(_dirty(redis)) == set()
+
+    # dan became unavailable after the list was computed.
+    asyncio.run(set_user_availability("dan", False))
+    served = api("GET", "/recommendations/bob").json()
+    assert served["pending"] is False
+    assert [user["username"] for user in served["recommendations"]] == ["ann", "cat"]
+    assert api("GET", "/recommendations/ghost").json()["pending"] is True
+
+
+def test_a_failed_refresh_puts_the_users_back(redis, monkeypatch):
+    async def unavailable(usernames, top_n):
+        raise ConnectionError("Neo4j is down")
+
+    monkeypatch.setattr(neo4j_service, "compute_recommendations", unavailable)
+
+    async def scenario():
+        await recommendation_service.mark_dirty(["ann", "bob"])
+        with pytest.raises(ConnectionError):
+            await recommendation_service.refresh_dirty()
+        return await _dirty(redis)
+
+    assert asyncio.run(scenario()) == {"ann", "bob"}
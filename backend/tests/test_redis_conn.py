@@ -0,0 +1,35 @@
+import asyncio
+import fakeredis
+from fakeredis import aioredis
+from redis.asyncio import Redis
+from backend.app.config.db import redis_conn
+from backend.app.services import metrics
+
+
+def _pool_gauges():
+    return {labels[0]: value for labels, value in metrics.redis_pool_connections._values.items()}
+
+
+def test_pool_metrics_count_checked_out_connections(monkeypatch):
+    pool = redis_conn.create_redis_pool()
+    pool.connection_class = aioredis.FakeAsyncRedisConnection
+    pool.connection_kwargs = {"server": fakeredis.FakeServer()}
+    monkeypatch.setattr(redis_conn, "_redis_pool", pool)
+
+    async def scenario():
+        client = Redis(connection_pool=pool)
+        await asyncio.gather(*(client.ping() for _ in range(3)))
+        held = [await pool.get_connection(), await pool.get_connection()]
+        redis_conn._collect_pool_metrics()
+        during = _pool_gauges()
+        for connection in held:
+            await pool.release(connection)
+        redis_conn._collect_pool_metrics()
+        after = _pool_gauges()
+        await client.aclose()
+        return during, after
+
+    during, after = asyncio.run(scenario())
+    assert during["in_use"] == 2
+    assert during["in_use"] + during["idle"] == pool.created
+    assert after == {"in_use": 0, "idle": pool.created, "max": pool.max_connections}
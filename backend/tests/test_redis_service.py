@@ -0,0 +1,148 @@
+import asyncio
+from backend.app.services import redis_service
+
+
+def test_invalidate_dependents_drops_only_matching_queries(redis):
+    async def scenario():
+        await redis_service.set_cached_query("q:dev5", ["a"], 60, {"role": "developer"}, {"experience": 5})
+        await redis_service.set_cached_query("q:any", ["b"], 60, {"role": None}, {"experience": None})
+        await redis_service.set_cached_query("q:designer", ["c"], 60, {"role": "designer"}, {"experience": 0})
+
+        # A developer with 3 years matches the unfiltered query only.
+        deleted = await redis_service.invalidate_dependents(
+            [{"role": "developer", "experience": 3}], ["role"], ["experience"]
+        )
+        assert deleted == 1
+        assert await redis.exists("q:any") == 0
+        assert await redis.exists("q:dev5") == 1
+        assert await redis.exists("q:designer") == 1
+
+        # Old and new versions of an edited document are both checked.
+        deleted = await redis_service.invalidate_dependents(
+            [{"role": "designer", "experience": 1}, {"role": "developer", "experience": 7}], ["role"], ["experience"]
+        )
+        assert deleted == 2
+        assert await redis.exists("q:dev5", "q:designer") == 0
+        # The index entries go with them.
+        assert await redis.smembers(redis_service._dep_value_key("role", "developer")) == set()
+        assert await redis.zcard(redis_service._dep_min_key("experience")) == 0
+
+    asyncio.run(scenario())
+
+
+def test_invalidation_drops_the_local_copy(redis):
+    async def scenario():
+        await redis_service.set_cached_query("q:sql", ["a"], 60, {"skills": "sql"})
+        assert await redis_service.get_cached_data("q:sql") == ["a"]
+        await redis_service.invalidate_dependents([{"skills": ["go", "sql"]}], ["skills"])
+        assert await redis_service.get_cached_data("q:sql") is None
+
+        await redis_service.set_cached_data("plain", {"x": 1})
+        await redis_service.delete_cached_data("plain")
+        assert await redis_service.get_cached_data("plain") is None
+
+    asyncio.run(scenario())
+
+
+def _counting_loader(value, calls, started=None, release=None):
+    async def loader():
+        calls.append(value)
+        if started is not None:
+            started.set()
+        if release is not None:
+            await release.wait()
+        else:
+            await asyncio.sleep(0.01)
+        return value
+    return loader
+
+
+def test_concurrent_misses_load_once(redis):
+    async def scenario():
+        calls = []
+        loader = _counting_loader({"users": [1, 2]}, calls)
+        results = await asyncio.gather(*(redis_service.get_or_load("k", loader, 60) for _ in range(20)))
+        assert calls == [{"users": [1, 2]}]
+        assert all(result == {"users": [1, 2]} for result in results)
+        assert await redis.exists("k", "k:fresh") == 2
+        # The lease is released once the value is stored.
+        assert await redis.exists(redis_service._lock_key("k")) == 0
+
+    asyncio.run(scenario())
+
+
+def test_waits_for_another_workers_lease(redis, monkeypatch):
+    monkeypatch.setattr(redis_service.settings, "CACHE_LOCK_POLL_SECONDS", 0.01)
+
+    async def scenario():
+        await redis.set(redis_service._lock_key("k"), "other-worker", px=5000)
+
+        async def other_worker_stores():
+            await asyncio.sleep(0.05)
+            await redis.setex("k", 60, b'"theirs"')
+            await redis.setex("k:fresh", 60, b"1")
+
+        calls = []
+        writer = asyncio.create_task(other_worker_stores())
+        assert await redis_service.get_or_load("k", _counting_loader("ours", calls), 60) == "theirs"
+        assert calls == []
+        await writer
+
+    asyncio.run(scenario())
+
+
+def test_stale_value_is_served_while_refreshing(redis):
+    async def scenario():
+        await redis_service.get_or_load("k", _counting_loader("v1", []), 60, stale_seconds=300)
+        # Freshness runs out: the marker is gone and no worker has it in L1.
+        await redis.delete("k:fresh")
+        redis_service._local_cache.clear()
+
+        calls, started, release = [], asyncio.Event(), asyncio.Event()
+        loader = _counting_loader("v2", calls, started, release)
+        assert await redis_service.get_or_load("k", loader, 60, stale_seconds=300) == "v1"
+        await started.wait()
+        # Still stale and refreshing: callers keep getting v1, with no second load.
+        redis_service._local_cache.clear()
+        assert await redis_service.get_or_load("k", loader, 60, stale_seconds=300) == "v1"
+        assert calls == ["v2"]
+
+        release.set()
+        await redis_service._inflight["k:refresh"]
+        assert await redis.exists("k:fresh") == 1
+        assert await redis_service.get_or_load("k", loader, 60, stale_seconds=300) == "v2"
+        assert calls == ["v2"]
+
+    asyncio.run(scenario())
+
+
+def test_failed_lease_release_does_not_fail_the_load(redis, monkeypatch):
+    async def broken_eval(*args, **kwargs):
+        raise ConnectionError("connection lost")
+
+    monkeypatch.setattr(redis, "eval", broken_eval)
+
+    async def scenario():
+        calls = []
+        assert await redis_service.get_or_load("k", _counting_loader("v", calls), 60) == "v"
+        assert calls == ["v"]
+        assert await redis.get("k") == b'"v"'
+        # Left for its TTL to expire.
+        assert await redis.pttl(redis_service._lock_key("k")) > 0
+
+    asyncio.run(scenario())
+
+
+def test_get_or_load_counting_reads_the_set_size_on_every_path(redis):
+    async def scenario():
+        await redis.sadd("dirty", "ann", "bob")
+        # Miss, then a Redis hit, then an L1 hit.
+        assert await redis_service.get_or_load_counting("k", _counting_loader("v", []), 60, count_key="dirty") == ("v", 2)
+        redis_service._local_cache.clear()
+        await redis.srem("dirty", "bob")
+        assert await redis_service.get_or_load_counting("k", _counting_loader("v", []), 60, count_key="dirty") == ("v", 1)
+        await redis.delete("dirty")
+        assert await redis_service.get_or_load_counting("k", _counting_loader("v", []), 60, count_key="dirty") == ("v", 0)
+        assert await redis_service.get_or_load_counting("k", _counting_loader("v", []), 60) == ("v", 0)
+
+    asyncio.run(scenario())
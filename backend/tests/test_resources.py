@@ -0,0 +1,44 @@
+import asyncio
+import os
+import subprocess
+import sys
+from fastapi import FastAPI
+from backend.app.config.db import neo4j_conn, resources
+from backend.app.services import metrics
+from backend.benchmarks.neo4j_stub import StubNeo4jDriver
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_importing_the_neo4j_module_reports_no_pool():
+    code = (
+        "from backend.app.config.db import neo4j_conn\n"
+        "from backend.app.services import metrics\n"
+        "print(metrics.neo4j_pool_max._values)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "{}"
+
+
+def test_importing_the_app_loads_no_store_driver():
+    # Drivers (and numpy, which neo4j and the matching index pull in) are
+    # imported when a store is opened or an index built, not with the app.
+    code = (
+        "import sys\n"
+        "import backend.main\n"
+        "print(sorted(m for m in ('neo4j', 'pymongo', 'motor', 'redis', 'numpy') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+
+def test_neo4j_pool_size_is_reported_once_a_driver_is_open(monkeypatch):
+    monkeypatch.setattr(metrics.neo4j_pool_max, "_values", {})
+    monkeypatch.setattr(neo4j_conn.settings, "NEO4J_MAX_POOL_SIZE", 17)
+    monkeypatch.setattr(neo4j_conn, "create_driver", lambda: StubNeo4jDriver([]))
+
+    async def scenario():
+        async with resources.lifespan(FastAPI(), stores=("neo4j",)):
+            return dict(metrics.neo4j_pool_max._values)
+
+    assert asyncio.run(scenario()) == {(): 17}
@@ -0,0 +1,26 @@
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from backend.app.services.mongodb_service import ALL_USERS_CACHE_KEY
+from backend.app.services.serialization import dumps, loads
+
+
+def test_mongo_documents_encode_without_conversion():
+    oid = ObjectId("64b7f0c2a1b2c3d4e5f60718")
+    doc = {"_id": oid, "username": "ann", "joined": datetime(2024, 5, 1, 12, 30), "skills": ["go"]}
+    assert loads(dumps(doc)) == {
+        "_id": "64b7f0c2a1b2c3d4e5f60718", "username": "ann", "joined": "2024-05-01T12:30:00", "skills": ["go"],
+    }
+
+
+def test_cached_user_lists_are_sent_as_stored(db, api, redis):
+    asyncio.run(db["users"].insert_many([{"username": "ann", "availability": True},
+                                         {"username": "bob", "availability": False}]))
+    first = api("GET", "/mongo/getallusers")
+    stored = asyncio.run(redis.get(ALL_USERS_CACHE_KEY))
+    # A miss encodes once and sends what it stored; a hit sends the bytes as they are.
+    assert first.content == stored
+    second = api("GET", "/mongo/getallusers")
+    assert second.content == stored
+    assert second.headers["content-type"] == "application/json"
+    assert [user["username"] for user in second.json()] == ["ann", "bob"]
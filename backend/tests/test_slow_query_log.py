@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+import pytest
+from backend.app.config import settings
+from backend.app.services import slow_query_log
+
+
+@pytest.fixture(autouse=True)
+def shapes(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_ENABLED", True)
+    monkeypatch.setattr(settings, "SLOW_QUERY_THRESHOLD_MS", 100)
+    slow_query_log.reset()
+    yield
+    slow_query_log.reset()
+
+
+def test_slow_cypher_is_recorded_by_shape_with_redacted_params():
+    query = """
+    MATCH (u:User)-[:HAS_SKILL]->(s:Skill)
+    WHERE s.name IN $skills AND u.experience >= $min_exp
+    RETURN u
+    """
+    slow_query_log.observe_cypher(query, {"skills": ["go", "sql"], "min_exp": 3}, 0.25)
+    slow_query_log.observe_cypher(query.replace("    ", "  "), {"skills": ["rust"], "min_exp": 9}, 0.15)
+    slow_query_log.observe_cypher(query, {"skills": ["go"], "min_exp": 1}, 0.05)
+    slow_query_log.observe_cypher("MERGE (s:Skill {name: $name})", {"name": "secret"}, 0.2)
+
+    read, write = sorted(slow_query_log.top_shapes(store="neo4j"), key=lambda entry: entry["operation"])
+    assert read["operation"] == "read"
+    assert read["shape"] == " ".join(query.split())
+    # The fast run is not counted.
+    assert read["count"] == 2
+    assert read["total_ms"] == pytest.approx(400)
+    assert read["max_ms"] == pytest.approx(250)
+    assert read["last_params"] == {"skills": "<list[1]>", "min_exp": "<int>"}
+    assert write["operation"] == "write"
+    assert "secret" not in str(write)
+
+
+def test_nothing_is_recorded_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_QUERY_ENABLED", False)
+    slow_query_log.observe_cypher("MATCH (u:User) RETURN u", {}, 5.0)
+    assert slow_query_log.top_shapes() == []
+    assert slow_query_log.mongo_event_listeners() == []
+
+
+def _event(request_id, command_name, command=None, duration_ms=0):
+    return SimpleNamespace(request_id=request_id, operation_id=None, command_name=command_name,
+                           command=command, database_name="test", duration_micros=int(duration_ms * 1000))
+
+
+def test_slow_mongo_commands_are_shaped_without_values():
+    listener, = slow_query_log.mongo_event_listeners()
+    find = {"find": "users", "filter": {"role": "admin", "experience": {"$gte": 7}, "skills": {"$in": ["go"]}},
+            "limit": 50, "$db": "test", "lsid": {"id": "x"}}
+    listener.started(_event(1, "find", find))
+    listener.succeeded(_event(1, "find", duration_ms=180))
+    listener.started(_event(2, "find", find))
+    listener.succeeded(_event(2, "find", duration_ms=20))
+    listener.started(_event(3, "getMore", {"getMore": 1, "collection": "users"}))
+    listener.succeeded(_event(3, "getMore", duration_ms=500))
+
+    entry, = slow_query_log.top_shapes(store="mongo")
+    assert entry["operation"] == "find"
+    assert entry["count"] == 1
+    assert entry["shape"] == {"collection": "users", "filter": {"role": "?", "experience": {"$gte": "?"},
+                                                                 "skills": {"$in": ["?"]}}, "limit": "?"}
+    assert "admin" not in str(entry)
+
+
+def test_mongo_plan_summary_flags_collection_scans():
+    explain = {
+        "queryPlanner": {"winningPlan": {"stage": "LIMIT", "inputStage": {"stage": "COLLSCAN"}}},
+        "executionStats": {"nReturned": 3, "totalKeysExamined": 0, "totalDocsExamined": 5000,
+                           "executionTimeMillis": 42},
+    }
+    assert slow_query_log._summarize_mongo(explain) == {
+        "stages": ["LIMIT", "COLLSCAN"], "indexes": [], "returned": 3, "keys_examined": 0,
+        "docs_examined": 5000, "execution_ms": 42,
+    }
@@ -0,0 +1,44 @@
+import asyncio
+from mongomock_motor import AsyncMongoMockClient
+from backend.app.services import redis_service, sync_service
+
+
+def _user(username, **fields):
+    return {"username": username, "name": username.title(), "number": "", "email": "", "role": "developer",
+            "experience": 3, "organization": "acme", "availability": False, "skills": ["sql"], "interests": [],
+            **fields}
+
+
+async def _cache_query(key, role=None, availability=None, experience_min=None):
+    # Registered the way /mongo/filterUsers registers its results.
+    await redis_service.set_cached_query(
+        key, [], 60, {"role": role, "availability": availability, "skills": None, "interests": None},
+        {"experience": experience_min},
+    )
+
+
+def test_outbox_apply_invalidates_queries_matching_the_new_version(redis):
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db["users"].insert_one(_user("ann"))
+        await _cache_query("q:dev_available", role="developer", availability=True)
+        await _cache_query("q:designers", role="designer")
+        await _cache_query("q:senior", experience_min=10)
+
+        # A replicated availability toggle carries only the changed field.
+        await sync_service.enqueue(db, "mongo", [{"username": "ann", "availability": True}])
+        assert await sync_service.process_outbox_batch(db) == 1
+
+        assert (await db["users"].find_one({"username": "ann"}))["availability"] is True
+        # ann is now an available developer; the other queries never matched her.
+        assert await redis.exists("q:dev_available") == 0
+        assert await redis.exists("q:designers", "q:senior") == 2
+
+        # A full document for a new user is upserted and invalidates as well.
+        await _cache_query("q:designers_any", role="designer")
+        await sync_service.enqueue(db, "mongo", [_user("bob", role="designer")])
+        assert await sync_service.process_outbox_batch(db) == 1
+        assert await db["users"].count_documents({"username": "bob"}) == 1
+        assert await redis.exists("q:designers_any") == 0
+
+    asyncio.run(scenario())
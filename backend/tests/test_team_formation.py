@@ -0,0 +1,104 @@
+import math
+import random
+import pytest
+from backend.app.services.team_formation import select_team
+
+EXPERIENCE_WEIGHT = 0.05
+
+
+@pytest.fixture(autouse=True)
+def experience_weight(monkeypatch):
+    monkeypatch.setattr("backend.app.config.settings.TEAM_EXPERIENCE_WEIGHT", EXPERIENCE_WEIGHT)
+
+
+def _plain_greedy(candidates, skills, team_size):
+    # Reference: re-score every candidate before every pick.
+    skills = list(dict.fromkeys(skills))
+    holders = {skill: sum(skill in set(c["skills"]) for c in candidates) for skill in skills}
+    pool = sum(holders.values()) or 1
+    weight = {skill: 1 + math.log(pool / count) for skill, count in holders.items() if count}
+    uncovered = {skill for skill in skills if holders[skill]}
+    team = []
+    while uncovered and len(team) < team_size:
+        def score(c):
+            new = uncovered & set(c["skills"])
+            return sum(weight[skill] for skill in new) * (1 + EXPERIENCE_WEIGHT * c["experience"])
+        best = min(candidates, key=lambda c: (-score(c), c["username"]))
+        if score(best) <= 0:
+            break
+        team.append(best["username"])
+        uncovered -= set(best["skills"])
+    return team
+
+
+def _user(username, skills, experience):
+    return {"username": username, "skills": skills, "experience": experience}
+
+
+FIXTURE = [
+    _user("ann", ["python", "sql"], 6),
+    _user("bob", ["python"], 9),
+    _user("cat", ["rust"], 2),
+    _user("dan", ["sql", "docker", "k8s"], 3),
+    _user("eve", ["docker"], 10),
+    _user("fay", ["python", "sql", "docker"], 1),
+    _user("gus", ["figma"], 4),
+]
+
+
+def test_lazy_greedy_picks_what_plain_greedy_picks():
+    skills = ["python", "sql", "docker", "k8s", "rust"]
+    result = select_team(FIXTURE, skills, 5, 10)
+    assert [member["username"] for member in result["team"]] == _plain_greedy(FIXTURE, skills, 5)
+    assert result["coverage"] == 1.0 and result["uncovered_skills"] == []
+    # Each covered skill is credited to exactly one member.
+    covers = [skill for member in result["team"] for skill in member["covers"]]
+    assert sorted(covers) == sorted(skills)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_lazy_greedy_matches_plain_greedy_on_random_pools(seed):
+    rng = random.Random(seed)
+    skills = [f"s{i}" for i in range(rng.randint(3, 12))]
+    # Distinct experience, so no two candidates can tie on gain.
+    experience = rng.sample(range(40), 30)
+    candidates = [
+        _user(f"u{i:02d}", rng.sample(skills, rng.randint(1, min(4, len(skills)))), experience[i]) for i in range(30)
+    ]
+    team_size = rng.randint(1, 6)
+    result = select_team(candidates, skills, team_size, 10)
+    assert [member["username"] for member in result["team"]] == _plain_greedy(candidates, skills, team_size)
+
+
+def test_skills_nobody_has_are_reported_unavailable():
+    result = select_team(FIXTURE, ["python", "cobol", "rust"], 5, 10)
+    assert {member["username"] for member in result["team"]} == {"bob", "cat"}
+    assert result["covered_skills"] == ["python", "rust"]
+    assert result["uncovered_skills"] == ["cobol"]
+    assert result["unavailable_skills"] == ["cobol"]
+    assert result["coverage"] == round(2 / 3, 4)
+    assert not result["truncated"]
+
+
+def test_no_candidate_has_any_skill():
+    result = select_team(FIXTURE, ["cobol", "fortran"], 5, 10)
+    assert result["team"] == []
+    assert result["uncovered_skills"] == result["unavailable_skills"] == ["cobol", "fortran"]
+    assert result["coverage"] == 0.0
+
+
+def test_team_size_cap_leaves_skills_uncovered():
+    skills = ["python", "sql", "docker", "k8s", "rust", "figma"]
+    result = select_team(FIXTURE, skills, 2, 10)
+    assert len(result["team"]) == 2
+    assert [member["username"] for member in result["team"]] == _plain_greedy(FIXTURE, skills, 2)
+    assert result["uncovered_skills"]
+    # Left over because the team is full, not because nobody has them.
+    assert result["unavailable_skills"] == []
+    assert not result["truncated"]
+
+
+def test_spent_budget_still_returns_the_first_pick():
+    result = select_team(FIXTURE, ["python", "rust", "figma"], 5, 0)
+    assert len(result["team"]) == 1
+    assert result["truncated"]
@@ -0,0 +1,128 @@
+import asyncio
+import random
+from backend.app.services import typeahead_index
+from backend.app.services.typeahead_index import TypeaheadIndex, _TermSet, normalize
+
+
+def _expected(counts, prefix, limit):
+    # Linear reference: every term under the prefix, by count, then name.
+    prefix = normalize(prefix)
+    matches = sorted(
+        (-count, normalize(term), term) for term, count in counts.items() if count > 0 and normalize(term).startswith(prefix)
+    )
+    return [(term, -negative) for negative, _, term in matches[:limit]]
+
+
+def _cached_set(counts, max_limit=2):
+    # range_scan_limit=1 sends every range wider than one term through the
+    # cached top lists, which is what _patch_top maintains.
+    term_set = _TermSet(max_limit, 1)
+    term_set.bulk_load(counts)
+    term_set.warm()
+    return term_set
+
+
+def test_empty_prefix():
+    counts = {"go": 3, "Python": 5, "sql": 1}
+    # Every term matches the empty prefix at the set level, cached or not; the
+    # index, which is what the API calls, answers nothing for it.
+    term_set = _cached_set(counts)
+    assert term_set.search("", 2) == [("Python", 5), ("go", 3)]
+    term_set.change("sql", 4)
+    counts["sql"] += 4
+    assert term_set.search("", 2) == _expected(counts, "", 2) == [("Python", 5), ("sql", 5)]
+    index = TypeaheadIndex(max_limit=10, range_scan_limit=100)
+    index.load([{"username": "ann", "skills": list(counts)}])
+    assert index.search("skill", "") == []
+    assert index.search("skill", "   ") == []
+
+
+def test_prefix_past_the_last_term():
+    term_set = _cached_set({"go": 3, "python": 5, "sql": 1})
+    assert term_set.search("zz", 10) == []
+    assert term_set.search("\U0010ffff", 10) == []
+    assert term_set.search("sqm", 10) == []
+
+
+def test_prefix_matching_folds_case_and_unicode():
+    counts = {"Straße": 2, "STRATEGY": 4, "strawberry": 1, "Élan": 3, "élan vital": 1, "Machine  Learning": 2}
+    term_set = _cached_set(counts, max_limit=10)
+    assert term_set.search(normalize("STRAS"), 10) == [("Straße", 2)]
+    assert term_set.search(normalize("stra"), 10) == _expected(counts, "stra", 10)
+    assert term_set.search(normalize("ÉLAN"), 10) == [("Élan", 3), ("élan vital", 1)]
+    assert term_set.search(normalize("machine learn"), 10) == [("Machine  Learning", 2)]
+    index = TypeaheadIndex(max_limit=10, range_scan_limit=1)
+    index.load([{"username": "ann", "interests": ["Straße", "STRATEGY"]}, {"username": "bob", "interests": ["straße"]}])
+    assert index.search("interest", "  STRASSE ") == [{"term": "Straße", "count": 1}, {"term": "straße", "count": 1}]
+
+
+def test_patch_pushes_an_entry_out_of_the_top():
+    counts = {"sa": 5, "sb": 4, "sc": 3, "sd": 2, "se": 1}
+    term_set = _cached_set(counts)
+    assert term_set.search("s", 2) == [("sa", 5), ("sb", 4)]
+    assert "s" in term_set._top
+
+    # se climbs past both cached entries.
+    for _ in range(5):
+        term_set.change("se", 1)
+        counts["se"] += 1
+    assert term_set.search("s", 2) == [("se", 6), ("sa", 5)] == _expected(counts, "s", 2)
+
+    # The leader falls below everything else.
+    term_set.change("se", -6)
+    del counts["se"]
+    term_set.change("sa", -4)
+    counts["sa"] = 1
+    assert term_set.search("s", 2) == _expected(counts, "s", 2) == [("sb", 4), ("sc", 3)]
+
+    # A new term enters straight at the top.
+    term_set.change("sz", 9)
+    counts["sz"] = 9
+    assert term_set.search("s", 2) == _expected(counts, "s", 2)
+
+
+def test_cached_tops_match_a_linear_scan_under_random_changes():
+    rng = random.Random(7)
+    terms = [a + b for a in "abc" for b in "abcdef"] + ["Ab", "ÀB"]
+    counts = {term: rng.randint(1, 4) for term in terms}
+    term_set = _cached_set(counts, max_limit=3)
+    for _ in range(2000):
+        term = rng.choice(terms)
+        delta = rng.choice([-2, -1, 1, 1, 2])
+        delta = max(delta, -counts.get(term, 0))
+        if delta == 0:
+            continue
+        term_set.change(term, delta)
+        counts[term] = counts.get(term, 0) + delta
+        prefix = rng.choice(["a", "b", "c", "à", "ab", ""])
+        for limit in (1, 3):
+            assert term_set.search(prefix, limit) == _expected(counts, prefix, limit)
+
+
+def test_overlapping_rebuilds_each_replay_writes_made_while_they_ran(monkeypatch):
+    # Two rebuilds read the same snapshot; a write lands while both are still
+    # loading, and whichever one is swapped in last must have it.
+    loaded = asyncio.Event()
+    release = asyncio.Event()
+
+    async def batches(db, batch_size):
+        yield [{"username": "ann", "skills": ["go"], "interests": [], "role": "developer", "name": "Ann"}]
+        loaded.set()
+        await release.wait()
+
+    monkeypatch.setattr(typeahead_index, "iter_user_batches", batches)
+    monkeypatch.setattr(typeahead_index, "_index", None)
+
+    async def scenario():
+        first = asyncio.create_task(typeahead_index.rebuild(source="mongo"))
+        second = asyncio.create_task(typeahead_index.rebuild(source="mongo"))
+        await loaded.wait()
+        await asyncio.sleep(0)
+        await typeahead_index._on_user_change("mongo", None, {"username": "bob", "skills": ["gleam"],
+                                                               "interests": [], "role": "developer", "name": "Bob"})
+        release.set()
+        await asyncio.gather(first, second)
+        return typeahead_index.get_index().search("skill", "g")
+
+    assert {item["term"] for item in asyncio.run(scenario())} == {"go", "gleam"}
+    assert typeahead_index._pending == []
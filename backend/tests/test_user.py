@@ -0,0 +1,90 @@
+import asyncio
+import time
+import httpx
+import pytest
+from neo4j.exceptions import ConstraintError
+from backend.app.routes.neo4j import user as neo4j_user
+from backend.app.services.redis_service import set_user_availability
+from backend.benchmarks.neo4j_stub import StubNeo4jDriver
+from backend.main import app
+
+
+def _profile(username, **fields):
+    return {"username": username, "name": username.title(), "number": "1", "email": f"{username}@example.com",
+            "role": "developer", "skills": ["go"], "interests": [], "experience": 3,
+            "organization": "core", "availability": True, **fields}
+
+
+class UniqueUsernames(StubNeo4jDriver):
+    # Answers CREATE like the username constraint would.
+    def __init__(self, users, **kwargs):
+        super().__init__(users, **kwargs)
+        self.created = []
+
+    def answer(self, query, params):
+        if "CREATE (u:User" in query:
+            if params["username"] in self._users or params["username"] in self.created:
+                raise ConstraintError("Node already exists with label `User` and property `username`")
+            self.created.append(params["username"])
+            return []
+        return super().answer(query, params)
+
+
+@pytest.fixture
+def neo4j():
+    return UniqueUsernames([_profile("ann")], latency_ms=100)
+
+
+@pytest.fixture
+def published(monkeypatch):
+    changes = []
+
+    async def publish(source, old, new):
+        changes.append((source, new["username"]))
+
+    monkeypatch.setattr(neo4j_user, "publish_user_change", publish)
+    return changes
+
+
+def test_add_user_with_a_taken_username_is_a_409(db, api, neo4j, published):
+    created = api("POST", "/neo4j/add_user", json=_profile("bob"))
+    assert created.status_code == 200
+    duplicate = api("POST", "/neo4j/add_user", json=_profile("ann"))
+    assert duplicate.status_code == 409
+    assert duplicate.json()["detail"] == "Username already exists"
+    assert neo4j.created == ["bob"]
+    assert published == [("neo4j", "bob")]
+
+
+def test_neo4j_reads_do_not_wait_for_each_other(db):
+    # Every read takes 100 ms in the driver; awaited on the event loop, ten of
+    # them overlap instead of queueing for threadpool workers.
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(http.get("/neo4j/user_exists/ann") for _ in range(10)))
+            return responses, time.perf_counter() - started
+
+    responses, elapsed = asyncio.run(scenario())
+    assert [response.json() for response in responses] == [{"exists": True}] * 10
+    assert elapsed < 0.5
+
+
+def test_session_bootstrap_returns_existence_and_profile_in_one_call(db, api):
+    session = api("GET", "/neo4j/session/ann").json()
+    assert session["exists"] is True
+    assert session["user"] == _profile("ann")
+    assert api("GET", "/neo4j/session/nobody").json() == {"exists": False, "user": None}
+
+
+def test_session_bootstrap_shows_unflushed_availability(db, api):
+    asyncio.run(set_user_availability("ann", False))
+    assert api("GET", "/neo4j/session/ann").json()["user"]["availability"] is False
+
+
+def test_find_matches_lists_available_users_with_the_skills_they_have(db, api, neo4j):
+    neo4j._users["bob"] = _profile("bob", skills=["rust"], experience=5)
+    neo4j._users["cat"] = _profile("cat", availability=False)
+    matches = api("POST", "/neo4j/find_matches", json={"skills": ["go"], "min_experience": 1}).json()
+    # Users without any of the skills are not filtered out; they come back with none listed.
+    assert {user["username"]: user["skills"] for user in matches} == {"ann": ["go"], "bob": []}
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from backend.app.services import username_filter
+
+
+@pytest.fixture
+def bloom(redis, monkeypatch):
+    # A small filter, built and ready, with fresh stats and no remembered answers.
+    monkeypatch.setattr(username_filter.settings, "USERNAME_FILTER_ENABLED", True)
+    monkeypatch.setattr(username_filter.settings, "USERNAME_FILTER_CAPACITY", 1000)
+    monkeypatch.setattr(username_filter, "_stats", dict.fromkeys(username_filter._stats, 0))
+    username_filter._known.clear()
+
+    async def build(usernames):
+        await username_filter.add(usernames)
+        await redis.hset(username_filter.META_KEY, "params", username_filter._params_tag(*username_filter.filter_params()))
+
+    yield build
+    username_filter._known.clear()
+
+
+def test_positions_are_deterministic():
+    # Stored filters are shared by every worker and survive restarts, so the
+    # positions must never depend on the process (no hash() randomization).
+    assert username_filter._positions("ann", 1000, 3) == [568, 477, 386]
+    assert username_filter._positions("ann", 9585059, 7) == username_filter._positions("ann", 9585059, 7)
+    positions = username_filter._positions("bob", 9586, 7)
+    assert len(positions) == 7 and all(0 <= position < 9586 for position in positions)
+
+
+def test_filter_params_sizes_the_filter_for_its_capacity():
+    assert username_filter.filter_params(1_000_000, 0.01) == (9585059, 7)
+    capacity, error_rate = 5000, 0.01
+    m, k = username_filter.filter_params(capacity, error_rate)
+    bits = set()
+    for i in range(capacity):
+        bits.update(username_filter._positions(f"member{i}", m, k))
+    absent = 20000
+    false_positives = sum(
+        all(position in bits for position in username_filter._positions(f"stranger{i}", m, k)) for i in range(absent)
+    )
+    assert false_positives / absent <= error_rate * 1.5
+
+
+def test_might_contain(bloom, redis):
+    async def scenario():
+        await bloom(["ann", "bob"])
+        assert await username_filter.might_contain("ann")
+        assert not await username_filter.might_contain("zed")
+        # The filter only grows: a known user is answered without Redis.
+        await redis.delete(username_filter.FILTER_KEY)
+        assert await username_filter.might_contain("ann")
+        assert not await username_filter.might_contain("zed")
+
+    asyncio.run(scenario())
+    assert username_filter._stats["local_hits"] == 1
+    assert username_filter._stats["possible_hits"] == 1
+
+
+def test_might_contain_answers_maybe_when_the_filter_is_not_ready(bloom, redis):
+    async def scenario():
+        await bloom(["ann"])
+        await redis.delete(username_filter.META_KEY)
+        return await username_filter.might_contain("zed")
+
+    assert asyncio.run(scenario())
+    assert username_filter._stats["bypassed"] == 1
@@ -0,0 +1,88 @@
+import os
+from typing import List, Optional, Tuple
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+# (connect, read) timeouts in seconds
+TIMEOUT = (float(os.getenv("API_CONNECT_TIMEOUT", 3.05)), float(os.getenv("API_READ_TIMEOUT", 10)))
+PROFILE_TTL_SECONDS = int(os.getenv("API_PROFILE_TTL_SECONDS", 60))
+MATCHES_TTL_SECONDS = int(os.getenv("API_MATCHES_TTL_SECONDS", 30))
+
+# Backend client for the Streamlit app.
+#
+# Streamlit reruns the whole script on every interaction, so every widget
+# change used to open a new connection and repeat the same GETs. Requests now
+# share one pooled session per process, and profile and match results are
+# cached by their inputs with st.cache_data. Writes clear the caches they make
+# stale. Failed calls raise ApiError, which st.cache_data does not cache.
+
+
+class ApiError(Exception):
+    def __init__(self, status_code: Optional[int], message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@st.cache_resource
+def _session() -> requests.Session:
+    # Shared by all browser sessions of this Streamlit process; only GETs are
+    # retried, writes are not idempotent.
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _request(method: str, path: str, **kwargs):
+    try:
+        response = _session().request(method, f"{API_URL}{path}", timeout=TIMEOUT, **kwargs)
+    except requests.RequestException as e:
+        raise ApiError(None, str(e)) from e
+    if response.status_code != 200:
+        raise ApiError(response.status_code, response.text)
+    return response.json()
+
+
+@st.cache_data(ttl=PROFILE_TTL_SECONDS, show_spinner=False)
+def session_bootstrap(username: str) -> dict:
+    # {"exists": bool, "user": profile or None} in one backend call.
+    return _request("GET", f"/neo4j/session/{username}")
+
+
+def get_profile(username: str) -> Optional[dict]:
+    return session_bootstrap(username)["user"]
+
+
+def user_exists(username: str) -> bool:
+    # Not cached: signup must see users created a moment ago by someone else.
+    return _request("GET", f"/neo4j/user_exists/{username}").get("exists", False)
+
+
+@st.cache_data(ttl=MATCHES_TTL_SECONDS, show_spinner=False)
+def _find_matches(role: Optional[str], skills: Tuple[str, ...], min_experience: int) -> List[dict]:
+    payload = {"role": role, "skills": list(skills), "min_experience": min_experience}
+    return _request("POST", "/neo4j/find_matches", json=payload)
+
+
+def find_matches(role: Optional[str], skills: List[str], min_experience: int) -> List[dict]:
+    # Skills are normalized so the same search hits the same cache entry.
+    return _find_matches(role or None, tuple(sorted(set(skills))), min_experience)
+
+
+def update_availability(username: str, availability: bool) -> dict:
+    result = _request("PUT", "/neo4j/update_availability", json={"username": username, "availability": availability})
+    session_bootstrap.clear()
+    _find_matches.clear()
+    return result
+
+
+def add_user(payload: dict) -> dict:
+    result = _request("POST", "/neo4j/add_user", json=payload)
+    session_bootstrap.clear()
+    _find_matches.clear()
+    return result
@@ -1,11 +1,9 @@
 import streamlit as st
-import requests
-import os
+import api_client
+from api_client import ApiError
 
 st.set_page_config(page_title="TeamUp | Home", layout="wide")
 
-API_URL = os.getenv("API_URL", "http://localhost:8000")
-
 # Header and Footer Styling
 st.markdown("""
     <style>
@@ -100,8 +98,11 @@ if not st.session_state.logged_in:
     with st.expander("🔐 Login"):
         username = st.text_input("Username", key="login_username")
         if st.button("Login"):
-            check_response = requests.get(f"{API_URL}/neo4j/user_exists/{username}")
-            if check_response.status_code == 200 and check_response.json().get("exists"):
+            try:
+                exists = api_client.session_bootstrap(username)["exists"]
+            except ApiError:
+                exists = False
+            if exists:
                 st.success("Login successful!")
                 st.session_state.username = username
                 st.session_state.logged_in = True
@@ -112,19 +113,20 @@ if not st.session_state.logged_in:
 
 if st.session_state.page == "profile" and st.session_state.logged_in:
     st.subheader("👤 Your Profile")
-    profile_resp = requests.get(f"{API_URL}/neo4j/get_user/{st.session_state.username}")
-    if profile_resp.status_code == 200:
-        user = profile_resp.json()
+    try:
+        user = api_client.get_profile(st.session_state.username)
+    except ApiError:
+        user = None
+    if user:
         availability = user.get("availability", False)
         updated = st.toggle("Available to Join a Team", value=availability)
 
         if updated != availability:
-            toggle_payload = {"username": st.session_state.username, "availability": updated}
-            toggle_resp = requests.put(f"{API_URL}/neo4j/update_availability", json=toggle_payload)
-            if toggle_resp.status_code == 200:
+            try:
+                api_client.update_availability(st.session_state.username, updated)
                 st.success("Availability updated successfully.")
                 st.rerun()
-            else:
+            except ApiError:
                 st.error("Failed to update availability.")
 
         st.markdown(f"""
@@ -155,14 +157,13 @@ elif st.session_state.page == "main" and st.session_state.logged_in:
         experience = st.slider("Minimum Experience (years)", 0, 30, 1)
 
     if st.button("Find Matches"):
-        payload = {
-            "role": role if role else None,
-            "skills": [s.strip() for s in skills.split(",") if s.strip()],
-            "min_experience": experience
-        }
-        result = requests.post(f"{API_URL}/neo4j/find_matches", json=payload)
-        if result.status_code == 200:
-            matches = result.json()
+        try:
+            matches = api_client.find_matches(
+                role if role else None, [s.strip() for s in skills.split(",") if s.strip()], experience
+            )
+        except ApiError:
+            matches = None
+        if matches is not None:
             if matches:
                 st.success(f"Found {len(matches)} matching collaborators:")
                 for user in matches:
@@ -209,8 +210,11 @@ if not st.session_state.logged_in and not st.session_state.signup_success:
 
             submitted = st.form_submit_button("Create Account")
             if submitted:
-                check_response = requests.get(f"{API_URL}/neo4j/user_exists/{new_username}")
-                if check_response.status_code == 200 and check_response.json().get("exists"):
+                try:
+                    exists = api_client.user_exists(new_username)
+                except ApiError:
+                    exists = False
+                if exists:
                     st.warning("Username already exists. Please choose a different one.")
                 else:
                     payload = {
@@ -225,12 +229,12 @@ if not st.session_state.logged_in and not st.session_state.signup_success:
                         "organization": organization,
                         "availability": availability == "Yes"
                     }
-                    res = requests.post(f"{API_URL}/neo4j/add_user", json=payload)
-                    if res.status_code == 200:
+                    try:
+                        api_client.add_user(payload)
                         st.session_state.signup_success = True
                         st.success("User created, login to continue.")
                         st.rerun()
-                    else:
+                    except ApiError:
                         st.error("Error creating account. Please try again later.")
 elif not st.session_state.logged_in and st.session_state.signup_success:
     st.success("User created, login to continue.")